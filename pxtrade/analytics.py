@@ -0,0 +1,230 @@
+"""
+Performance analytics for portfolio values recorded in some History.
+Functions take a 1-D array of portfolio values, or a 2-D array with one
+column per backtest run, and work along the time axis in NumPy,
+so results for a whole parameter sweep can be scored in one pass.
+"""
+import numpy as np
+import pandas as pd
+from .assets import Asset
+
+
+def _as_2d(values):
+    """ Returns values as a 2-D float array and whether it was 1-D. """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        return values[:, np.newaxis], True
+    if values.ndim != 2:
+        raise ValueError("Expecting a 1-D or 2-D array of values.")
+    return values, False
+
+
+def _result(result, is_1d):
+    if is_1d:
+        return float(result[0])
+    return result
+
+
+def _returns(values):
+    return values[1:] / values[:-1] - 1
+
+
+def returns(values) -> np.ndarray:
+    """ Simple returns from one period to the next. """
+    values, is_1d = _as_2d(values)
+    result = _returns(values)
+    return result[:, 0] if is_1d else result
+
+
+def total_return(values):
+    values, is_1d = _as_2d(values)
+    return _result(values[-1] / values[0] - 1, is_1d)
+
+
+def cagr(values, *, periods_per_year=252, datetimes=None):
+    """Compound annual growth rate.
+    The number of years is taken from the first and last datetimes
+    if given, otherwise from the number of periods.
+    """
+    values, is_1d = _as_2d(values)
+    if datetimes is not None:
+        datetimes = pd.DatetimeIndex(datetimes)
+        years = (datetimes[-1] - datetimes[0]).days / 365.25
+    else:
+        years = (len(values) - 1) / periods_per_year
+    if years <= 0:
+        raise ValueError("Expecting years > 0.")
+    growth = values[-1] / values[0]
+    return _result(growth ** (1 / years) - 1, is_1d)
+
+
+def volatility(values, *, periods_per_year=252):
+    """ Annualised standard deviation of returns. """
+    values, is_1d = _as_2d(values)
+    result = _returns(values).std(axis=0, ddof=1) * np.sqrt(periods_per_year)
+    return _result(result, is_1d)
+
+
+def sharpe(values, *, risk_free=0.0, periods_per_year=252):
+    """ Annualised Sharpe ratio for some annual risk free rate. """
+    values, is_1d = _as_2d(values)
+    excess = _returns(values) - risk_free / periods_per_year
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = excess.mean(axis=0) / excess.std(axis=0, ddof=1)
+    return _result(result * np.sqrt(periods_per_year), is_1d)
+
+
+def sortino(values, *, target=0.0, periods_per_year=252):
+    """Annualised Sortino ratio, which only penalises returns
+    below some annual target return.
+    """
+    values, is_1d = _as_2d(values)
+    excess = _returns(values) - target / periods_per_year
+    downside = np.sqrt((np.minimum(excess, 0) ** 2).mean(axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = excess.mean(axis=0) / downside
+    return _result(result * np.sqrt(periods_per_year), is_1d)
+
+
+def _drawdowns(values):
+    """ Returns the maximum drawdown and longest duration in periods. """
+    peaks = np.maximum.accumulate(values, axis=0)
+    drawdowns = 1 - values / peaks
+    # the duration is the number of periods since the last peak
+    periods = np.arange(len(values))[:, np.newaxis]
+    last_peak = np.where(values >= peaks, periods, 0)
+    last_peak = np.maximum.accumulate(last_peak, axis=0)
+    durations = periods - last_peak
+    return drawdowns.max(axis=0), durations.max(axis=0)
+
+
+def max_drawdown(values):
+    """Returns the maximum drawdown as a fraction of the prior peak,
+    and the longest time spent below some prior peak in periods.
+    """
+    values, is_1d = _as_2d(values)
+    drawdown, duration = _drawdowns(values)
+    if is_1d:
+        return float(drawdown[0]), int(duration[0])
+    return drawdown, duration
+
+
+def turnover(blotter, values, *, portfolio_code=None):
+    """Value traded in the portfolio base currency divided by
+    the average portfolio value.
+    """
+    traded = np.abs(blotter.get_column("base_consideration"))
+    mask = blotter.get_column("passed_compliance").copy()
+    if portfolio_code is not None:
+        codes = blotter.codes
+        if portfolio_code not in codes:
+            return 0.0
+        portfolio_id = codes.index(portfolio_code)
+        mask &= blotter.get_column("portfolio") == portfolio_id
+    average_value = np.asarray(values, dtype=float).mean()
+    return float(np.nansum(traded[mask]) / average_value)
+
+
+def _holding_units(history, frame, portfolio_code) -> pd.DataFrame:
+    """ Recorded units by time stamp, with one column per asset code. """
+    sparse = history._sparse_holdings
+    if sparse is not None:
+        holdings = sparse.get()
+        holdings = holdings[holdings["portfolio"] == portfolio_code]
+        units = holdings.pivot_table(
+            index="datetime",
+            columns=holdings["asset"].astype(str),
+            values="units",
+            aggfunc="sum",
+        )
+        return units.reindex(frame.index).fillna(0)
+    prefix = portfolio_code + "_"
+    columns = [name for name in frame.columns if name.startswith(prefix)]
+    if len(columns) == 0:
+        raise ValueError("No holdings recorded for '%s'." % portfolio_code)
+    units = frame[columns].fillna(0)
+    units.columns = [name[len(prefix):] for name in columns]
+    return units
+
+
+def _fx_factor(frame, base_code, currency_code):
+    """ Recorded rates converting currency_code values to base_code. """
+    if currency_code == base_code:
+        return np.ones(len(frame))
+    pair = base_code + currency_code
+    if pair in frame.columns:
+        return 1 / frame[pair].to_numpy(dtype=float)
+    pair = currency_code + base_code
+    if pair in frame.columns:
+        return frame[pair].to_numpy(dtype=float)
+    raise ValueError("No %s rate recorded." % (base_code + currency_code))
+
+
+def exposure_by_currency(history, *, portfolio_code=None) -> pd.DataFrame:
+    """Holding values in the portfolio base currency by asset currency,
+    with one row per recorded time stamp. Values are built from the
+    recorded holdings, asset values and fx rates, so finished runs can
+    be scored. Rates are only taken from pairs recorded directly
+    between the base and asset currencies.
+    """
+    portfolios = {
+        portfolio.code: portfolio for portfolio in history.portfolios
+    }
+    if portfolio_code is None:
+        if len(portfolios) != 1:
+            raise ValueError("Expecting a portfolio code.")
+        (portfolio_code,) = portfolios
+    portfolio = portfolios.get(portfolio_code)
+    if portfolio is None:
+        raise ValueError("No history for '%s'." % portfolio_code)
+    base_code = portfolio.base_currency_code
+    frame = history.get(copy=False)
+    units = _holding_units(history, frame, portfolio_code)
+    codes = [code for code in units.columns if units[code].any()]
+    units = units[codes].to_numpy(dtype=float)
+    for code in codes:
+        if code not in frame.columns:
+            raise ValueError("No values recorded for '%s'." % code)
+    local_values = frame[codes].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        values = np.where(units == 0, 0.0, units * local_values)
+
+    # one pass over asset codes gives the currency of every column
+    currencies = dict()
+    for column, code in enumerate(codes):
+        asset = Asset.get_asset_for_code(code)
+        if asset is None:
+            raise ValueError("Asset code '%s' doesn't exist." % code)
+        currencies.setdefault(asset.currency_code, list()).append(column)
+    exposure = {
+        currency_code: values[:, columns].sum(axis=1)
+        * _fx_factor(frame, base_code, currency_code)
+        for currency_code, columns in currencies.items()
+    }
+    return pd.DataFrame(exposure, index=frame.index, dtype=float)
+
+
+def score(values, *, risk_free=0.0, periods_per_year=252) -> pd.DataFrame:
+    """Score many backtest runs at once, given a 2-D array of portfolio
+    values with one column per run, or a DataFrame of runs.
+    """
+    columns = None
+    if isinstance(values, pd.DataFrame):
+        columns = values.columns
+    values, _ = _as_2d(values)
+    drawdown, duration = _drawdowns(values)
+    kwargs = dict(periods_per_year=periods_per_year)
+    scores = pd.DataFrame(
+        {
+            "total_return": values[-1] / values[0] - 1,
+            "cagr": cagr(values, **kwargs),
+            "volatility": volatility(values, **kwargs),
+            "sharpe": sharpe(values, risk_free=risk_free, **kwargs),
+            "sortino": sortino(values, target=risk_free, **kwargs),
+            "max_drawdown": drawdown,
+            "max_drawdown_duration": duration,
+        }
+    )
+    if columns is not None:
+        scores.index = columns
+    return scores
@@ -7,9 +7,10 @@ from .cash import Cash, get_cash  # noqa: F401
 from .stock import Stock  # noqa: F401
 from .portfolio import Portfolio  # noqa: F401
 from .fx_rates import FxRate  # noqa: F401
-from .codes import check_currency_code  # noqa: F401
+from .codes import check_currency_code, clear_checked_codes  # noqa: F401
 
 
 def reset():
     Asset.reset()
     Portfolio.reset()
+    clear_checked_codes()
@@ -1,18 +1,51 @@
+import heapq
+import weakref
 from typing import Union
 from numbers import Real
 from abc import ABC, abstractproperty
 from .codes import check_code, check_currency_code, Codes
-from .fx_rates import FxRate
+from .fx_rates import FxRate, fx_matrix
 from ..observable import Observable
 from ..settings import get_default_currency_code
 
 
+class SlotPool:
+    """Hands out the lowest free slot. Slots of assets that have been
+    garbage collected are reused, so portfolio holding arrays grow
+    with the number of live assets rather than all assets ever created.
+    """
+
+    def __init__(self):
+        self._free = list()  # heap of released slots
+        self._size = 0  # slots handed out so far
+
+    @property
+    def size(self):
+        """ One more than the highest slot in use (or released). """
+        return self._size
+
+    def take(self):
+        if self._free:
+            return heapq.heappop(self._free)
+        slot = self._size
+        self._size += 1
+        return slot
+
+    def release(self, slot):
+        heapq.heappush(self._free, slot)
+
+    def __len__(self):
+        """ Number of slots in use. """
+        return self._size - len(self._free)
+
+
 class Asset(ABC):
     """All asset objects must have a unique code.
     Each asset type must define it's own local_value property.
     """
 
     _codes = Codes()
+    _slots = SlotPool()
     yahoo_ticker = None
 
     @classmethod
@@ -43,9 +76,12 @@ class Asset(ABC):
         currency_code = check_currency_code(currency_code)
         self._code = code
         self._currency_code = currency_code
+        self._currency_index = fx_matrix.get_index(currency_code)
         self._price = price
         self._multiplier = multiplier
         self._codes.register(code, self)
+        slot = self._slot = self._slots.take()
+        weakref.finalize(self, self._slots.release, slot)
 
     # code, currency_code and multiplier are all read only after init
     @property
@@ -56,6 +92,16 @@ class Asset(ABC):
     def currency_code(self):
         return self._currency_code
 
+    @property
+    def currency_index(self):
+        """ Index of the asset currency in the fx rate matrix. """
+        return self._currency_index
+
+    @property
+    def slot(self):
+        """ Position of the asset in portfolio holding arrays. """
+        return self._slot
+
     @property
     def multiplier(self):
         """ multiplier is read only after init. """
@@ -105,6 +151,10 @@ class VariablePriceAsset(Asset, Observable):
         if price is not None:
             if not isinstance(price, Real):
                 raise TypeError("Expecting numeric price.")
+        self._set_price(price)
+
+    def _set_price(self, price):
+        """ Set a price that has already been validated. """
         self._price = price
         self.notify_observers()
 
@@ -1,16 +1,33 @@
 """ Ensure codes are unique and associated with some security. """
+from sys import intern
 from weakref import WeakValueDictionary
 from ..util import clean_string
 
 
+_checked_codes = dict()  # code as passed -> interned clean code
+
+
+def clear_checked_codes():
+    """ Called by assets.reset so the cache doesn't grow unbounded. """
+    _checked_codes.clear()
+
+
 def check_code(code: str) -> str:
     """Validates a proposed asset code.
+    Each distinct valid code is only cleaned once and then interned.
     >>> check_code(" aapl ")
     'AAPL'
     """
+    checked = _checked_codes.get(code)
+    if checked is not None:
+        return checked
     if not isinstance(code, str):
         raise TypeError("Expecting string.")
-    return clean_string(code)
+    checked = clean_string(code)
+    if len(checked) == 0:
+        raise ValueError("Expecting a non-empty code.")
+    checked = _checked_codes[code] = intern(checked)
+    return checked
 
 
 def check_currency_code(code: str) -> str:
@@ -4,8 +4,9 @@ However, portfolios may consist of assets denominated in different currencies.
 We'll need to value all assets in a chosen base currency.
 To do this we need to keep track of FX rates.
 """
-from weakref import WeakValueDictionary
+from weakref import WeakValueDictionary, finalize
 from numbers import Real
+import numpy as np
 from ..observable import Observable
 from ..util import clean_string
 
@@ -24,10 +25,8 @@ def split_pair(pair):
     >>> split_pair("AUDUSD")
     ('AUD', 'USD')
     """
-    pair = validate_pair(pair)
-    ccy1 = pair[:3]
-    ccy2 = pair[3:]
-    return ccy1, ccy2
+    pair = get_pair(pair)
+    return pair.ccy1, pair.ccy2
 
 
 def is_equivalent_pair(pair):
@@ -38,10 +37,7 @@ def is_equivalent_pair(pair):
     >>> is_equivalent_pair("AUDUSD")
     False
     """
-    ccy1, ccy2 = split_pair(pair)
-    if ccy1 == ccy2:
-        return True
-    return False
+    return get_pair(pair).is_equivalent
 
 
 def get_inverse_pair(pair):
@@ -49,8 +45,204 @@ def get_inverse_pair(pair):
     >>> get_inverse_pair("AUDUSD")
     'USDAUD'
     """
-    ccy1, ccy2 = split_pair(pair)
-    return ccy2 + ccy1
+    return get_pair(pair).inverse.pair
+
+
+class FxMatrix:
+    """A dense matrix of fx rates indexed by currency.
+    rates[i, j] is the number of units of currency j for one unit
+    of currency i. Quoted rates (and their inverse) are updated in place.
+    Cross rates are derived via some common currency and cached until
+    one of the quoted legs changes.
+    Currency indices are never reused, so they can be cached elsewhere.
+    """
+
+    def __init__(self):
+        self._indices = dict()  # currency code -> index
+        self._currencies = list()  # index -> currency code
+        self._size = 0
+        self._rates = np.ones((0, 0))
+        self._quoted = np.zeros((0, 0), dtype=bool)
+        self._generation = 0
+        self.reset()
+
+    def reset(self):
+        """ Remove all rates but keep currency indices. """
+        capacity = max(len(self._rates), 8)
+        self._rates = np.full((capacity, capacity), np.nan)
+        np.fill_diagonal(self._rates, 1.0)
+        self._quoted = np.zeros((capacity, capacity), dtype=bool)
+        self._dependents = dict()  # quoted leg -> derived cross rates
+        self._generation += 1
+
+    @property
+    def generation(self):
+        """ This changes each time the matrix is reset. """
+        return self._generation
+
+    @property
+    def rates(self):
+        """ A read only view of rates for all currency indices. """
+        size = self._size
+        rates = self._rates[:size, :size]
+        rates.flags.writeable = False
+        return rates
+
+    def get_index(self, currency_code):
+        index = self._indices.get(currency_code)
+        if index is not None:
+            return index
+        index = self._indices[currency_code] = self._size
+        self._currencies.append(currency_code)
+        self._size += 1
+        capacity = len(self._rates)
+        if self._size > capacity:
+            self._grow(2 * capacity)
+        return index
+
+    def get_currency(self, index):
+        return self._currencies[index]
+
+    def _grow(self, capacity):
+        old_capacity = len(self._rates)
+        rates = np.full((capacity, capacity), np.nan)
+        np.fill_diagonal(rates, 1.0)
+        rates[:old_capacity, :old_capacity] = self._rates
+        quoted = np.zeros((capacity, capacity), dtype=bool)
+        quoted[:old_capacity, :old_capacity] = self._quoted
+        self._rates = rates
+        self._quoted = quoted
+
+    def add_quote(self, i, j):
+        """ Some fx rate instance quotes this currency pair. """
+        self._quoted[i, j] = self._quoted[j, i] = True
+        self.set_rate(i, j, None)
+
+    def remove_quote(self, i, j):
+        self.set_rate(i, j, None)
+        self._quoted[i, j] = self._quoted[j, i] = False
+
+    def set_rate(self, i, j, rate):
+        rates = self._rates
+        if rate is None:
+            rates[i, j] = rates[j, i] = np.nan
+        else:
+            rates[i, j] = rate
+            rates[j, i] = 1 / rate
+        # invalidate any cross rates that use this leg
+        for a, b in self._dependents.pop((min(i, j), max(i, j)), ()):
+            rates[a, b] = rates[b, a] = np.nan
+
+    def find_common(self, i, j):
+        """Returns the index of some currency quoted against both
+        i and j, or None if there isn't one.
+        """
+        size = self._size
+        quoted = self._quoted
+        common = np.flatnonzero(quoted[i, :size] & quoted[:size, j])
+        if len(common) == 0:
+            return None
+        return int(common[0])
+
+    def rate(self, i, j):
+        """Returns the rate for currency indices i and j.
+        This will be NaN if the rate is not available.
+        """
+        rate = self._rates[i, j]
+        if rate == rate or self._quoted[i, j]:
+            return rate
+        k = self.find_common(i, j)
+        if k is None:
+            return rate
+        rates = self._rates
+        rate = rates[i, k] * rates[k, j]
+        if rate == rate:  # cache until one of the legs changes
+            rates[i, j] = rate
+            rates[j, i] = 1 / rate
+            dependents = self._dependents
+            for leg in ((min(i, k), max(i, k)), (min(k, j), max(k, j))):
+                dependents.setdefault(leg, set()).add((i, j))
+        return rate
+
+
+fx_matrix = FxMatrix()  # singleton
+
+
+class CurrencyPair:
+    """An immutable currency pair that is validated once and interned.
+    Hot paths pass these around rather than re-validating strings.
+    Create with get_pair rather than directly.
+    """
+
+    __slots__ = (
+        "pair",
+        "ccy1",
+        "ccy2",
+        "indices",
+        "is_equivalent",
+        "inverse",
+    )
+
+    def __init__(self, pair, inverse=None):
+        ccy1 = pair[:3]
+        ccy2 = pair[3:]
+        indices = (fx_matrix.get_index(ccy1), fx_matrix.get_index(ccy2))
+        set_attribute = super().__setattr__
+        set_attribute("pair", pair)
+        set_attribute("ccy1", ccy1)
+        set_attribute("ccy2", ccy2)
+        set_attribute("indices", indices)
+        set_attribute("is_equivalent", ccy1 == ccy2)
+        if inverse is None:
+            inverse = self if ccy1 == ccy2 else CurrencyPair(ccy2 + ccy1, self)
+        set_attribute("inverse", inverse)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CurrencyPair is immutable.")
+
+    def __str__(self):
+        return self.pair
+
+    def __repr__(self):
+        return "CurrencyPair('%s')" % self.pair
+
+
+_pairs = dict()  # str or CurrencyPair -> CurrencyPair
+
+
+def clear_pairs():
+    """Called by FxRate.reset so the cache doesn't grow unbounded.
+    Pairs already handed out stay valid, as currency indices are kept.
+    """
+    _pairs.clear()
+
+
+def get_pair(pair) -> CurrencyPair:
+    """Returns the interned CurrencyPair for a pair string.
+    Each distinct string is only validated once.
+    >>> get_pair(" audusd ").inverse
+    CurrencyPair('USDAUD')
+    """
+    interned = _pairs.get(pair)
+    if interned is not None:
+        return interned
+    if isinstance(pair, CurrencyPair):
+        return pair
+
+    cleaned = validate_pair(pair)
+    interned = _pairs.get(cleaned)
+    if interned is None:
+        interned = CurrencyPair(cleaned)
+        _pairs[cleaned] = interned
+        _pairs[interned.inverse.pair] = interned.inverse
+    _pairs[pair] = interned
+    return interned
+
+
+def _remove_quote(generation, i, j):
+    """ Called once an fx rate instance is garbage collected. """
+    if generation == fx_matrix.generation:
+        fx_matrix.remove_quote(i, j)
 
 
 class FxRate(Observable):
@@ -63,6 +255,8 @@ class FxRate(Observable):
     @classmethod
     def reset(cls):
         cls._instances = WeakValueDictionary()
+        fx_matrix.reset()
+        clear_pairs()
 
     @classmethod
     def get_instances(cls):
@@ -70,14 +264,20 @@ class FxRate(Observable):
 
     def __init__(self, pair, rate=None):
         super().__init__()
-        pair = validate_pair(pair)
+        currency_pair = get_pair(pair)
+        pair = currency_pair.pair
         if pair in self._instances:
             raise ValueError("%s already created" % pair)
-        inverse_pair = get_inverse_pair(pair)
+        inverse_pair = currency_pair.inverse.pair
         if inverse_pair in self._instances:
             raise ValueError("%s inverse pair already created" % inverse_pair)
 
         self._pair = pair
+        self._currency_pair = currency_pair
+        i, j = self._indices = currency_pair.indices
+        self._generation = fx_matrix.generation
+        fx_matrix.add_quote(i, j)
+        finalize(self, _remove_quote, self._generation, i, j)
         self.rate = rate
         self._instances[pair] = self
 
@@ -92,7 +292,13 @@ class FxRate(Observable):
                 raise TypeError("Expecting numeric rate or None.")
             if rate <= 0:
                 raise ValueError("FX rate must be > 0.")
+        self._set_rate(rate)
+
+    def _set_rate(self, rate):
+        """ Set a rate that has already been validated. """
         self._rate = rate
+        if self._generation == fx_matrix.generation:
+            fx_matrix.set_rate(*self._indices, rate)
         self.notify_observers()
 
     @property
@@ -100,29 +306,29 @@ class FxRate(Observable):
         """ This is read only. """
         return self._pair
 
+    @property
+    def currency_pair(self):
+        return self._currency_pair
+
     @classmethod
     def get(cls, pair):
-        pair = validate_pair(pair)
-
-        if is_equivalent_pair(pair):
+        """Returns the rate for a pair, its inverse, or a cross rate
+        derived via some common currency (e.g. AUDJPY from AUDUSD
+        and USDJPY). The pair can be a string or CurrencyPair.
+        """
+        pair = get_pair(pair)
+        if pair.is_equivalent:
             return 1.0
 
-        fx = cls._instances.get(pair)
-        if fx is not None:
-            if fx.rate is not None:
-                return fx.rate
-
-        inverse_pair = get_inverse_pair(pair)
-        fx = cls._instances.get(inverse_pair)
-        if fx is not None:
-            if fx.rate is not None:
-                return 1 / fx.rate
+        rate = fx_matrix.rate(*pair.indices)
+        if rate == rate:  # not NaN
+            return float(rate)
 
         raise ValueError("%s rate not available" % pair)
 
     @classmethod
     def get_instance(cls, pair):
-        pair = validate_pair(pair)
+        pair = get_pair(pair).pair
         instance = cls._instances.get(pair)
         if instance is None:
             raise ValueError("%s instance doesn't exist" % pair)
@@ -133,17 +339,37 @@ class FxRate(Observable):
         """Return an instance representing either the
         currency pair (if available) or its inverse.
         """
-        pair = validate_pair(pair)
-        instance = cls._instances.get(pair)
+        pair = get_pair(pair)
+        instance = cls._instances.get(pair.pair)
         if instance is not None:
             return instance
 
-        inverse_pair = get_inverse_pair(pair)
-        instance = cls._instances.get(inverse_pair)
+        instance = cls._instances.get(pair.inverse.pair)
         if instance is not None:
             return instance
 
         raise ValueError("%s instance doesn't exist" % pair)
 
+    @classmethod
+    def get_observable_instances(cls, pair):
+        """Return the instances the rate for this pair depends on.
+        This is the pair (or its inverse) where available,
+        otherwise both legs of a cross rate.
+        """
+        pair = get_pair(pair)
+        for quoted_pair in (pair, pair.inverse):
+            instance = cls._instances.get(quoted_pair.pair)
+            if instance is not None:
+                return [instance]
+
+        k = fx_matrix.find_common(*pair.indices)
+        if k is None:
+            raise ValueError("%s instance doesn't exist" % pair)
+        common_ccy = fx_matrix.get_currency(k)
+        return [
+            cls.get_observable_instance(pair.ccy1 + common_ccy),
+            cls.get_observable_instance(common_ccy + pair.ccy2),
+        ]
+
     def __str__(self):
         return self._pair
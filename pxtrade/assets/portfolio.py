@@ -5,11 +5,15 @@ Whenever an asset is transfered to / from or traded into the portfolio
 the revalue method is called.
 """
 from collections import defaultdict
+from contextlib import contextmanager
 from numbers import Real
+import numpy as np
+import pandas as pd
+import pxtrade
 from .asset import Asset, VariablePriceAsset
 from .cash import Cash, get_cash
 from .codes import Codes, check_code, check_currency_code
-from .fx_rates import FxRate, is_equivalent_pair
+from .fx_rates import FxRate, fx_matrix, get_pair
 from ..observable import Observer
 from ..settings import get_default_currency_code
 from ..compliance import Compliance
@@ -25,6 +29,10 @@ class Portfolio(Observer):
     def reset(cls):
         cls._codes.reset()
 
+    @classmethod
+    def get_instances(cls):
+        return cls._codes.get_instances()
+
     def __init__(self, base_currency_code=None, *, code=None):
         super().__init__()
         if base_currency_code is None:
@@ -34,8 +42,15 @@ class Portfolio(Observer):
         # we can't have more than one portfolio with a code of None
         self._codes.register(code, self)
         self._base_currency_code = check_currency_code(base_currency_code)
+        self._base_index = fx_matrix.get_index(self._base_currency_code)
         self._code = code
         self._holdings = defaultdict(lambda: 0)
+        self._assets_by_code = dict()  # for assets in holdings
+        self._traded_codes = None  # set when recording traded assets
+        self._batch_depth = 0  # revaluation is deferred within a batch
+        # holding units and base currency values indexed by asset slot
+        self._units = np.zeros(0)
+        self._values = np.zeros(0)
         self._value = 0
         self._compliance = Compliance()  # empty by default
         self._broker = Broker()
@@ -87,29 +102,53 @@ class Portfolio(Observer):
         else:
             if not isinstance(units, Real):
                 raise TypeError("Expecting numeric value.")
+        if consideration is not None:
+            if not isinstance(consideration, Real):
+                raise TypeError("Expecting numeric consideration.")
+        self._trade(asset, units, consideration)
 
+    def _trade(self, asset, units, consideration=None):
+        """ Trade with arguments that have already been validated. """
         if consideration is None:
             asset_local_value = asset.local_value
             if asset_local_value is None:
                 raise ValueError("Asset local value is None.")
             consideration = asset.local_value * -units
 
-        if not isinstance(consideration, Real):
-            raise TypeError("Expecting numeric consideration.")
-
         asset_currency_code = asset.currency_code
         cash = get_cash(asset_currency_code)
         if isinstance(asset, Cash):  # we are trading FX
             base_code = self._base_currency_code
             cash = get_cash(base_code)
-            consideration /= FxRate.get(base_code + asset_currency_code)
+            consideration /= self._get_fx_rate(asset)
 
         # print("asset: ", asset)
         # print("cash: ", cash)
-        self._holdings[asset] += units
-        self._holdings[cash] += consideration
+        holdings = self._holdings
+        holdings[asset] += units
+        holdings[cash] += consideration
+        self._assets_by_code[asset.code] = asset
+        self._assets_by_code[cash.code] = cash
+        self._set_slot_units(asset, holdings[asset])
+        self._set_slot_units(cash, holdings[cash])
+        traded_codes = self._traded_codes
+        if traded_codes is not None:
+            traded_codes.add(asset.code)
+            traded_codes.add(cash.code)
         self._check_observable(asset)
-        self._revalue()
+        if self._batch_depth == 0:
+            self._revalue()
+
+    @contextmanager
+    def batch(self):
+        """ Revalue once at the end of a batch of trades. """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._revalue()
 
     def _check_observable(self, asset):
         """Check whether we need to observe some asset.
@@ -117,45 +156,184 @@ class Portfolio(Observer):
         observe the asset and its quoted currency.
         """
         units = self._holdings[asset]
-        fx_pair = self._base_currency_code + asset.currency_code
-        if not is_equivalent_pair(fx_pair):  # e.g. don't observe 'AUDAUD'
-            fx_observable = FxRate.get_observable_instance(fx_pair)
-            fx_observable.add_observer(self)
+        fx_pair = get_pair(self._base_currency_code + asset.currency_code)
+        if not fx_pair.is_equivalent:  # e.g. don't observe 'AUDAUD'
+            for fx_observable in FxRate.get_observable_instances(fx_pair):
+                fx_observable.add_observer(self)
         if isinstance(asset, VariablePriceAsset):
             if units != 0:
                 asset.add_observer(self)
             else:
                 asset.remove_observer(self)
 
+    def _set_slot_units(self, asset, units):
+        slot = asset._slot
+        if slot >= len(self._units):
+            size = max(2 * len(self._units), slot + 1, 16)
+            for name in ("_units", "_values"):
+                array = np.zeros(size)
+                current = getattr(self, name)
+                array[: len(current)] = current
+                setattr(self, name, array)
+        self._units[slot] = units
+
+    @property
+    def units_by_slot(self):
+        """Read only array of holding units indexed by asset slot.
+        Slots beyond the end of the array have no holding.
+        """
+        units = self._units.view()
+        units.flags.writeable = False
+        return units
+
+    @property
+    def values_by_slot(self):
+        """ Read only array of base currency values indexed by asset slot. """
+        values = self._values.view()
+        values.flags.writeable = False
+        return values
+
     def observable_update(self, observable):
         self._revalue()
 
+    def _get_fx_rate(self, asset):
+        """ Returns the base currency / asset currency fx rate. """
+        fx_rate = fx_matrix.rate(self._base_index, asset._currency_index)
+        if fx_rate != fx_rate:  # NaN
+            raise ValueError(
+                "%s rate not available"
+                % (self._base_currency_code + asset.currency_code)
+            )
+        return fx_rate
+
     def _revalue(self):
         value = 0
-        base_currency_code = self._base_currency_code
+        base_index = self._base_index
+        get_rate = fx_matrix.rate
+        values = self._values
         for asset, units in self._holdings.items():
             # calculate the value of this holding to the portfolio
-            fx_pair = base_currency_code + asset.currency_code
-            fx_rate = FxRate.get(fx_pair)
-            value += asset.local_value / fx_rate * units
-        self._value = value
+            fx_rate = get_rate(base_index, asset._currency_index)
+            if fx_rate != fx_rate:
+                fx_rate = self._get_fx_rate(asset)  # raises
+            holding_value = asset.local_value / fx_rate * units
+            values[asset._slot] = holding_value
+            value += holding_value
+        self._value = float(value)
+
+    def get_holdings(self):
+        """ Returns non-zero holding units keyed by asset code. """
+        return {
+            asset.code: units
+            for asset, units in self._holdings.items()
+            if units != 0
+        }
+
+    def _restore_holdings(self, holdings):
+        """Replace all holdings with those from get_holdings.
+        Used to resume a backtest from some stored state.
+        """
+        assets = list()
+        for asset_code in holdings:
+            asset = Asset.get_asset_for_code(asset_code)
+            if asset is None:
+                raise ValueError("Asset code '%s' doesn't exist." % asset_code)
+            assets.append(asset)
+
+        for asset in list(self._holdings):
+            if isinstance(asset, VariablePriceAsset):
+                asset.remove_observer(self)
+        self._holdings.clear()
+        self._assets_by_code.clear()
+        self._units[:] = 0
+        self._values[:] = 0
+        for asset, units in zip(assets, holdings.values()):
+            self._holdings[asset] = units
+            self._assets_by_code[asset.code] = asset
+            self._set_slot_units(asset, units)
+            self._check_observable(asset)
+        self._revalue()
 
     def get_holding_units(self, asset_code):
-        asset_code = check_code(asset_code)
-        for asset, units in self._holdings.items():
-            if asset.code == asset_code:
-                return units
-        return 0
+        asset = self._assets_by_code.get(check_code(asset_code))
+        if asset is None:
+            return 0
+        return self._holdings[asset]
 
     def get_holding_weight(self, asset_code):
-        asset_code = check_code(asset_code)
-        for asset, units in self._holdings.items():
-            if asset.code == asset_code:
-                fx_pair = self._base_currency_code + asset.currency_code
-                fx_rate = FxRate.get(fx_pair)
-                asset_value = asset.local_value / fx_rate * units
-                return asset_value / self._value
-        return 0
+        asset = self._assets_by_code.get(check_code(asset_code))
+        if asset is None:
+            return 0
+        units = self._holdings[asset]
+        fx_rate = self._get_fx_rate(asset)
+        asset_value = asset.local_value / fx_rate * units
+        return asset_value / self._value
+
+    def rebalance_to(self, target_weights, *, tolerance=0.0, lot_size=1):
+        """Returns a TradeBatch that moves holdings towards target weights.
+        target_weights maps assets or asset codes to weights of the
+        portfolio value. Assets that aren't given are left unchanged,
+        so include a weight of zero to sell out of some asset.
+        Target units are rounded towards zero to a multiple of lot_size
+        and trades are skipped where the current weight is within
+        tolerance of the target.
+        """
+        if isinstance(target_weights, pd.Series):
+            target_weights = target_weights.to_dict()
+        if not isinstance(target_weights, dict):
+            raise TypeError("Expecting dict or pd.Series of weights.")
+        if not isinstance(tolerance, Real):
+            raise TypeError("Expecting numeric tolerance.")
+        if not isinstance(lot_size, int):
+            raise TypeError("Expecting integer lot size.")
+        if lot_size < 1:
+            raise ValueError("Expecting lot size >= 1.")
+        portfolio_value = self._value
+        if portfolio_value <= 0:
+            raise ValueError("Portfolio value must be > 0.")
+
+        assets = list()
+        fx_rates = dict()  # currency index -> base / asset currency rate
+        for asset in target_weights:
+            if not isinstance(asset, Asset):
+                code = check_code(asset)
+                asset = Asset.get_asset_for_code(code)
+                if asset is None:
+                    raise ValueError("Asset code '%s' doesn't exist." % code)
+            if isinstance(asset, Cash):
+                raise ValueError("Cash holdings can't be rebalanced.")
+            if asset.local_value is None:
+                raise ValueError("Asset local value is None.")
+            if asset._currency_index not in fx_rates:
+                fx_rates[asset._currency_index] = self._get_fx_rate(asset)
+            assets.append(asset)
+        weights = np.array(list(target_weights.values()), dtype=float)
+
+        # value of one unit in the base currency
+        local_values = np.array([a.local_value for a in assets], dtype=float)
+        asset_fx_rates = np.array(
+            [fx_rates[a._currency_index] for a in assets], dtype=float
+        )
+        unit_values = local_values / asset_fx_rates
+
+        slots = np.array([a._slot for a in assets], dtype=int)
+        units = self._units
+        current_units = np.zeros(len(assets))
+        held = slots < len(units)
+        current_units[held] = units[slots[held]]
+        current_weights = current_units * unit_values / portfolio_value
+
+        target_units = weights * portfolio_value / unit_values
+        target_units = np.trunc(target_units / lot_size) * lot_size
+        trade_units = target_units - current_units
+        trade_units[np.abs(weights - current_weights) <= tolerance] = 0
+
+        trade_batch = pxtrade.trade.TradeBatch()
+        for i in np.flatnonzero(trade_units):
+            units = int(trade_units[i])
+            if units != 0:
+                trade_batch.add(pxtrade.Trade(self, assets[i], units))
+        return trade_batch
 
     def __str__(self):
         holdings = self._holdings
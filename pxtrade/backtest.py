@@ -1,26 +1,144 @@
+from collections import defaultdict
 from copy import copy
+from time import perf_counter
 from pxtrade import trade
 from pxtrade import events
+from pxtrade import settings
+from .assets import Asset, VariablePriceAsset, FxRate, Portfolio
 from .events_queue import EventsQueue
+from .observable import Observable, Observer
+from .live import TimestampClose
 from .strategy import Strategy
+from .schedule import Schedule
 from .history import History
+from .lookback import RingBuffer
+from .blotter import Blotter
 
 
-class Backtest:
+class Backtest(Observable):
+    """Observers are notified as each time stamp is complete.
+    A trusted backtest runs in trusted mode, where the internal calls
+    made by the engine skip re-validating events and trades that were
+    validated when they were created.
+    With batch_trades, each list of trades returned by a strategy is
+    processed as a single TradeBatch.
+    Limit and stop orders returned by a strategy rest in the order book
+    and are checked as asset prices change.
+    """
+
     def __init__(
         self,
         strategy=None,
         *,
         record_history=True,
+        trusted=False,
+        batch_trades=False,
     ):
+        super().__init__()
         self._indicators = dict()
         self._events_queue = EventsQueue()
         self._datetime = None
-        if strategy is not None:
-            if not isinstance(strategy, Strategy):
-                raise TypeError("Expecting Strategy instance.")
-        self._strategy = strategy
+        self._resume_datetime = None
+        self._latency = None
+        self._changed = set()
+        self._strategies = list()
+        self._subscriptions = dict()  # strategy -> instruments
+        self._subscribers = defaultdict(list)  # instrument -> strategies
+        self._lookbacks = dict()  # instrument -> RingBuffer
+        self._lookback_names = dict()  # code, pair or name -> RingBuffer
         self._record_history = record_history
+        self._order_book = trade.OrderBook()
+        self._blotter = Blotter()
+        self._stopped = False
+        self._monitors = list()  # observers kept alive by the backtest
+        self._shared_events = False  # see BacktestSnapshot
+        if not isinstance(trusted, bool):
+            raise TypeError("Expecting boolean.")
+        self._trusted = trusted
+        if not isinstance(batch_trades, bool):
+            raise TypeError("Expecting boolean.")
+        self._batch_trades = batch_trades
+        if strategy is not None:
+            if isinstance(strategy, Strategy):
+                strategy = [strategy]
+            if not isinstance(strategy, list):
+                raise TypeError("Expecting Strategy or list of strategies.")
+            for each_strategy in strategy:
+                self.add_strategy(each_strategy)
+
+    def add_strategy(self, strategy):
+        """Strategies are run in the order they are added.
+        Those with subscriptions are only run when one of
+        the instruments they subscribe to has changed.
+        """
+        if not isinstance(strategy, Strategy):
+            raise TypeError("Expecting Strategy instance.")
+        if strategy in self._subscriptions:
+            raise ValueError("Strategy has already been added.")
+        schedule = strategy.schedule
+        if schedule is not None:
+            if not isinstance(schedule, Schedule):
+                raise TypeError("Expecting Schedule instance.")
+
+        subscriptions = strategy.subscriptions
+        if subscriptions is not None:
+            subscriptions = frozenset(subscriptions)
+            for instrument in subscriptions:
+                if not isinstance(instrument, (Asset, FxRate, str)):
+                    raise TypeError(
+                        "Expecting Asset, FxRate or indicator name."
+                    )
+                self._subscribers[instrument].append(strategy)
+                if strategy.lookback is not None:
+                    self.add_lookback(instrument, strategy.lookback)
+        self._strategies.append(strategy)
+        self._subscriptions[strategy] = subscriptions
+
+    @property
+    def strategies(self):
+        return list(self._strategies)
+
+    def add_lookback(self, instrument, capacity):
+        """Keep the latest values for some asset, fx rate or indicator
+        name in a RingBuffer with (at least) this capacity.
+        """
+        if isinstance(instrument, Asset):
+            name = instrument.code
+        elif isinstance(instrument, FxRate):
+            name = instrument.pair
+        elif isinstance(instrument, str):
+            name = instrument
+        else:
+            raise TypeError("Expecting Asset, FxRate or indicator name.")
+
+        buffer = self._lookbacks.get(instrument)
+        if buffer is not None:
+            if buffer.capacity >= capacity:
+                return buffer
+            values = buffer.view()
+            buffer = RingBuffer(capacity)
+            for value in values:
+                buffer.append(value)
+        else:
+            buffer = RingBuffer(capacity)
+        self._lookbacks[instrument] = buffer
+        self._lookback_names[name] = buffer
+        return buffer
+
+    def rolling(self, name):
+        """Returns the RingBuffer for some asset code, fx pair or
+        indicator name, which provides rolling statistics.
+        """
+        buffer = self._lookback_names.get(name)
+        if buffer is None:
+            raise ValueError("No lookback for '%s'." % name)
+        return buffer
+
+    def lookback(self, name, n=None):
+        """Returns a read only view of the latest n values for some
+        asset code, fx pair or indicator name.
+        """
+        return self.rolling(name).view(n)
 
     def get_indicator(self, indicator_name):
         return self._indicators.get(indicator_name)
@@ -28,8 +146,17 @@ class Backtest:
     def set_indicator(self, indicator_name, event_value):
         self._indicators[indicator_name] = event_value
 
-    def load_event(self, event):
+    def load_event(self, event) -> bool:
+        """Load an event into the queue. Events at or before the time stamp
+        we are resuming from have already been processed and are skipped.
+        Returns True if the event was loaded.
+        """
+        resume_datetime = self._resume_datetime
+        if resume_datetime is not None:
+            if event.datetime <= resume_datetime:
+                return False
         self._events_queue.put(event)
+        return True
 
     def _peek_next_event_datetime(self):
         queue = self._events_queue
@@ -43,7 +170,16 @@ class Backtest:
         if queue.empty():
             return False
         self._datetime, event = queue.get()
-        event.process()
+        if self._shared_events:
+            event._process_for(self)
+        else:
+            event.process()
+        instrument = event.instrument
+        if instrument is not None:
+            self._changed.add(instrument)
+            buffer = self._lookbacks.get(instrument)
+            if buffer is not None:
+                buffer.append(event.event_value)
         return True
 
     def _process_events_for_current_datetime(self):
@@ -54,61 +190,362 @@ class Backtest:
         while current_datetime == peek_next_event_datetime():
             process_next_event()
 
+    def _get_woken_strategies(self):
+        """ Strategies subscribed to an instrument that has changed. """
+        subscribers = self._subscribers
+        woken = set()
+        for instrument in self._changed:
+            strategies = subscribers.get(instrument)
+            if strategies is not None:
+                woken.update(strategies)
+        return woken
+
     def _run_strategy(self):
-        """The strategy should return either a singular
-        trade or a list of trades to execute.
+        """Run each strategy that has changed inputs and is due.
+        Strategies are given the set of their inputs that changed.
         """
-        strategy = self._strategy
-        if strategy is None:
-            return
+        subscriptions = self._subscriptions
+        changed = self._changed
+        woken = None
+        for strategy in self._strategies:
+            strategy_subscriptions = subscriptions[strategy]
+            if strategy_subscriptions is None:
+                strategy_changed = frozenset(changed)
+            else:
+                if woken is None:
+                    woken = self._get_woken_strategies()
+                if strategy not in woken:
+                    continue
+                strategy_changed = strategy_subscriptions.intersection(
+                    changed
+                )
 
-        strategy_trades = strategy.generate_trades()
+            schedule = strategy.schedule
+            if schedule is not None:
+                if not schedule.is_due(self._datetime, strategy_changed):
+                    continue
+            strategy.changed = strategy_changed
+            self._load_trades(strategy.generate_trades())
+
+    def _load_trades(self, strategy_trades):
+        """The strategy should return either a singular
+        trade, a list of trades or a TradeBatch to execute.
+        """
         if strategy_trades is None:
             return
+        if isinstance(strategy_trades, trade.TradeBatch):
+            self.load_event(
+                events.TradeBatchEvent(
+                    self._datetime, strategy_trades, backtest=self
+                )
+            )
+            return
         if isinstance(strategy_trades, trade.Trade):  # singular
-            trade_event = events.TradeEvent(self._datetime, strategy_trades)
-            self.load_event(trade_event)
+            strategy_trades = [strategy_trades]
+
+        market_trades = list()
+        for strategy_trade in strategy_trades:
+            if isinstance(strategy_trade, trade.Order):
+                # rests in the order book until triggered
+                self._order_book.add(strategy_trade)
+            else:
+                market_trades.append(strategy_trade)
+
+        if self._batch_trades:
+            if len(market_trades) > 0:
+                trade_batch = trade.TradeBatch(market_trades)
+                self.load_event(
+                    events.TradeBatchEvent(
+                        self._datetime, trade_batch, backtest=self
+                    )
+                )
         else:
-            for strategy_trade in strategy_trades:
-                trade_event = events.TradeEvent(self._datetime, strategy_trade)
+            for strategy_trade in market_trades:
+                trade_event = events.TradeEvent(
+                    self._datetime, strategy_trade, backtest=self
+                )
                 self.load_event(trade_event)
 
+    def _check_orders(self):
+        """ Fill resting orders triggered by new asset prices. """
+        order_book = self._order_book
+        for instrument in self._changed:
+            if isinstance(instrument, Asset):
+                filled = order_book.check(instrument)
+                if filled:
+                    self._blotter.record_all(filled, self._datetime)
+
+    def _process_datetime(self):
+        """Process all events with the next time stamp, then run
+        the strategy and record history. Observers are notified
+        once this time stamp is complete.
+        """
+        start_time = perf_counter()
+        self._changed.clear()
+        self._process_next_event()  # primes self._datetime
+        self._process_events_for_current_datetime()
+        self._check_orders()
+        # once all events are processed for the current
+        # time stamp we can run our strategy
+        self._run_strategy()
+        self._process_events_for_current_datetime()
+        self._take_history_snapshot()
+        # late events for this time stamp will not be processed
+        self._resume_datetime = self._datetime
+        self._latency = perf_counter() - start_time
+        self.notify_observers()
+
+    def _run_until(self, watermark=None, *, inclusive=True):
+        """Process time stamps until we reach the watermark.
+        If no watermark is given then continue until the queue is empty.
+        """
+        trusted = self._trusted or settings.trusted_mode
+        with settings.use_trusted_mode(trusted):
+            self._process_until(watermark, inclusive)
+
+    def _process_until(self, watermark, inclusive):
+        peek_next_event_datetime = self._peek_next_event_datetime
+        process_datetime = self._process_datetime
+        while not self._stopped:
+            next_datetime = peek_next_event_datetime()
+            if next_datetime is None:
+                break
+            if watermark is not None:
+                if next_datetime > watermark:
+                    break
+                if next_datetime == watermark and not inclusive:
+                    break
+            process_datetime()
+
+    def add_monitor(self, observer):
+        """Add an observer, such as a RiskTracker, that is kept alive
+        by the backtest. Observers added with add_observer are only
+        weakly referenced.
+        """
+        if not isinstance(observer, Observer):
+            raise TypeError("Expecting Observer instance.")
+        if observer not in self._monitors:
+            self._monitors.append(observer)
+        self.add_observer(observer)
+
+    @property
+    def monitors(self):
+        return list(self._monitors)
+
+    def stop(self):
+        """Stop processing once the current time stamp is complete.
+        Any remaining events are left in the queue, and calling run
+        (or run_live / run_async) again resumes from there.
+        """
+        self._stopped = True
+
+    @property
+    def stopped(self):
+        return self._stopped
+
     def run(self):
         """Process all events in the queue with the same time stamp,
         then run your strategy.
         Continue this process until the queue is empty.
         """
-        queue = self._events_queue
-        process_next_event = self._process_next_event
-        process_events_for_current_datetime = (
-            self._process_events_for_current_datetime
-        )  # noqa: E501
-        take_history_snapshot = self._take_history_snapshot
+        self._stopped = False
+        self._run_until()
+        self._flush_history()
+
+    def _receive(self, item):
+        """Receive an event or TimestampClose marker from a live feed.
+        Events are expected in time order, so the arrival of a later
+        time stamp means all earlier time stamps are complete.
+        """
+        if isinstance(item, TimestampClose):
+            self._run_until(item.datetime)
+            return
+        self._run_until(item.datetime, inclusive=False)
+        self.load_event(item)
+
+    def run_live(self, source):
+        """Consume events from some (blocking) iterator such as a feed.
+        Each time stamp is processed once it is complete, either on
+        receiving a TimestampClose marker or an event with a later
+        time stamp. Any remaining events are processed once the source
+        is exhausted.
+        """
+        self._stopped = False
+        receive = self._receive
+        for item in source:
+            receive(item)
+        self._run_until()
+        self._flush_history()
+
+    async def run_async(self, queue):
+        """As for run_live, but consume events from an asyncio.Queue.
+        Put None on the queue to signal the end of the feed.
+        """
+        self._stopped = False
+        receive = self._receive
         while True:
-            process_next_event()  # primes self._datetime
-            process_events_for_current_datetime()
-            # once all events are processed for the current
-            # time stamp we can run our strategy
-            self._run_strategy()
-            process_events_for_current_datetime()
-            take_history_snapshot()
-            if queue.empty():
+            item = await queue.get()
+            if item is None:
                 break
+            receive(item)
+        self._run_until()
+        self._flush_history()
 
     def _take_history_snapshot(self):
+        if not self._record_history:
+            return
+        date_time = self._datetime
+        next_datetime = self._peek_next_event_datetime()
+        for record in History.instances:
+            record.take_snapshot(date_time, next_datetime, backtest=self)
+
+    def _flush_history(self):
+        """ Record snapshots held back by buffered recording policies. """
         if not self._record_history:
             return
         for record in History.instances:
-            record.take_snapshot(self._datetime)
+            record.flush()
+
+    def snapshot(self):
+        """Capture the loaded state of this backtest, which can then be
+        cloned cheaply for each run of a parameter sweep.
+        """
+        return BacktestSnapshot(self)
 
     @property
     def num_events_loaded(self):
         return len(self._events_queue)
 
+    @property
+    def trusted(self):
+        return self._trusted
+
     @property
     def datetime(self):
         return copy(self._datetime)
 
+    @property
+    def resume_datetime(self):
+        """ Events at or before this time stamp have been processed. """
+        return copy(self._resume_datetime)
+
+    @property
+    def changed(self):
+        """Assets, fx rates and indicator names updated
+        at the current time stamp.
+        """
+        return frozenset(self._changed)
+
+    @property
+    def latency(self):
+        """ Seconds taken to process the last time stamp. """
+        return self._latency
+
+    @property
+    def blotter(self):
+        """ Every trade sent through the trade pipeline. """
+        return self._blotter
+
+    @property
+    def order_book(self):
+        """ Limit and stop orders waiting to be triggered. """
+        return self._order_book
+
     @property
     def indicators(self):
         return copy(self._indicators)
+
+
+class BacktestSnapshot:
+    """The loaded state of some backtest, usually taken before it is run.
+    Each clone shares the loaded events rather than copying them,
+    while prices, fx rates, holdings, indicators and history (including
+    recording policy state) are restored to their values at the time
+    of the snapshot.
+    Shared events are processed for whichever backtest runs them,
+    so the original backtest can still be run after cloning.
+    Assets, fx rates and portfolios are shared by every clone,
+    so clones should be run one after the other. For parallel sweeps,
+    take the snapshot before forking worker processes and events are
+    shared copy-on-write.
+    """
+
+    def __init__(self, backtest):
+        if not isinstance(backtest, Backtest):
+            raise TypeError("Expecting Backtest instance.")
+        if len(backtest.order_book) > 0:
+            raise ValueError("Expecting no open orders.")
+        # a copy of the heap is still a valid heap
+        queued = tuple(backtest._events_queue.queue)
+        for _, event in queued:
+            if isinstance(event, (events.TradeEvent, events.TradeBatchEvent)):
+                raise ValueError("Expecting no pending trades.")
+        self._queued = queued
+        backtest._shared_events = True
+        self._options = dict(
+            record_history=backtest._record_history,
+            trusted=backtest.trusted,
+            batch_trades=backtest._batch_trades,
+        )
+        self._datetime = backtest._datetime
+        self._resume_datetime = backtest._resume_datetime
+        self._indicators = backtest.indicators
+        self._lookbacks = [
+            (instrument, buffer.capacity, buffer.view().copy())
+            for instrument, buffer in backtest._lookbacks.items()
+        ]
+        self._prices = [
+            (asset, asset.price)
+            for asset in Asset.get_instances()
+            if isinstance(asset, VariablePriceAsset)
+        ]
+        self._fx_rates = [
+            (fx_rate, fx_rate.rate) for fx_rate in FxRate.get_instances()
+        ]
+        self._holdings = [
+            (portfolio, portfolio.get_holdings())
+            for portfolio in Portfolio.get_instances()
+        ]
+        self._histories = [
+            (history, history._get_state())
+            for history in History.instances
+            if history._backtest is None or history._backtest is backtest
+        ]
+
+    @property
+    def num_events_loaded(self):
+        return len(self._queued)
+
+    def _restore(self, backtest):
+        # restore holdings first, as these may not have a valid
+        # value at the snapshot prices (e.g. no price yet)
+        for portfolio, holdings in self._holdings:
+            portfolio._restore_holdings(holdings)
+        for fx_rate, rate in self._fx_rates:
+            fx_rate._set_rate(rate)
+        for asset, price in self._prices:
+            asset._set_price(price)
+        for history, state in self._histories:
+            history._restore_state(state)
+
+    def clone(self, strategy) -> Backtest:
+        """Returns a new backtest ready to run, with some strategy or
+        list of strategies. Strategies and their schedules keep state,
+        so each clone needs new instances rather than those of the
+        original backtest.
+        """
+        if strategy is None:
+            raise TypeError("Expecting Strategy or list of strategies.")
+        backtest = Backtest(strategy, **self._options)
+        self._restore(backtest)
+        backtest._shared_events = True
+        backtest._events_queue.queue = list(self._queued)
+        backtest._datetime = self._datetime
+        backtest._resume_datetime = self._resume_datetime
+        backtest._indicators = dict(self._indicators)
+        for instrument, capacity, values in self._lookbacks:
+            buffer = backtest.add_lookback(instrument, capacity)
+            if len(buffer) == 0:
+                for value in values:
+                    buffer.append(value)
+        return backtest
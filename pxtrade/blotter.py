@@ -0,0 +1,117 @@
+"""
+A blotter records every trade sent through the trade pipeline by some
+backtest, including those rejected by compliance, along with how it was
+filled. Values are kept in typed NumPy columns so that turnover and cost
+analysis can be done with vectorised operations.
+Portfolio and asset codes are stored as integer ids into a list of codes.
+"""
+import numpy as np
+import pandas as pd
+from .columns import GrowableColumn
+
+
+COLUMNS = {
+    "datetime": "datetime64[ns]",
+    "portfolio": np.int32,
+    "asset": np.int32,
+    "units": np.int64,
+    "price": np.float64,
+    "consideration": np.float64,
+    "base_consideration": np.float64,
+    "charges": np.float64,
+    "charges_currency": np.int32,
+    "slippage": np.float64,
+    "passed_compliance": np.bool_,
+}
+CODE_COLUMNS = ("portfolio", "asset", "charges_currency")
+
+
+class Blotter:
+    def __init__(self):
+        self._columns = {
+            name: GrowableColumn(dtype) for name, dtype in COLUMNS.items()
+        }
+        self._codes = list()
+        self._code_ids = dict()
+
+    def _get_code_id(self, code):
+        if code is None:
+            return -1
+        code_id = self._code_ids.get(code)
+        if code_id is None:
+            code_id = self._code_ids[code] = len(self._codes)
+            self._codes.append(code)
+        return code_id
+
+    def record(self, trade, date_time):
+        """Record a trade once it has been through the trade pipeline.
+        Slippage is the cost relative to filling at the current asset
+        value, in the asset currency. Base consideration is converted
+        to the portfolio base currency.
+        """
+        fill = trade.fill
+        price = consideration = base_consideration = np.nan
+        charges = slippage = np.nan
+        charges_currency_code = None
+        if trade.passed_compliance and fill is not None:
+            if fill.consideration is not None:
+                consideration = fill.consideration
+                price = fill.price
+                market_consideration = trade.asset.local_value * -trade.units
+                slippage = market_consideration - consideration
+                fx_rate = trade.portfolio._get_fx_rate(trade.asset)
+                base_consideration = consideration / fx_rate
+            if fill.charges is not None:
+                charges = fill.charges
+            charges_currency_code = fill.charges_currency_code
+
+        columns = self._columns
+        columns["datetime"].append(date_time)
+        columns["portfolio"].append(self._get_code_id(trade.portfolio.code))
+        columns["asset"].append(self._get_code_id(trade.asset_code))
+        columns["units"].append(trade.units)
+        columns["price"].append(price)
+        columns["consideration"].append(consideration)
+        columns["base_consideration"].append(base_consideration)
+        columns["charges"].append(charges)
+        columns["charges_currency"].append(
+            self._get_code_id(charges_currency_code)
+        )
+        columns["slippage"].append(slippage)
+        columns["passed_compliance"].append(trade.passed_compliance)
+
+    def record_all(self, trades, date_time):
+        for trade in trades:
+            self.record(trade, date_time)
+
+    def __len__(self):
+        return len(self._columns["datetime"])
+
+    @property
+    def codes(self):
+        """ Portfolio and asset codes indexed by their integer id. """
+        return list(self._codes)
+
+    def get_column(self, name):
+        """ Returns a read only array of values for some column. """
+        column = self._columns.get(name)
+        if column is None:
+            raise ValueError("Unknown column '%s'." % name)
+        return column.values
+
+    def to_frame(self) -> pd.DataFrame:
+        data = dict()
+        for name, column in self._columns.items():
+            values = column.values
+            if name in CODE_COLUMNS:
+                values = pd.Categorical.from_codes(
+                    values, categories=self._codes
+                )
+            else:
+                values = values.copy()
+            data[name] = values
+        return pd.DataFrame(data, columns=list(COLUMNS))
+
+    def to_parquet(self, path, **kwargs):
+        """ Requires one of the pandas parquet engines to be installed. """
+        self.to_frame().to_parquet(path, **kwargs)
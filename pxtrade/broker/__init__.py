@@ -1,4 +1,5 @@
 from .broker import Broker  # noqa: F401
+from .fill import Fill  # noqa: F401
 
 from .execution import (  # noqa: F401
     AbstractExecution,
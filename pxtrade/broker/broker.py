@@ -1,10 +1,31 @@
 """
 A broker will execute some trade for a fee.
 Charges and execution are organised as strategy patterns.
+Where both strategies can calculate their amounts up front, charges and
+the trade are posted to the portfolio together with one revaluation.
 """
+from functools import lru_cache
+from numbers import Real
 import pxtrade
+from .. import settings
 from .charges import NoCharges
 from .execution import FillAtLast
+from .fill import Fill
+
+
+@lru_cache(maxsize=None)
+def _is_overridden(strategy_class, method, calculation):
+    """True if method has been overridden in a subclass of the class
+    defining calculation, in which case calculation doesn't describe
+    what method does and the broker needs to call method itself.
+    """
+    for cls in strategy_class.__mro__:
+        namespace = vars(cls)
+        if calculation in namespace:
+            return False
+        if method in namespace:
+            return True
+    return False
 
 
 class Broker:
@@ -21,5 +42,44 @@ class Broker:
         """ Apply some charge and execution strategy to the trade. """
         if not isinstance(trade, pxtrade.Trade):
             raise TypeError("Expecting Trade instance.")
-        self._charges_strategy.charge(trade)
-        self._execution_strategy.execute(trade)
+        self._execute(trade)
+
+    def _execute(self, trade):
+        charges_strategy = self._charges_strategy
+        execution_strategy = self._execution_strategy
+        charges = consideration = None
+        if not _is_overridden(type(charges_strategy), "charge", "calculate"):
+            charges = charges_strategy.calculate(trade)
+        if not _is_overridden(
+            type(execution_strategy), "execute", "get_consideration"
+        ):
+            consideration = execution_strategy.get_consideration(trade)
+        if charges is None or consideration is None:
+            # custom strategies that apply to the portfolio directly
+            charges_strategy.charge(trade)
+            execution_strategy.execute(trade)
+            trade._fill = Fill(trade.units, None, charges=None)
+            return
+
+        charge_cash, charge_amount = charges
+        if not settings.trusted_mode:
+            if not isinstance(charge_amount, Real):
+                raise TypeError("Expecting numeric charges.")
+            if not isinstance(consideration, Real):
+                raise TypeError("Expecting numeric consideration.")
+
+        portfolio = trade.portfolio
+        with portfolio.batch():
+            if charge_amount != 0:
+                portfolio._trade(charge_cash, -charge_amount, 0)
+            portfolio._trade(trade.asset, trade.units, consideration)
+
+        charges_currency_code = None
+        if charge_cash is not None:
+            charges_currency_code = charge_cash.code
+        trade._fill = Fill(
+            trade.units,
+            consideration,
+            charges=charge_amount,
+            charges_currency_code=charges_currency_code,
+        )
@@ -2,7 +2,7 @@
 from abc import ABC, abstractmethod
 from numbers import Real
 from ..settings import get_default_currency_code
-from .. import assets
+from .. import assets, settings
 
 
 class AbstractCharges(ABC):
@@ -10,12 +10,22 @@ class AbstractCharges(ABC):
     def charge(self, trade):
         raise NotImplementedError()  # pragma: no cover
 
+    def calculate(self, trade):
+        """Returns the (cash, amount) charged for some trade, so that the
+        broker can post charges and execution together.
+        Return None if charges can only be applied through charge().
+        """
+        return None
+
 
 class NoCharges(AbstractCharges):
     def charge(self, trade):
         """ No charges will be applied for the trade. """
         pass
 
+    def calculate(self, trade):
+        return None, 0.0
+
 
 class FixedRatePlusPercentage(AbstractCharges):
     def __init__(self, fixed_amount, percentage, *, currency_code=None):
@@ -34,20 +44,21 @@ class FixedRatePlusPercentage(AbstractCharges):
             currency_code = get_default_currency_code()
         self._currency_code = assets.check_currency_code(currency_code)
 
-    def charge(self, trade):
+    def calculate(self, trade):
         asset = trade.asset
-        units = trade.units
         charge_currency_code = self._currency_code
-        asset_currency_code = asset.currency_code
-        portfolio = trade.portfolio
-
-        # calculate total charges
         charge_cash = assets.get_cash(charge_currency_code)
-        local_value_traded = abs(asset.local_value * units)
+        local_value_traded = abs(asset.local_value * trade.units)
         percentage_charge_local = abs(self._percentage * local_value_traded)
-        fx_rate = assets.FxRate.get(asset_currency_code + charge_currency_code)
+        fx_rate = assets.FxRate.get(asset.currency_code + charge_currency_code)
         percentage_charge = percentage_charge_local * fx_rate
+        return charge_cash, self._fixed_amount + percentage_charge
 
-        total_charge = self._fixed_amount + percentage_charge
-        portfolio.transfer(charge_cash, -total_charge)
+    def charge(self, trade):
+        portfolio = trade.portfolio
+        charge_cash, total_charge = self.calculate(trade)
+        if settings.trusted_mode:
+            portfolio._trade(charge_cash, -total_charge, 0)
+        else:
+            portfolio.transfer(charge_cash, -total_charge)
         return charge_cash, -total_charge
@@ -1,6 +1,7 @@
 """ A strategy pattern for trade execution. """
 from abc import ABC, abstractmethod
 from numbers import Real
+from .. import settings
 
 
 class AbstractExecution(ABC):
@@ -8,15 +9,31 @@ class AbstractExecution(ABC):
     def execute(self, trade):
         raise NotImplementedError()  # pragma: no cover
 
+    def get_consideration(self, trade):
+        """Returns the cash received in the asset currency for some trade,
+        so that the broker can post charges and execution together.
+        Return None if the trade can only be filled through execute().
+        """
+        return None
+
 
 class FillAtLast(AbstractExecution):
+    def get_consideration(self, trade):
+        local_value = trade.asset.local_value
+        if local_value is None:
+            raise ValueError("Asset local value is None.")
+        return local_value * -trade.units
+
     def execute(self, trade):
         asset = trade.asset
         portfolio = trade.portfolio
         units = trade.units
         # if not trade.is_mock_trade:
         #     print("Executing: ", trade)
-        portfolio.trade(asset, units)
+        if settings.trusted_mode:
+            portfolio._trade(asset, units)
+        else:
+            portfolio.trade(asset, units)
 
 
 class FillAtLastWithSlippage(AbstractExecution):
@@ -28,15 +45,22 @@ class FillAtLastWithSlippage(AbstractExecution):
             raise ValueError("Expecting slippage between 0 and 1.")
         self._slippage = slippage
 
-    def execute(self, trade):
-        asset = trade.asset
-        portfolio = trade.portfolio
-        units = trade.units
-        consideration = asset.local_value * -units
+    def get_consideration(self, trade):
+        consideration = trade.asset.local_value * -trade.units
         if consideration > 0:
             # receive less cash when selling
             consideration *= 1 - self._slippage
         if consideration < 0:
             # pay more cash when buying
             consideration *= 1 + self._slippage
-        portfolio.trade(asset, units, consideration=consideration)
+        return consideration
+
+    def execute(self, trade):
+        asset = trade.asset
+        portfolio = trade.portfolio
+        units = trade.units
+        consideration = self.get_consideration(trade)
+        if settings.trusted_mode:
+            portfolio._trade(asset, units, consideration)
+        else:
+            portfolio.trade(asset, units, consideration=consideration)
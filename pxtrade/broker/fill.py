@@ -0,0 +1,52 @@
+""" A record of how some trade was executed. """
+
+
+class Fill:
+    """The units and consideration for a trade, in the asset currency,
+    along with any charges paid in the charges currency.
+    """
+
+    def __init__(
+        self,
+        units,
+        consideration,
+        *,
+        charges=0.0,
+        charges_currency_code=None,
+    ):
+        self._units = units
+        self._consideration = consideration
+        self._charges = charges
+        self._charges_currency_code = charges_currency_code
+
+    @property
+    def units(self):
+        return self._units
+
+    @property
+    def consideration(self):
+        """ Cash received, so this is negative when buying. """
+        return self._consideration
+
+    @property
+    def price(self):
+        """ Average local value per unit before charges. """
+        if self._units == 0 or self._consideration is None:
+            return None
+        return -self._consideration / self._units
+
+    @property
+    def charges(self):
+        return self._charges
+
+    @property
+    def charges_currency_code(self):
+        return self._charges_currency_code
+
+    def __str__(self):
+        return self.__class__.__name__ + "(%s, %s, charges=%s %s)" % (
+            self._units,
+            self._consideration,
+            self._charges,
+            self._charges_currency_code,
+        )
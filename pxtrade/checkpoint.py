@@ -0,0 +1,158 @@
+"""
+Long backtests are expensive to repeat in full each time new market data
+is appended. A checkpoint stores the end of run state (prices, fx rates,
+portfolio holdings, indicators and history) so that a later run can resume
+from the last processed time stamp and only process newer events.
+
+Assets, fx rates and portfolios are matched on their codes, so these
+need to be created as usual before a checkpoint is loaded.
+Histories are matched on their name if given, or otherwise on the
+portfolios, groups and holdings format they record.
+"""
+import pickle
+from .assets import Asset, VariablePriceAsset, FxRate, Portfolio
+from .backtest import Backtest
+from .history import History
+
+
+def _get_history_key(history):
+    """Histories are matched on their name, or otherwise on the
+    portfolios, groups and holdings format recorded.
+    """
+    if history.name is not None:
+        return history.name
+    return (
+        tuple(portfolio.code for portfolio in history.portfolios),
+        tuple(sorted(history._groups)),
+        history._sparse_holdings is not None,
+    )
+
+
+def _get_histories(backtest, histories):
+    """Histories recorded by this backtest, or those given,
+    by their checkpoint keys.
+    """
+    if histories is None:
+        histories = [
+            history
+            for history in History.instances
+            if history._backtest is None or history._backtest is backtest
+        ]
+    elif isinstance(histories, History):
+        histories = [histories]
+    histories_by_key = dict()
+    for history in histories:
+        if not isinstance(history, History):
+            raise TypeError("Expecting History instance.")
+        key = _get_history_key(history)
+        if key in histories_by_key:
+            raise ValueError(
+                "Histories recording the same portfolios and groups "
+                "need a unique name."
+            )
+        histories_by_key[key] = history
+    return histories_by_key
+
+
+def get_checkpoint(backtest, *, histories=None) -> dict:
+    """Return the current state of a backtest and the objects it uses.
+    By default every history recorded by the backtest is included.
+    Open orders in the order book are not saved, so cancel or fill
+    these before taking a checkpoint.
+    """
+    if not isinstance(backtest, Backtest):
+        raise TypeError("Expecting Backtest instance.")
+    if len(backtest.order_book) > 0:
+        # resting orders refer to live objects and are not saved
+        raise ValueError("Expecting no open orders.")
+    histories = _get_histories(backtest, histories)
+
+    return {
+        "datetime": backtest.resume_datetime,
+        "indicators": backtest.indicators,
+        "prices": {
+            asset.code: asset.price
+            for asset in Asset.get_instances()
+            if isinstance(asset, VariablePriceAsset)
+        },
+        "fx_rates": {
+            fx_rate.pair: fx_rate.rate for fx_rate in FxRate.get_instances()
+        },
+        "holdings": {
+            portfolio.code: portfolio.get_holdings()
+            for portfolio in Portfolio.get_instances()
+        },
+        "history": {
+            key: (history.get(), _get_sparse_holdings(history))
+            for key, history in histories.items()
+        },
+    }
+
+
+def _get_sparse_holdings(history):
+    if history._sparse_holdings is None:
+        return None
+    return history.get_holdings()
+
+
+def restore_checkpoint(
+    backtest, checkpoint: dict, *, histories=None
+) -> None:
+    """Restore the state returned from get_checkpoint.
+    Any events subsequently loaded at or before the checkpoint
+    time stamp will be skipped.
+    """
+    if not isinstance(backtest, Backtest):
+        raise TypeError("Expecting Backtest instance.")
+    if not isinstance(checkpoint, dict):
+        raise TypeError("Expecting dict.")
+    if backtest.num_events_loaded > 0:
+        raise ValueError("Restore a checkpoint before loading events.")
+    histories = _get_histories(backtest, histories)
+
+    for pair, rate in checkpoint["fx_rates"].items():
+        FxRate.get_instance(pair).rate = rate
+
+    for asset_code, price in checkpoint["prices"].items():
+        asset = Asset.get_asset_for_code(asset_code)
+        if asset is None:
+            raise ValueError("Asset code '%s' doesn't exist." % asset_code)
+        asset.price = price
+
+    portfolios = {
+        portfolio.code: portfolio for portfolio in Portfolio.get_instances()
+    }
+    for portfolio_code, holdings in checkpoint["holdings"].items():
+        portfolio = portfolios.get(portfolio_code)
+        if portfolio is None:
+            raise ValueError("Portfolio '%s' doesn't exist." % portfolio_code)
+        portfolio._restore_holdings(holdings)
+
+    stored_history = checkpoint["history"]
+    for key, history in histories.items():
+        stored = stored_history.get(key)
+        if stored is None:
+            continue
+        df, holdings = stored
+        history._restore(df)
+        if holdings is not None and history._sparse_holdings is not None:
+            history._sparse_holdings.restore(holdings)
+
+    for indicator_name, value in checkpoint["indicators"].items():
+        backtest.set_indicator(indicator_name, value)
+    backtest._datetime = checkpoint["datetime"]
+    backtest._resume_datetime = checkpoint["datetime"]
+
+
+def save_checkpoint(backtest, path, *, histories=None) -> None:
+    """ Save the backtest state to file once a run is complete. """
+    checkpoint = get_checkpoint(backtest, histories=histories)
+    with open(path, "wb") as checkpoint_file:
+        pickle.dump(checkpoint, checkpoint_file)
+
+
+def load_checkpoint(backtest, path, *, histories=None) -> None:
+    """ Load the backtest state from file before loading new events. """
+    with open(path, "rb") as checkpoint_file:
+        checkpoint = pickle.load(checkpoint_file)
+    restore_checkpoint(backtest, checkpoint, histories=histories)
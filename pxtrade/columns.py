@@ -0,0 +1,58 @@
+"""
+Typed NumPy columns that can be appended to one value at a time.
+Capacity doubles as the column fills, so appends are amortised O(1)
+and the filled values are always available as a contiguous view.
+"""
+import numpy as np
+
+
+class GrowableColumn:
+    def __init__(self, dtype, capacity=64):
+        if capacity < 1:
+            raise ValueError("Capacity must be >= 1.")
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, size):
+        capacity = len(self._data)
+        while capacity < size:
+            capacity *= 2
+        data = np.empty(capacity, dtype=self._data.dtype)
+        data[: self._size] = self._data[: self._size]
+        self._data = data
+
+    def append(self, value):
+        size = self._size
+        if size == len(self._data):
+            self._grow(size + 1)
+        self._data[size] = value
+        self._size = size + 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        start = self._size
+        end = start + len(values)
+        if end > len(self._data):
+            self._grow(end)
+        self._data[start:end] = values
+        self._size = end
+
+    def truncate(self, size):
+        """ Keep only the first size values. """
+        if size < 0 or size > self._size:
+            raise ValueError("Expecting 0 <= size <= %d." % self._size)
+        self._size = size
+
+    @property
+    def values(self):
+        """ Read only view of the values appended so far. """
+        values = self._data[: self._size]
+        values.flags.writeable = False
+        return values
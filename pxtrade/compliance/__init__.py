@@ -1,2 +1,6 @@
 from .base import Compliance, ComplianceRule  # noqa: F401
-from .position_limits import UnitLimit, WeightLimit  # noqa: F401
+from .position_limits import (  # noqa: F401
+    UnitLimit,
+    WeightLimit,
+    VectorLimits,
+)
@@ -4,12 +4,22 @@ any defined compliance rules. These rules may include position
 limits, restricted securities, ...
 Here compliance rules have been arranged using a composite pattern
 to check portfolio positions should the trade be fully executed.
+Rules can declare the assets they depend on, so that only rules
+affected by a trade need to be checked.
 """
 from abc import ABC, abstractmethod
+from collections import defaultdict
 from .. import assets
 
 
 class ComplianceRule(ABC):
+    @property
+    def assets(self):
+        """Returns the assets this rule depends on,
+        or None if the rule depends on the whole portfolio.
+        """
+        return None
+
     @abstractmethod
     def passes(self, portfolio) -> bool:
         raise NotImplementedError  # pragma: no cover
@@ -22,22 +32,60 @@ class Compliance(ComplianceRule):
 
     def __init__(self):
         self._rules = set()
+        self._global_rules = set()  # rules on the whole portfolio
+        self._rules_by_code = defaultdict(set)  # asset code -> rules
 
     def add_rule(self, rule):
         if not isinstance(rule, ComplianceRule):
             raise TypeError("Expecting Compliance Rule instance.")
+        if rule in self._rules:
+            return self
         self._rules.add(rule)
+        rule_assets = rule.assets
+        if rule_assets is None:
+            self._global_rules.add(rule)
+        else:
+            for asset in rule_assets:
+                self._rules_by_code[asset.code].add(rule)
         return self
 
     def remove_rule(self, rule):
+        if rule not in self._rules:
+            return self
         self._rules.discard(rule)
+        self._global_rules.discard(rule)
+        for code in list(self._rules_by_code):
+            rules = self._rules_by_code[code]
+            rules.discard(rule)
+            if not rules:
+                del self._rules_by_code[code]
         return self
 
-    def passes(self, portfolio):
+    def passes(self, portfolio, codes=None):
+        """Returns True if all rules pass.
+        If the asset codes affected by some trade are given then only
+        rules depending on those assets, along with any portfolio wide
+        rules, are checked.
+        """
         if not isinstance(portfolio, assets.Portfolio):
             raise TypeError("Expecting Portfolio instance.")
+        if codes is not None:
+            codes = set(codes)
+            for code in codes:
+                if not isinstance(code, str):
+                    raise TypeError("Expecting asset codes.")
+        return self._passes(portfolio, codes)
+
+    def _passes(self, portfolio, codes=None):
+        if codes is None:
+            rules = self._rules
+        else:
+            rules_by_code = self._rules_by_code
+            rules = set(self._global_rules)
+            for code in codes:
+                rules.update(rules_by_code.get(code, ()))
 
-        for rule in self._rules:
+        for rule in rules:
             if not rule.passes(portfolio):
                 return False
         return True
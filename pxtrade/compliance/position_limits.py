@@ -1,4 +1,6 @@
 from numbers import Real
+import numpy as np
+import pandas as pd
 from .base import ComplianceRule
 from ..assets import Asset
 
@@ -13,6 +15,10 @@ class UnitLimit(ComplianceRule):
         self._asset = asset
         self._unit_limit = abs(unit_limit)
 
+    @property
+    def assets(self):
+        return (self._asset,)
+
     def passes(self, portfolio) -> bool:
         position = portfolio.get_holding_units(self._asset.code)
         if abs(position) > self._unit_limit:
@@ -27,6 +33,11 @@ class UnitLimit(ComplianceRule):
 
 
 class WeightLimit(ComplianceRule):
+    """A weight depends on the value of the whole portfolio,
+    which any trade can change through charges or slippage,
+    so weight limits are checked on every trade.
+    """
+
     def __init__(self, asset, weight_limit):
         super().__init__()
         if not isinstance(asset, Asset):
@@ -47,3 +58,95 @@ class WeightLimit(ComplianceRule):
             self._asset.code,
             self._weight_limit,
         )
+
+
+class VectorLimits(ComplianceRule):
+    """Unit and weight limits for many assets checked together.
+    Limits are held as arrays aligned to asset slots, so the whole
+    portfolio is checked in one comparison. A limit of NaN means
+    there is no limit for that asset.
+    """
+
+    def __init__(self, assets, *, unit_limits=None, weight_limits=None):
+        super().__init__()
+        assets = tuple(assets)
+        for asset in assets:
+            if not isinstance(asset, Asset):
+                raise TypeError("Expecting Asset instances.")
+        self._assets = assets
+        self._codes = [asset.code for asset in assets]
+        self._slots = np.array([asset.slot for asset in assets], dtype=int)
+        self._max_slot = self._slots.max() if assets else -1
+        self._unit_limits = self._check_limits(unit_limits)
+        self._weight_limits = self._check_limits(weight_limits)
+
+    def _check_limits(self, limits):
+        if limits is None:
+            return None
+        try:
+            limits = np.abs(np.asarray(limits, dtype=float))
+        except (TypeError, ValueError):
+            raise TypeError("Expecting numeric limits.")
+        if limits.shape != (len(self._assets),):
+            raise ValueError("Expecting one limit per asset.")
+        return limits
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Create limits from a frame indexed by asset code
+        with 'unit_limit' and / or 'weight_limit' columns.
+        """
+        if not isinstance(frame, pd.DataFrame):
+            raise TypeError("Expecting pd.DataFrame instance.")
+        assets = list()
+        for code in frame.index:
+            asset = Asset.get_asset_for_code(code)
+            if asset is None:
+                raise ValueError("Asset code '%s' doesn't exist." % code)
+            assets.append(asset)
+        limits = dict()
+        for column in ("unit_limit", "weight_limit"):
+            if column in frame.columns:
+                limits[column + "s"] = frame[column].values
+        return cls(assets, **limits)
+
+    @property
+    def assets(self):
+        if self._weight_limits is not None:
+            return None  # weights depend on the whole portfolio
+        return self._assets
+
+    def _take(self, array):
+        """ Returns array values for our assets, with 0 if not held. """
+        slots = self._slots
+        if self._max_slot < len(array):
+            return array[slots]
+        result = np.zeros(len(slots))
+        held = slots < len(array)
+        result[held] = array[slots[held]]
+        return result
+
+    def breaches(self, portfolio) -> list:
+        """ Returns the codes for all assets breaching some limit. """
+        breached = np.zeros(len(self._assets), dtype=bool)
+        if self._unit_limits is not None:
+            units = self._take(portfolio.units_by_slot)
+            breached |= np.abs(units) > self._unit_limits
+        if self._weight_limits is not None:
+            values = self._take(portfolio.values_by_slot)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                weights = np.abs(values / portfolio.value)
+            breached |= weights > self._weight_limits
+        codes = self._codes
+        return [codes[i] for i in np.flatnonzero(breached)]
+
+    def passes(self, portfolio) -> bool:
+        return len(self.breaches(portfolio)) == 0
+
+    def __len__(self):
+        return len(self._assets)
+
+    def __str__(self):
+        return self.__class__.__name__ + "(%s assets)" % "{:,}".format(
+            len(self._assets)
+        )
@@ -2,5 +2,6 @@ from .base import AbstractEvent  # noqa: F401
 from .asset_price_event import AssetPriceEvent  # noqa: F401
 from .fx_rate_event import FxRateEvent  # noqa: F401
 from .trade_event import TradeEvent  # noqa: F401
+from .trade_batch_event import TradeBatchEvent  # noqa: F401
 from .indicator_event import IndicatorEvent  # noqa: F401
 from .load_frame_events import load_frame_events  # noqa: F401
@@ -1,9 +1,13 @@
 from .base import AbstractEvent
+from ..assets import VariablePriceAsset
+from .. import settings
 from ..util import check_positive_numeric
 
 
 class AssetPriceEvent(AbstractEvent):
     def __init__(self, asset, datetime, event_value, **kwargs):
+        if not isinstance(asset, VariablePriceAsset):
+            raise TypeError("Expecting VariablePriceAsset instance.")
         super().__init__(datetime, event_value)
         self._asset = asset
 
@@ -11,11 +15,18 @@ class AssetPriceEvent(AbstractEvent):
     def asset(self):
         return self._asset
 
+    @property
+    def instrument(self):
+        return self._asset
+
     def _validate(self, event_value):
         check_positive_numeric(event_value)
 
     def _process(self):
-        self._asset.price = self._event_value
+        if settings.trusted_mode:
+            self._asset._set_price(self._event_value)
+        else:
+            self._asset.price = self._event_value
 
     def __str__(self):
         return (
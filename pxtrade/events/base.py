@@ -20,6 +20,13 @@ class AbstractEvent(ABC):
         self._process()
         self._processed = True
 
+    def _process_for(self, backtest):
+        """Process as part of some backtest without marking the event
+        as processed, as events in a snapshot are shared between
+        the original backtest and its clones.
+        """
+        self._process()
+
     @property
     def datetime(self):
         return self._datetime
@@ -32,6 +39,11 @@ class AbstractEvent(ABC):
     def processed(self):
         return self._processed
 
+    @property
+    def instrument(self):
+        """ The asset, fx rate or indicator name updated by this event. """
+        return None
+
     @abstractmethod
     def _validate(self, event_value):
         raise NotImplementedError()  # pragma: no cover
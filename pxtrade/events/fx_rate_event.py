@@ -1,5 +1,6 @@
 from .base import AbstractEvent
 from ..assets.fx_rates import FxRate
+from .. import settings
 from ..util import check_positive_numeric
 
 
@@ -14,11 +15,20 @@ class FxRateEvent(AbstractEvent):
     def fx_rate(self):
         return self._fx_rate
 
+    @property
+    def instrument(self):
+        return self._fx_rate
+
     def _validate(self, event_value):
         check_positive_numeric(event_value)
+        if event_value == 0:
+            raise ValueError("FX rate must be > 0.")
 
     def _process(self):
-        self._fx_rate.rate = self._event_value
+        if settings.trusted_mode:
+            self._fx_rate._set_rate(self._event_value)
+        else:
+            self._fx_rate.rate = self._event_value
 
     def __str__(self):
         return (
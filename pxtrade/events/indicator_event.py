@@ -27,10 +27,19 @@ class IndicatorEvent(AbstractEvent):
     def indicator_name(self):
         return self._indicator_name
 
+    @property
+    def instrument(self):
+        return self._indicator_name
+
     def _validate(self, event_value):
         if self._validation_func is not None:
             self._validation_func(event_value)
 
+    def _process_for(self, backtest):
+        if self._backtest is None:
+            return
+        backtest.set_indicator(self._indicator_name, self.event_value)
+
     def _process(self):
         if self._backtest is None:
             return
@@ -14,6 +14,7 @@ def load_frame_events(
     event_class,
 ) -> int:
     """Loads backtest events from a data frame.
+    Rows at or before the backtest resume time stamp are skipped.
     Returns the number of events loaded.
     """
     if not isinstance(df, pd.DataFrame):
@@ -34,6 +35,11 @@ def load_frame_events(
         raise TypeError("Expecting a datetime index.")
 
     series = df[column]
+    resume_datetime = backtest.resume_datetime
+    if resume_datetime is not None:
+        # don't create events that have already been processed
+        series = series[series.index > resume_datetime]
+
     event_count = 0
     for event_datetime, event_value in series.items():
         event_datetime = to_datetime(event_datetime)
@@ -0,0 +1,31 @@
+from .base import AbstractEvent
+from pxtrade.trade import TradeBatch
+
+
+class TradeBatchEvent(AbstractEvent):
+    """Netted trades are recorded in the backtest blotter
+    once processed.
+    """
+
+    def __init__(self, datetime, event_value, *, backtest=None, **kwargs):
+        self._backtest = backtest
+        super().__init__(datetime, event_value)
+
+    def _validate(self, event_value):
+        if not isinstance(event_value, TradeBatch):
+            raise TypeError("Expecting TradeBatch instance.")
+
+    def _process(self):
+        netted_trades = self._event_value.run()
+        if self._backtest is not None:
+            self._backtest.blotter.record_all(netted_trades, self._datetime)
+
+    def __str__(self):
+        return (
+            self.__class__.__name__
+            + "("
+            + str(self._datetime)
+            + ", "
+            + str(self._event_value)
+            + ")"
+        )
@@ -1,15 +1,27 @@
 from .base import AbstractEvent
+from pxtrade import settings
 from pxtrade.trade import Trade, trade_pipeline
 
 
 class TradeEvent(AbstractEvent):
+    """ The trade is recorded in the backtest blotter once processed. """
+
+    def __init__(self, datetime, event_value, *, backtest=None, **kwargs):
+        self._backtest = backtest
+        super().__init__(datetime, event_value)
+
     def _validate(self, event_value):
         if not isinstance(event_value, Trade):
             raise TypeError("Expecting Trade instance.")
 
     def _process(self):
         trade = self._event_value
-        trade_pipeline.run(trade)
+        if settings.trusted_mode:
+            trade_pipeline._run(trade)
+        else:
+            trade_pipeline.run(trade)
+        if self._backtest is not None:
+            self._backtest.blotter.record(trade, self._datetime)
 
     def __str__(self):
         return (
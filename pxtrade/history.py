@@ -3,13 +3,43 @@ We'll want to keep a history of all assets,
 prices and portfolio positions for backtesting.
 Here we keep this history in a data frame and visit
 different objects to record their status.
+A recording policy decides which time stamps are recorded, so that
+tick data can be kept at some coarser resolution.
+Groups of columns can be included or excluded, and holdings can be
+recorded sparsely as long format rows for non-zero positions only.
+Snapshots are kept by a store, which builds the data frame on request.
+See pxtrade.spill for a store that writes long runs to disk.
 """
 from abc import ABC, abstractmethod
+from copy import deepcopy
 from datetime import datetime
+from numbers import Integral, Real
 from weakref import WeakSet
+import numpy as np
 import pandas as pd
 import pxtrade
 from pxtrade.assets import Asset, FxRate, Portfolio
+from pxtrade.columns import GrowableColumn
+
+
+GROUPS = ("assets", "fx_rates", "portfolios", "holdings", "indicators")
+
+
+def is_numeric_column(values) -> bool:
+    """True if every recorded value is a real number or missing.
+    Booleans and strings such as '1' are not treated as numbers.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf":
+        return True
+    if values.dtype != object:
+        return False
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, Real):
+            return False
+    return True
 
 
 class Visitor(ABC):
@@ -33,12 +63,21 @@ class FxRateVisitor(Visitor):
 
 
 class PortfolioVisitor(Visitor):
+    """ Records the portfolio value and / or holdings in every asset. """
+
+    def __init__(self, *, values=True, holdings=True):
+        self._values = values
+        self._holdings = holdings
+
     def visit(self, instance):
         portfolio = instance
         portfolio_code = portfolio.code
 
         rows = []
-        rows.append((portfolio_code, portfolio.value))
+        if self._values:
+            rows.append((portfolio_code, portfolio.value))
+        if not self._holdings:
+            return rows
         for asset in Asset.get_instances():
             asset_code = asset.code
             rows.append(
@@ -50,15 +89,413 @@ class PortfolioVisitor(Visitor):
         return rows
 
 
+class RecordingPolicy(ABC):
+    """With buffered policies, a snapshot that isn't recorded straight
+    away is kept by the history until the policy says its period has
+    closed, or the history is flushed at the end of a run.
+    """
+
+    buffered = False
+
+    def closes_period(self, date_time, later_datetime) -> bool:
+        """ True if a buffered snapshot at date_time is now final. """
+        return False
+
+    @abstractmethod
+    def should_record(self, history, date_time, next_datetime) -> bool:
+        """Return True if history should be recorded at this time stamp.
+        next_datetime is the time stamp of the next event to process,
+        or None if this isn't known.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+
+class RecordEveryN(RecordingPolicy):
+    """ Record the first and then every nth time stamp. """
+
+    def __init__(self, n):
+        if not isinstance(n, Integral):
+            raise TypeError("Expecting integer.")
+        if n < 1:
+            raise ValueError("Expecting n >= 1.")
+        self._n = n
+        self._count = 0
+
+    def should_record(self, history, date_time, next_datetime) -> bool:
+        count = self._count
+        self._count += 1
+        return count % self._n == 0
+
+
+class RecordOnFrequency(RecordingPolicy):
+    """Record the last time stamp in each period of some pandas
+    frequency, such as 'D' for end of day or 'H' for end of hour.
+    A time stamp is recorded straight away if the next event is known
+    to fall in a later period. Otherwise (e.g. in a live run, where the
+    next event hasn't arrived) the snapshot is buffered until a later
+    period starts or the run ends.
+    """
+
+    buffered = True
+
+    def __init__(self, freq):
+        pd.Timestamp(0).to_period(freq)  # raises if freq is invalid
+        self._freq = freq
+        self._period_start = None
+        self._period_end = None
+
+    def _get_period_end(self, date_time):
+        period_end = self._period_end
+        if (
+            period_end is None
+            or date_time > period_end
+            or date_time < self._period_start
+        ):
+            period = pd.Timestamp(date_time).to_period(self._freq)
+            self._period_start = period.start_time
+            self._period_end = period_end = period.end_time
+        return period_end
+
+    def closes_period(self, date_time, later_datetime) -> bool:
+        return later_datetime > self._get_period_end(date_time)
+
+    def should_record(self, history, date_time, next_datetime) -> bool:
+        if next_datetime is None:
+            return False  # not known yet, so buffer
+        return self.closes_period(date_time, next_datetime)
+
+
+class RecordOnChange(RecordingPolicy):
+    """Record when the value of some portfolio has changed by more
+    than a threshold, as a fraction of its last recorded value.
+    """
+
+    def __init__(self, threshold):
+        if not isinstance(threshold, Real):
+            raise TypeError("Expecting numeric threshold.")
+        if threshold < 0:
+            raise ValueError("Expecting threshold >= 0.")
+        self._threshold = threshold
+        self._recorded_values = None
+
+    def should_record(self, history, date_time, next_datetime) -> bool:
+        values = [portfolio.value for portfolio in history.portfolios]
+        recorded_values = self._recorded_values
+        if recorded_values is not None:
+            threshold = self._threshold
+            for value, recorded in zip(values, recorded_values):
+                if recorded == 0:
+                    if value != 0:
+                        break
+                elif abs(value / recorded - 1) > threshold:
+                    break
+            else:
+                return False
+        self._recorded_values = values
+        return True
+
+
+class HistoryStore(ABC):
+    """ Keeps snapshots and builds a dense data frame from them. """
+
+    @abstractmethod
+    def append(self, date_time, snapshot):
+        """ snapshot is a dict of column name to value. """
+        raise NotImplementedError()  # pragma: no cover
+
+    @abstractmethod
+    def get(self) -> pd.DataFrame:
+        raise NotImplementedError()  # pragma: no cover
+
+    @abstractmethod
+    def get_values(self, column) -> np.ndarray:
+        raise NotImplementedError()  # pragma: no cover
+
+    @abstractmethod
+    def get_datetimes(self) -> np.ndarray:
+        raise NotImplementedError()  # pragma: no cover
+
+    def flush(self):
+        """ Called once a run is complete. Nothing to do by default. """
+
+    def restore(self, frame):
+        """ Replace all snapshots with those in some data frame. """
+        self.clear()
+        for date_time, row in zip(frame.index, frame.to_dict("records")):
+            self.append(date_time, row)
+
+    @abstractmethod
+    def clear(self):
+        raise NotImplementedError()  # pragma: no cover
+
+
+class FrameStore(HistoryStore):
+    """ Keeps every snapshot as a row. """
+
+    def __init__(self):
+        self._datetimes = list()
+        self._rows = list()
+
+    def append(self, date_time, snapshot):
+        self._datetimes.append(date_time)
+        self._rows.append(snapshot)
+
+    def clear(self):
+        self._datetimes = list()
+        self._rows = list()
+
+    def get(self) -> pd.DataFrame:
+        if len(self._rows) == 0:
+            return pd.DataFrame()
+        return pd.DataFrame(self._rows, index=self._datetimes)
+
+    def get_values(self, column) -> np.ndarray:
+        rows = self._rows
+        if not any(column in row for row in rows):
+            raise ValueError("No history for '%s'." % column)
+        return np.array([row.get(column, np.nan) for row in rows], float)
+
+    def get_datetimes(self) -> np.ndarray:
+        return np.array(self._datetimes, dtype="datetime64[ns]")
+
+
+class _DeltaColumn:
+    """ Row numbers where some column changed, and the new values. """
+
+    def __init__(self):
+        self.rows = GrowableColumn(np.int64)
+        self.values = GrowableColumn(np.float64)
+        self.last = None
+
+    def append(self, row, value):
+        values = self.values
+        if values.dtype != object:
+            if value is None:
+                value = np.nan
+            elif isinstance(value, bool) or not isinstance(value, Real):
+                objects = GrowableColumn(object)
+                objects.extend(values.values)
+                self.values = values = objects
+        self.rows.append(row)
+        values.append(value)
+        self.last = value
+
+    def get(self, size):
+        """ Returns dense forward filled values for some number of rows. """
+        rows = self.rows.values
+        values = self.values.values
+        positions = np.searchsorted(rows, np.arange(size), side="right") - 1
+        if values.dtype == object:
+            dense = np.full(size, np.nan, dtype=object)
+        else:
+            dense = np.full(size, np.nan)
+        recorded = positions >= 0
+        dense[recorded] = values[positions[recorded]]
+        return dense
+
+
+def _same_value(value, last):
+    if value is last:
+        return True
+    try:
+        if value == last:
+            return True
+        return value != value and last != last  # both NaN
+    except (TypeError, ValueError):
+        return False
+
+
+class DeltaStore(HistoryStore):
+    """Stores a value only when it differs from the previous value
+    for that column, and forward fills when building the frame.
+    Memory scales with the number of changes rather than the number
+    of time stamps multiplied by the number of columns.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._datetimes = GrowableColumn("datetime64[ns]")
+        self._columns = dict()  # name -> _DeltaColumn
+
+    def append(self, date_time, snapshot):
+        row = len(self._datetimes)
+        self._datetimes.append(date_time)
+        columns = self._columns
+        for name, value in snapshot.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = _DeltaColumn()
+            elif _same_value(value, column.last):
+                continue
+            column.append(row, value)
+
+        if len(snapshot) < len(columns):
+            # columns missing from this snapshot have no value
+            for name, column in columns.items():
+                if name not in snapshot and not _same_value(
+                    np.nan, column.last
+                ):
+                    column.append(row, np.nan)
+
+    def get(self) -> pd.DataFrame:
+        size = len(self._datetimes)
+        if size == 0:
+            return pd.DataFrame()
+        data = {
+            name: column.get(size) for name, column in self._columns.items()
+        }
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self.get_datetimes()))
+
+    def get_values(self, column) -> np.ndarray:
+        delta_column = self._columns.get(column)
+        if delta_column is None:
+            raise ValueError("No history for '%s'." % column)
+        return delta_column.get(len(self._datetimes)).astype(float)
+
+    def get_datetimes(self) -> np.ndarray:
+        return self._datetimes.values.copy()
+
+    @property
+    def num_values(self):
+        """ Number of values stored across all columns. """
+        return sum(len(column.rows) for column in self._columns.values())
+
+
+class SparseHoldings:
+    """Non-zero holdings as (datetime, portfolio, asset, units) rows.
+    Portfolio and asset codes are stored as integer ids.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._datetimes = GrowableColumn("datetime64[ns]")
+        self._portfolios = GrowableColumn(np.int32)
+        self._assets = GrowableColumn(np.int32)
+        self._units = GrowableColumn(np.float64)
+        self._codes = list()
+        self._code_ids = dict()
+
+    def _get_code_id(self, code):
+        code_id = self._code_ids.get(code)
+        if code_id is None:
+            code_id = self._code_ids[code] = len(self._codes)
+            self._codes.append(code)
+        return code_id
+
+    def record(self, date_time, portfolios):
+        self.record_holdings(
+            date_time,
+            [
+                (portfolio.code, portfolio.get_holdings())
+                for portfolio in portfolios
+            ],
+        )
+
+    def record_holdings(self, date_time, holdings_by_portfolio):
+        """ Record (portfolio code, holdings) pairs from get_holdings. """
+        get_code_id = self._get_code_id
+        for portfolio_code, holdings in holdings_by_portfolio:
+            count = len(holdings)
+            portfolio_id = get_code_id(portfolio_code)
+            self._datetimes.extend(np.full(count, date_time, "datetime64[ns]"))
+            self._portfolios.extend(np.full(count, portfolio_id))
+            self._assets.extend([get_code_id(code) for code in holdings])
+            self._units.extend(list(holdings.values()))
+
+    def __len__(self):
+        return len(self._units)
+
+    def restore(self, frame):
+        """ Replace all holdings with those returned by get. """
+        self.clear()
+        get_code_id = self._get_code_id
+        self._datetimes.extend(frame["datetime"].to_numpy())
+        for column, name in (
+            (self._portfolios, "portfolio"),
+            (self._assets, "asset"),
+        ):
+            column.extend([get_code_id(code) for code in frame[name]])
+        self._units.extend(frame["units"].to_numpy(dtype=float))
+
+    def truncate(self, num_rows):
+        """ Keep only the first num_rows holdings recorded. """
+        for column in (
+            self._datetimes,
+            self._portfolios,
+            self._assets,
+            self._units,
+        ):
+            column.truncate(num_rows)
+
+    def get(self) -> pd.DataFrame:
+        categories = self._codes
+        return pd.DataFrame(
+            {
+                "datetime": self._datetimes.values.copy(),
+                "portfolio": pd.Categorical.from_codes(
+                    self._portfolios.values, categories=categories
+                ),
+                "asset": pd.Categorical.from_codes(
+                    self._assets.values, categories=categories
+                ),
+                "units": self._units.values.copy(),
+            }
+        )
+
+
 class History:
+    """Records the history of portfolios and the instruments they hold.
+    Column groups are 'assets', 'fx_rates', 'portfolios' (values),
+    'holdings' and 'indicators'. Pass include and / or exclude to limit
+    the groups recorded. With sparse_holdings, holdings are recorded in
+    long format by get_holdings rather than as one column per asset.
+    Pass store=DeltaStore() to store values only when they change.
+    The frame returned by get is built once per snapshot and cached.
+    A name identifies the history in a checkpoint, and is needed when
+    several histories record the same portfolios and groups.
+    """
+
     instances = WeakSet()
 
-    def __init__(self, portfolios, *, backtest=None):
+    def __init__(
+        self,
+        portfolios,
+        *,
+        backtest=None,
+        policy=None,
+        include=None,
+        exclude=None,
+        sparse_holdings=False,
+        store=None,
+        name=None,
+    ):
         self.instances.add(self)
-        self._history = pd.DataFrame()
+        if name is not None and not isinstance(name, str):
+            raise TypeError("Expecting string.")
+        self._name = name
+        if store is None:
+            store = FrameStore()
+        if not isinstance(store, HistoryStore):
+            raise TypeError("Expecting HistoryStore instance.")
+        self._store = store
+        self._frame = None  # cached result of get
+        self._pending = None  # (date_time, snapshot, holdings)
+        groups = self._groups = self._get_groups(include, exclude)
+        if not isinstance(sparse_holdings, bool):
+            raise TypeError("Expecting boolean.")
+        self._sparse_holdings = None
+        if sparse_holdings and "holdings" in groups:
+            self._sparse_holdings = SparseHoldings()
         self._asset_visitor = AssetVisitor()
         self._fx_rate_visitor = FxRateVisitor()
-        self._portfolio_visitor = PortfolioVisitor()
+        self._portfolio_visitor = PortfolioVisitor(
+            values="portfolios" in groups,
+            holdings="holdings" in groups and not sparse_holdings,
+        )
 
         if isinstance(portfolios, Portfolio):
             portfolios = [portfolios]
@@ -74,8 +511,30 @@ class History:
             if not isinstance(backtest, pxtrade.backtest.Backtest):
                 raise TypeError("Expecting Backtest instance.")
 
+        if policy is not None:
+            if not isinstance(policy, RecordingPolicy):
+                raise TypeError("Expecting RecordingPolicy instance.")
+
         self._portfolios = portfolios
         self._backtest = backtest
+        self._policy = policy
+
+    @staticmethod
+    def _get_groups(include, exclude):
+        groups = set(GROUPS)
+        for names in (include, exclude):
+            if names is None:
+                continue
+            if isinstance(names, str):
+                raise TypeError("Expecting a collection of group names.")
+            for name in names:
+                if name not in GROUPS:
+                    raise ValueError("Unknown group '%s'." % name)
+        if include is not None:
+            groups = set(include)
+        if exclude is not None:
+            groups -= set(exclude)
+        return frozenset(groups)
 
     def _get_visitor(self, instance):
         if isinstance(instance, Asset):
@@ -88,17 +547,63 @@ class History:
             "Unable to record history for " + instance.__class__.__name__
         )
 
-    def take_snapshot(self, date_time):
+    def take_snapshot(self, date_time, next_datetime=None, *, backtest=None):
+        """Record the current state, subject to any recording policy.
+        Indicators are read from the backtest taking the snapshot, if
+        given, such as a clone of the backtest this history is bound to.
+        Returns True if a snapshot was recorded or buffered.
+        """
         if not isinstance(date_time, datetime):
             raise TypeError("Expecting datetime instance.")
+        if backtest is not None:
+            if not isinstance(backtest, pxtrade.backtest.Backtest):
+                raise TypeError("Expecting Backtest instance.")
+        policy = self._policy
+        if policy is None:
+            self._write(date_time, *self._get_snapshot(backtest))
+            return True
+        if not policy.buffered:
+            if not policy.should_record(self, date_time, next_datetime):
+                return False
+            self._write(date_time, *self._get_snapshot(backtest))
+            return True
+
+        pending = self._pending
+        if pending is not None and policy.closes_period(pending[0], date_time):
+            self._write_pending()
+        record = policy.should_record(self, date_time, next_datetime)
+        self._pending = (date_time, *self._get_snapshot(backtest))
+        if record:
+            self._write_pending()
+        return True
+
+    def _write_pending(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            self._write(*pending)
+
+    def flush(self):
+        """Record any snapshot held back by a buffered recording policy,
+        then flush the store (e.g. a SpillStore writes its tail to disk).
+        The backtest flushes its histories once a run is complete.
+        """
+        self._write_pending()
+        self._store.flush()
+
+    def _get_snapshot(self, backtest):
+        """ Returns the snapshot dict and any sparse holdings. """
+        groups = self._groups
         instances = list()
-        instances.extend(Asset.get_instances())
-        instances.extend(FxRate.get_instances())
-        instances.extend(self._portfolios)
+        if "assets" in groups:
+            instances.extend(Asset.get_instances())
+        if "fx_rates" in groups:
+            instances.extend(FxRate.get_instances())
+        if "portfolios" in groups or "holdings" in groups:
+            instances.extend(self._portfolios)
 
         get_visitor = self._get_visitor
-        snapshot = pd.Series(dtype=object)
-        snapshot.name = date_time
+        snapshot = dict()
         for instance in instances:
             visitor = get_visitor(instance)
             rows = visitor.visit(instance)
@@ -106,12 +611,116 @@ class History:
                 name, value = row
                 snapshot[name] = value
 
-        backtest = self._backtest
-        if backtest is not None:
+        if self._backtest is None:
+            backtest = None
+        elif backtest is None:
+            backtest = self._backtest
+        if backtest is not None and "indicators" in groups:
             for key, value in backtest.indicators.items():
                 snapshot[key] = value
 
-        self._history = self._history.append(snapshot)
+        holdings = None
+        if self._sparse_holdings is not None:
+            holdings = [
+                (portfolio.code, portfolio.get_holdings())
+                for portfolio in self._portfolios
+            ]
+        return snapshot, holdings
+
+    def _write(self, date_time, snapshot, holdings):
+        self._store.append(date_time, snapshot)
+        self._frame = None
+        if holdings is not None:
+            self._sparse_holdings.record_holdings(date_time, holdings)
+
+    @property
+    def portfolios(self):
+        return list(self._portfolios)
+
+    @property
+    def name(self):
+        return self._name
+
+    def _restore(self, history):
+        """ Continue recording from some previously stored history. """
+        if not isinstance(history, pd.DataFrame):
+            raise TypeError("Expecting pd.DataFrame instance.")
+        self._store.restore(history)
+        self._frame = None
+        self._pending = None
+
+    def _get_state(self):
+        """The recorded frame, recording policy state, any buffered
+        snapshot and the number of sparse holdings, for BacktestSnapshot.
+        """
+        num_holdings = None
+        if self._sparse_holdings is not None:
+            num_holdings = len(self._sparse_holdings)
+        return (
+            self.get(copy=False),
+            deepcopy(self._policy),
+            self._pending,
+            num_holdings,
+        )
+
+    def _restore_state(self, state):
+        """ Put back the state returned by _get_state. """
+        frame, policy, pending, num_holdings = state
+        self._restore(frame)
+        self._policy = deepcopy(policy)
+        self._pending = pending
+        if num_holdings is not None:
+            self._sparse_holdings.truncate(num_holdings)
+
+    def _build_frame(self) -> pd.DataFrame:
+        """Numeric columns are held in a single read only float64 block,
+        and any other columns (e.g. string indicators) as objects,
+        so the frame is the same whichever store recorded it.
+        """
+        frame = self._store.get()
+        numeric = dict()
+        others = list()
+        for position, name in enumerate(frame.columns):
+            column = frame[name]
+            if is_numeric_column(column.to_numpy()):
+                numeric[name] = column.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                others.append((position, name, column.astype(object)))
+
+        values = np.empty((len(frame), len(numeric)), order="F")
+        for j, column in enumerate(numeric.values()):
+            values[:, j] = column
+        values.flags.writeable = False
+        result = pd.DataFrame(
+            values, index=frame.index, columns=list(numeric), copy=False
+        )
+        for position, name, column in others:
+            result.insert(position, name, column)
+        return result
+
+    def get(self, *, copy=True) -> pd.DataFrame:
+        """Returns the recorded history with numeric columns as float64.
+        Pass copy=False for a read only view of the cached frame,
+        which is free to call repeatedly until the next snapshot.
+        """
+        if not isinstance(copy, bool):
+            raise TypeError("Expecting boolean.")
+        frame = self._frame
+        if frame is None:
+            frame = self._frame = self._build_frame()
+        if copy:
+            return frame.copy()
+        return frame
+
+    def get_holdings(self) -> pd.DataFrame:
+        """ Returns non-zero holdings recorded in long format. """
+        if self._sparse_holdings is None:
+            raise ValueError("Holdings are not recorded sparsely.")
+        return self._sparse_holdings.get()
+
+    def get_values(self, column) -> np.ndarray:
+        """ Returns float values for a single column without a full copy. """
+        return self._store.get_values(column)
 
-    def get(self):
-        return self._history.copy()
+    def get_datetimes(self) -> np.ndarray:
+        return self._store.get_datetimes()
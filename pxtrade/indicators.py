@@ -0,0 +1,155 @@
+"""
+Common indicators calculated over a whole price series in one pass.
+Results are cached by (series fingerprint, indicator, parameters) so
+that parameter sweeps don't recalculate the same indicator, and
+can be loaded into a backtest as IndicatorEvent objects.
+The cache keeps the most recently used results, up to some size.
+"""
+from collections import OrderedDict
+import hashlib
+from numbers import Integral
+import numpy as np
+import pandas as pd
+import pxtrade
+from .events import IndicatorEvent, load_frame_events
+
+
+_cache = OrderedDict()
+_cache_size = 128
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def set_cache_size(size: int = 128):
+    """ Keep at most size results, where 0 disables the cache. """
+    global _cache_size
+    if not isinstance(size, Integral) or isinstance(size, bool):
+        raise TypeError("Expecting integer cache size.")
+    if size < 0:
+        raise ValueError("Expecting cache size >= 0.")
+    _cache_size = size
+    while len(_cache) > size:
+        _cache.popitem(last=False)
+
+
+def get_cache_size() -> int:
+    return _cache_size
+
+
+def fingerprint(series: pd.Series) -> str:
+    """ Returns a hash of the series index and values. """
+    hashed = pd.util.hash_pandas_object(series, index=True).values
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def sma(series, window):
+    """ Simple moving average. """
+    return series.rolling(window).mean()
+
+
+def ema(series, span):
+    """ Exponential moving average. """
+    return series.ewm(span=span, adjust=False, min_periods=span).mean()
+
+
+def rsi(series, window=14):
+    """ Relative strength index using Wilder's smoothing. """
+    change = series.diff()
+    gain = change.clip(lower=0)
+    loss = -change.clip(upper=0)
+    alpha = 1 / window
+    average_gain = gain.ewm(alpha=alpha, adjust=False, min_periods=window)
+    average_loss = loss.ewm(alpha=alpha, adjust=False, min_periods=window)
+    average_gain = average_gain.mean()
+    average_loss = average_loss.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative_strength = average_gain / average_loss
+    return 100 - 100 / (1 + relative_strength)
+
+
+def volatility(series, window, periods_per_year=None):
+    """Rolling standard deviation of returns.
+    Annualised if periods_per_year is given.
+    """
+    result = series.pct_change().rolling(window).std()
+    if periods_per_year is not None:
+        result *= np.sqrt(periods_per_year)
+    return result
+
+
+def zscore(series, window):
+    """ Number of rolling standard deviations from the rolling mean. """
+    rolling = series.rolling(window)
+    return (series - rolling.mean()) / rolling.std()
+
+
+def crossover(series, fast, slow):
+    """Returns 1 where the fast moving average crosses above the slow,
+    -1 where it crosses below and 0 otherwise.
+    """
+    fast_average = compute("sma", series, window=fast)
+    slow_average = compute("sma", series, window=slow)
+    above = (fast_average > slow_average).astype(float)
+    above = above.where(fast_average.notna() & slow_average.notna())
+    return above.diff()
+
+
+INDICATORS = {
+    "sma": sma,
+    "ema": ema,
+    "rsi": rsi,
+    "volatility": volatility,
+    "zscore": zscore,
+    "crossover": crossover,
+}
+
+
+def compute(indicator, series, **params) -> pd.Series:
+    """Calculate an indicator, such as compute('sma', prices, window=50).
+    Results are cached and should be treated as read only.
+    """
+    if not isinstance(series, pd.Series):
+        raise TypeError("Expecting pd.Series instance.")
+    func = INDICATORS.get(indicator)
+    if func is None:
+        raise ValueError("Unknown indicator '%s'." % indicator)
+
+    key = (fingerprint(series), indicator, tuple(sorted(params.items())))
+    result = _cache.get(key)
+    if result is not None:
+        _cache.move_to_end(key)
+        return result
+    result = func(series, **params)
+    if _cache_size > 0:
+        _cache[key] = result
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    return result
+
+
+def load_indicator(
+    indicator_name,
+    indicator,
+    series,
+    *,
+    backtest,
+    **params,
+) -> int:
+    """Calculate an indicator and load the values as IndicatorEvent
+    objects. Periods without a value (e.g. the first window - 1 values of
+    a moving average) are skipped. Returns the number of events loaded.
+    """
+    if not isinstance(indicator_name, str):
+        raise TypeError("Expecting string.")
+    if not isinstance(backtest, pxtrade.backtest.Backtest):
+        raise TypeError("Expecting Backtest instance.")
+    values = compute(indicator, series, **params).dropna()
+    return load_frame_events(
+        indicator_name,
+        values.to_frame(indicator_name),
+        indicator_name,
+        backtest=backtest,
+        event_class=IndicatorEvent,
+    )
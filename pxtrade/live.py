@@ -0,0 +1,75 @@
+"""
+A backtest can also be driven by a live feed of events rather than
+a preloaded queue. Feeds mark the end of each time stamp with a
+TimestampClose, or simply move on to a later time stamp.
+A local replay of events can stand in for the feed when testing.
+"""
+import asyncio
+import time
+from itertools import groupby
+import pandas as pd
+from .observable import Observer
+from .util import to_datetime
+
+
+class TimestampClose:
+    """ All events for this time stamp have arrived. """
+
+    def __init__(self, datetime):
+        self._datetime = to_datetime(datetime)
+
+    @property
+    def datetime(self):
+        return self._datetime
+
+    def __str__(self):
+        return self.__class__.__name__ + "(" + str(self._datetime) + ")"
+
+
+def _group_by_datetime(events):
+    events = sorted(events, key=lambda event: event.datetime)
+    return groupby(events, key=lambda event: event.datetime)
+
+
+def replay(events, *, delay=0.0):
+    """Yield events in time order as a feed would, closing each
+    time stamp with a TimestampClose. Optionally wait for some
+    delay (in seconds) between time stamps.
+    """
+    for event_datetime, datetime_events in _group_by_datetime(events):
+        yield from datetime_events
+        yield TimestampClose(event_datetime)
+        if delay > 0:
+            time.sleep(delay)
+
+
+async def replay_to_queue(events, queue, *, delay=0.0):
+    """ As for replay, but put events on an asyncio.Queue. """
+    for event_datetime, datetime_events in _group_by_datetime(events):
+        for event in datetime_events:
+            await queue.put(event)
+        await queue.put(TimestampClose(event_datetime))
+        await asyncio.sleep(delay)
+    await queue.put(None)  # end of feed
+
+
+class LatencyRecorder(Observer):
+    """ Record the time taken to process each backtest time stamp. """
+
+    def __init__(self, backtest):
+        self._datetimes = list()
+        self._latencies = list()
+        backtest.add_monitor(self)
+
+    def observable_update(self, backtest):
+        self._datetimes.append(backtest.datetime)
+        self._latencies.append(backtest.latency)
+
+    def get(self):
+        """ Returns the latency in seconds for each time stamp. """
+        return pd.Series(
+            self._latencies,
+            index=pd.DatetimeIndex(self._datetimes),
+            name="latency",
+            dtype=float,
+        )
@@ -0,0 +1,130 @@
+"""
+Strategies often need recent history for some asset or indicator,
+such as the last 200 prices for a moving average.
+A ring buffer keeps a fixed number of the latest values in a NumPy array
+and updates rolling statistics as each value arrives.
+"""
+from collections import deque
+from math import sqrt
+from numbers import Integral
+import numpy as np
+
+
+class RingBuffer:
+    """A fixed capacity buffer of the latest values.
+    Each value is written twice, so the latest n values are always
+    a contiguous slice and can be returned as a view without copying.
+    Views are read only and will change as new values are appended.
+    """
+
+    def __init__(self, capacity):
+        if not isinstance(capacity, Integral):
+            raise TypeError("Expecting integer.")
+        if capacity < 1:
+            raise ValueError("Capacity must be >= 1.")
+        self._capacity = capacity
+        self._data = np.full(2 * capacity, np.nan)
+        self._count = 0  # total values appended
+        self._mean = 0.0
+        self._m2 = 0.0  # sum of squared differences from the mean
+        self._min = deque()  # (count, value) with increasing values
+        self._max = deque()  # (count, value) with decreasing values
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    def append(self, value):
+        value = float(value)
+        capacity = self._capacity
+        count = self._count
+        position = count % capacity
+        data = self._data
+
+        # Welford updates keep the variance accurate when values are
+        # large compared with their spread
+        mean = self._mean
+        if count >= capacity:
+            evicted = data[position]
+            change = value - evicted
+            self._mean = mean + change / capacity
+            self._m2 += change * (value - self._mean + evicted - mean)
+        else:
+            delta = value - mean
+            self._mean = mean + delta / (count + 1)
+            self._m2 += delta * (value - self._mean)
+        data[position] = data[position + capacity] = value
+        self._count = count = count + 1
+        if count % capacity == 0:
+            # avoid accumulating floating point error
+            window = self.view()
+            self._mean = mean = float(window.mean())
+            self._m2 = float(((window - mean) ** 2).sum())
+
+        # monotonic queues give the window min and max in O(1)
+        oldest = count - capacity
+        minimums = self._min
+        while minimums and minimums[-1][1] >= value:
+            minimums.pop()
+        minimums.append((count, value))
+        if minimums[0][0] <= oldest:
+            minimums.popleft()
+
+        maximums = self._max
+        while maximums and maximums[-1][1] <= value:
+            maximums.pop()
+        maximums.append((count, value))
+        if maximums[0][0] <= oldest:
+            maximums.popleft()
+
+    def view(self, n=None):
+        """ Returns a read only view of the latest n values, oldest first. """
+        size = len(self)
+        if n is None:
+            n = size
+        if not isinstance(n, Integral):
+            raise TypeError("Expecting integer.")
+        if n < 0 or n > self._capacity:
+            raise ValueError("Expecting 0 <= n <= capacity.")
+        n = min(n, size)
+        end = (self._count - 1) % self._capacity + 1 + self._capacity
+        start = end - n
+        window = self._data[start:end]
+        window.flags.writeable = False
+        return window
+
+    @property
+    def last(self):
+        if self._count == 0:
+            return None
+        return self._data[(self._count - 1) % self._capacity]
+
+    @property
+    def mean(self):
+        size = len(self)
+        if size == 0:
+            return None
+        return self._mean
+
+    @property
+    def std(self):
+        """ Sample standard deviation of values in the buffer. """
+        size = len(self)
+        if size < 2:
+            return None
+        return sqrt(max(self._m2 / (size - 1), 0.0))
+
+    @property
+    def min(self):
+        if self._count == 0:
+            return None
+        return self._min[0][1]
+
+    @property
+    def max(self):
+        if self._count == 0:
+            return None
+        return self._max[0][1]
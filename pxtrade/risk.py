@@ -0,0 +1,179 @@
+"""
+Risk metrics that are updated as each backtest time stamp completes,
+so that strategies and other observers can read them mid-run.
+Each update is O(1) for the running peak, drawdown and a Welford
+estimate of the variance of returns, and O(holdings) for gross and net
+exposure by currency.
+A tracker can also stop the backtest early, for example once the
+drawdown passes 30%, so that parameter sweeps abandon runs quickly.
+"""
+from math import sqrt
+from numbers import Real
+import pandas as pd
+import pxtrade
+from .assets import Cash, Portfolio
+from .observable import Observer
+
+
+class RiskTracker(Observer):
+    def __init__(
+        self,
+        portfolio,
+        backtest,
+        *,
+        max_drawdown=None,
+        stop_when=None,
+        periods_per_year=None,
+    ):
+        """stop_when is called with this tracker after each update
+        and the backtest is stopped if it returns True.
+        max_drawdown is a shortcut for stopping at some drawdown.
+        """
+        if not isinstance(portfolio, Portfolio):
+            raise TypeError("Expecting Portfolio instance.")
+        if not isinstance(backtest, pxtrade.backtest.Backtest):
+            raise TypeError("Expecting Backtest instance.")
+        if max_drawdown is not None:
+            if not isinstance(max_drawdown, Real):
+                raise TypeError("Expecting numeric max drawdown.")
+            if not 0 < max_drawdown <= 1:
+                raise ValueError("Expecting 0 < max drawdown <= 1.")
+        if stop_when is not None and not callable(stop_when):
+            raise TypeError("Expecting a callable object.")
+        self._portfolio = portfolio
+        self._backtest = backtest
+        self._stop_at_drawdown = max_drawdown
+        self._stop_when = stop_when
+        self._periods_per_year = periods_per_year
+        self._value = None
+        self._peak = None
+        self._drawdown = 0.0
+        self._max_drawdown = 0.0
+        self._count = 0  # number of returns
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._update_exposure()
+        backtest.add_monitor(self)
+
+    def observable_update(self, backtest):
+        value = self._portfolio.value
+        previous = self._value
+        self._value = value
+        if previous is not None and previous != 0:
+            # Welford's online mean and variance of returns
+            period_return = value / previous - 1
+            self._count += 1
+            delta = period_return - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (period_return - self._mean)
+
+        peak = self._peak
+        if peak is None or value > peak:
+            self._peak = peak = value
+        drawdown = 0.0
+        if peak > 0:
+            drawdown = 1 - value / peak
+        self._drawdown = drawdown
+        if drawdown > self._max_drawdown:
+            self._max_drawdown = drawdown
+        self._update_exposure()
+
+        if self._should_stop():
+            backtest.stop()
+
+    def _should_stop(self):
+        stop_at_drawdown = self._stop_at_drawdown
+        if stop_at_drawdown is not None:
+            if self._drawdown >= stop_at_drawdown:
+                return True
+        stop_when = self._stop_when
+        if stop_when is not None:
+            return bool(stop_when(self))
+        return False
+
+    @property
+    def value(self):
+        return self._value
+
+    @property
+    def peak(self):
+        return self._peak
+
+    @property
+    def drawdown(self):
+        """ Current drawdown as a fraction of the running peak. """
+        return self._drawdown
+
+    @property
+    def max_drawdown(self):
+        return self._max_drawdown
+
+    @property
+    def mean_return(self):
+        if self._count == 0:
+            return None
+        return self._mean
+
+    @property
+    def variance(self):
+        """ Sample variance of returns. """
+        if self._count < 2:
+            return None
+        return self._m2 / (self._count - 1)
+
+    @property
+    def volatility(self):
+        """ Annualised if periods_per_year was given. """
+        variance = self.variance
+        if variance is None:
+            return None
+        volatility = sqrt(variance)
+        if self._periods_per_year is not None:
+            volatility *= sqrt(self._periods_per_year)
+        return volatility
+
+    def _update_exposure(self):
+        """ One pass over the holdings of the portfolio. """
+        values = self._portfolio.values_by_slot
+        gross = dict()
+        net = dict()
+        gross_total = net_total = 0.0
+        for asset in self._portfolio._holdings:
+            slot = asset.slot
+            if slot >= len(values):
+                continue
+            value = float(values[slot])
+            if value == 0:
+                continue
+            currency_code = asset.currency_code
+            gross[currency_code] = gross.get(currency_code, 0.0) + abs(value)
+            net[currency_code] = net.get(currency_code, 0.0) + value
+            if not isinstance(asset, Cash):
+                gross_total += abs(value)
+                net_total += value
+        self._gross_by_currency = gross
+        self._net_by_currency = net
+        self._gross_exposure = gross_total
+        self._net_exposure = net_total
+
+    @property
+    def gross_exposure(self):
+        """ Sum of absolute non-cash holding values in the base currency. """
+        return self._gross_exposure
+
+    @property
+    def net_exposure(self):
+        """ Sum of non-cash holding values in the base currency. """
+        return self._net_exposure
+
+    def exposure_by_currency(self) -> pd.DataFrame:
+        """Gross and net holding values in the base currency by asset
+        currency, including cash, as of the last update.
+        Use analytics.exposure_by_currency for a recorded history.
+        """
+        return pd.DataFrame(
+            {
+                "gross": pd.Series(self._gross_by_currency, dtype=float),
+                "net": pd.Series(self._net_by_currency, dtype=float),
+            }
+        )
@@ -0,0 +1,108 @@
+"""
+By default a strategy is run after every time stamp is processed.
+A schedule allows the backtest to skip the strategy entirely at
+time stamps where it doesn't need to generate trades.
+Schedules keep their own state, so each strategy needs its own instance.
+"""
+from abc import ABC, abstractmethod
+from datetime import time
+from numbers import Integral
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+from .assets import Asset, FxRate
+
+
+class Schedule(ABC):
+    @abstractmethod
+    def is_due(self, date_time, changed) -> bool:
+        """Return True if the strategy should run at this time stamp.
+        changed is the set of assets, fx rates and indicator names
+        updated at this time stamp.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+
+class EveryN(Schedule):
+    """ Run on the first and then every nth time stamp. """
+
+    def __init__(self, n):
+        if not isinstance(n, Integral):
+            raise TypeError("Expecting integer.")
+        if n < 1:
+            raise ValueError("Expecting n >= 1.")
+        self._n = n
+        self._count = 0
+
+    def is_due(self, date_time, changed) -> bool:
+        count = self._count
+        self._count += 1
+        return count % self._n == 0
+
+
+class OnOffset(Schedule):
+    """Run on the first time stamp at or after each date offset.
+    For example, 'M' will run on the first time stamp at or after
+    each month end. Anchored offsets such as month end are applied
+    to dates, so run on the first time stamp of that date.
+    """
+
+    def __init__(self, offset):
+        self._offset = to_offset(offset)
+        self._next_due = None
+
+    def _anchor(self, timestamp):
+        if isinstance(self._offset, Tick):
+            return timestamp
+        return timestamp.normalize()
+
+    def is_due(self, date_time, changed) -> bool:
+        offset = self._offset
+        timestamp = pd.Timestamp(date_time)
+        if self._next_due is None:
+            self._next_due = offset.rollforward(self._anchor(timestamp))
+        if timestamp < self._next_due:
+            return False
+        self._next_due = offset.rollforward(self._anchor(timestamp) + offset)
+        return True
+
+
+class TimeOfDay(Schedule):
+    """ Run once a day on the first time stamp at or after some cutoff. """
+
+    def __init__(self, cutoff):
+        if isinstance(cutoff, str):
+            cutoff = pd.Timestamp(cutoff).time()
+        if not isinstance(cutoff, time):
+            raise TypeError("Expecting datetime.time or 'HH:MM' string.")
+        self._cutoff = cutoff
+        self._last_date = None
+
+    def is_due(self, date_time, changed) -> bool:
+        if date_time.time() < self._cutoff:
+            return False
+        date = date_time.date()
+        if date == self._last_date:
+            return False
+        self._last_date = date
+        return True
+
+
+class OnChange(Schedule):
+    """Run only when some asset, fx rate or indicator has changed.
+    With no instruments given, run when anything has changed.
+    """
+
+    def __init__(self, *instruments):
+        for instrument in instruments:
+            if not isinstance(instrument, (Asset, FxRate, str)):
+                raise TypeError(
+                    "Expecting Asset, FxRate or indicator name."
+                )
+        self._instruments = frozenset(instruments)
+
+    def is_due(self, date_time, changed) -> bool:
+        instruments = self._instruments
+        if not instruments:
+            return len(changed) > 0
+        return not instruments.isdisjoint(changed)
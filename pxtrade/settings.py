@@ -1,5 +1,6 @@
 import os
 from configparser import ConfigParser
+from contextlib import contextmanager
 from .assets.codes import check_currency_code
 
 
@@ -15,3 +16,31 @@ def set_default_currency_code(code: str = "USD"):
 
 def get_default_currency_code():
     return config["currency"]["default"]
+
+
+# In trusted mode the internal calls made by the engine skip
+# re-validating inputs that were validated at load or construction.
+# Public entry points always validate their inputs.
+trusted_mode = False
+
+
+def set_trusted_mode(trusted: bool = True):
+    global trusted_mode
+    if not isinstance(trusted, bool):
+        raise TypeError("Expecting boolean.")
+    trusted_mode = trusted
+
+
+def get_trusted_mode() -> bool:
+    return trusted_mode
+
+
+@contextmanager
+def use_trusted_mode(trusted: bool = True):
+    """ Set trusted mode within some context. """
+    previous = trusted_mode
+    set_trusted_mode(trusted)
+    try:
+        yield
+    finally:
+        set_trusted_mode(previous)
@@ -0,0 +1,268 @@
+"""
+When backtests are fanned out across many worker processes we don't want
+each worker to read and parse the same prices.
+SharedMarketData holds time stamps and one price column per asset code
+in a single block of shared memory. Workers attach to this block by name
+and read columns as read only views without copying, then either load
+price events for their own backtest or stream them with iter_events.
+"""
+from multiprocessing import shared_memory
+from numbers import Integral
+import numpy as np
+import pandas as pd
+import pxtrade
+from .assets import Asset
+from .events import AssetPriceEvent
+from .live import TimestampClose
+
+
+class SharedMarketDataHandle:
+    """ A small picklable reference for attaching in other processes. """
+
+    def __init__(self, name, num_rows, codes):
+        self.name = name
+        self.num_rows = num_rows
+        self.codes = tuple(codes)
+
+    def __eq__(self, other):
+        if not isinstance(other, SharedMarketDataHandle):
+            return NotImplemented
+        return (self.name, self.num_rows, self.codes) == (
+            other.name,
+            other.num_rows,
+            other.codes,
+        )
+
+    def __str__(self):
+        return "SharedMarketDataHandle('%s', %d rows, %d codes)" % (
+            self.name,
+            self.num_rows,
+            len(self.codes),
+        )
+
+
+class SharedMarketData:
+    """Time stamps followed by price columns in one shared memory block.
+    Each column is contiguous, and the column for some asset code
+    is found by its column index, which is unrelated to Asset.slot.
+    Use create in the parent process and attach in each worker.
+    Every process should close the data once done, and the creator
+    should unlink it once all workers are finished. Columns and frames
+    are views on the shared memory, so release them before closing.
+    """
+
+    def __init__(self, shm, num_rows, codes, *, owner=False):
+        self._shm = shm
+        self._num_rows = num_rows
+        self._codes = tuple(codes)
+        self._column_indices = {
+            code: index for index, code in enumerate(self._codes)
+        }
+        self._owner = owner
+        buffer = shm.buf
+        self._datetimes = np.ndarray(
+            (num_rows,), dtype="datetime64[ns]", buffer=buffer
+        )
+        self._values = np.ndarray(
+            (num_rows, len(self._codes)),
+            dtype=np.float64,
+            buffer=buffer,
+            offset=self._datetimes.nbytes,
+            order="F",
+        )
+        self._datetimes.flags.writeable = False
+        self._values.flags.writeable = False
+
+    @classmethod
+    def create(cls, df: pd.DataFrame, *, name=None):
+        """Copy a data frame of prices, with a datetime index and one
+        column per asset code, into a new block of shared memory.
+        """
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError("Expecting pd.DataFrame instance.")
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise TypeError("Expecting a datetime index.")
+        codes = [str(code) for code in df.columns]
+        if len(set(codes)) != len(codes):
+            raise ValueError("Expecting unique asset codes.")
+
+        num_rows = len(df)
+        size = num_rows * 8 * (1 + len(codes))
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=max(size, 1)
+        )
+        datetimes = np.ndarray(
+            (num_rows,), dtype="datetime64[ns]", buffer=shm.buf
+        )
+        datetimes[:] = df.index.values
+        values = np.ndarray(
+            (num_rows, len(codes)),
+            dtype=np.float64,
+            buffer=shm.buf,
+            offset=datetimes.nbytes,
+            order="F",
+        )
+        values[:] = df.to_numpy(dtype=np.float64)
+        del datetimes, values  # views on shm.buf need releasing on close
+        return cls(shm, num_rows, codes, owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        """ Attach to data created in some other process. """
+        if not isinstance(handle, SharedMarketDataHandle):
+            raise TypeError("Expecting SharedMarketDataHandle instance.")
+        shm = shared_memory.SharedMemory(name=handle.name)
+        return cls(shm, handle.num_rows, handle.codes)
+
+    @property
+    def handle(self):
+        return SharedMarketDataHandle(
+            self._shm.name, self._num_rows, self._codes
+        )
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def codes(self):
+        return self._codes
+
+    def __len__(self):
+        return self._num_rows
+
+    def get_column_index(self, code):
+        index = self._column_indices.get(code)
+        if index is None:
+            raise ValueError("No prices for '%s'." % code)
+        return index
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        """ A read only view of the time stamps. """
+        return self._datetimes
+
+    def get_column(self, code_or_index) -> np.ndarray:
+        """ A read only view of prices for some asset code or column index. """
+        if isinstance(code_or_index, str):
+            index = self.get_column_index(code_or_index)
+        elif isinstance(code_or_index, Integral):
+            index = code_or_index
+            if index < 0 or index >= len(self._codes):
+                raise ValueError("Column index %d is out of range." % index)
+        else:
+            raise TypeError("Expecting asset code or integer column index.")
+        return self._values[:, index]
+
+    def get_frame(self) -> pd.DataFrame:
+        """ Prices as a data frame, without copying where possible. """
+        return pd.DataFrame(
+            self._values,
+            index=pd.DatetimeIndex(self._datetimes),
+            columns=list(self._codes),
+            copy=False,
+        )
+
+    def _get_assets(self, codes):
+        """ Returns (asset, column index) pairs for some asset codes. """
+        if codes is None:
+            codes = self._codes
+        elif isinstance(codes, str):
+            codes = [codes]
+        assets = list()
+        for code in codes:
+            asset = Asset.get_asset_for_code(code)
+            if asset is None:
+                raise ValueError("Asset code '%s' doesn't exist." % code)
+            assets.append((asset, self.get_column_index(code)))
+        return assets
+
+    def _get_start(self, backtest):
+        """ The first row after the backtest resume time stamp. """
+        if not isinstance(backtest, pxtrade.backtest.Backtest):
+            raise TypeError("Expecting Backtest instance.")
+        resume_datetime = backtest.resume_datetime
+        if resume_datetime is None:
+            return 0
+        return int(
+            np.searchsorted(
+                self._datetimes,
+                np.datetime64(resume_datetime, "ns"),
+                "right",
+            )
+        )
+
+    def load_events(self, backtest, codes=None) -> int:
+        """Load AssetPriceEvent objects for assets created in this
+        process, for some asset codes or all of them. Missing (NaN)
+        prices and rows at or before the backtest resume time stamp
+        are skipped. Returns the number of events loaded.
+        Every event is created up front and held in the backtest queue,
+        so each worker keeps one Python object per price. Use
+        iter_events to stream events for long runs instead.
+        """
+        start = self._get_start(backtest)
+        assets = self._get_assets(codes)
+        datetimes = pd.DatetimeIndex(self._datetimes[start:]).to_pydatetime()
+
+        load_event = backtest.load_event
+        event_count = 0
+        for asset, index in assets:
+            prices = self._values[start:, index]
+            valid = ~np.isnan(prices)
+            for event_datetime, price in zip(
+                datetimes[valid], prices[valid].tolist()
+            ):
+                load_event(AssetPriceEvent(asset, event_datetime, price))
+                event_count += 1
+        return event_count
+
+    def iter_events(self, backtest, codes=None):
+        """Yield AssetPriceEvent objects one time stamp at a time,
+        each followed by a TimestampClose, for backtest.run_live.
+        Events are created from the shared columns as they are consumed,
+        so only the current time stamp is held in the backtest queue.
+        Rows are skipped as for load_events. Consume the events before
+        closing this data.
+        """
+        start = self._get_start(backtest)
+        assets = self._get_assets(codes)
+        indices = np.array([index for _, index in assets], dtype=int)
+        assets = [asset for asset, _ in assets]
+        for row in range(start, self._num_rows):
+            prices = self._values[row, indices].tolist()
+            event_datetime = None
+            for asset, price in zip(assets, prices):
+                if price != price:  # NaN
+                    continue
+                if event_datetime is None:
+                    event_datetime = pd.Timestamp(
+                        self._datetimes[row]
+                    ).to_pydatetime()
+                yield AssetPriceEvent(asset, event_datetime, price)
+            if event_datetime is not None:
+                yield TimestampClose(event_datetime)
+
+    def close(self):
+        """ Release this process's view of the shared memory. """
+        self._datetimes = self._values = None
+        self._shm.close()
+
+    def unlink(self):
+        """ Free the shared memory once every process has closed it. """
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def __str__(self):
+        return "SharedMarketData('%s', %d rows, %d codes)" % (
+            self._shm.name,
+            self._num_rows,
+            len(self._codes),
+        )
@@ -0,0 +1,247 @@
+"""
+Long intraday runs can record more history than we'd like to keep in
+memory. A SpillStore keeps a small in-memory tail of snapshots and
+flushes fixed size batches of rows to .npy files in some directory.
+The remaining tail is flushed once a backtest run is complete.
+Values are saved column major, so a single column can be read from
+each memory mapped batch without loading the others.
+A SpillReader scans the flushed batches lazily, including those
+written by an earlier process.
+Numeric columns are stored as float64. Any other columns (such as
+string indicators) are pickled separately for each batch.
+"""
+import json
+import os
+import pickle
+import tempfile
+from numbers import Integral
+import numpy as np
+import pandas as pd
+from .history import HistoryStore, is_numeric_column
+
+
+INDEX_FILE = "index.json"
+
+
+def _batch_path(directory, batch_number, name):
+    return os.path.join(directory, "%06d_%s" % (batch_number, name))
+
+
+def _to_float_array(values):
+    """ Float values for a numeric column, with None as NaN. """
+    values = [np.nan if value is None else value for value in values]
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Expecting a numeric column.")
+
+
+class SpillReader:
+    """ Reads batches of history written by a SpillStore. """
+
+    def __init__(self, directory):
+        if not os.path.isdir(directory):
+            raise ValueError("Directory '%s' doesn't exist." % directory)
+        self._directory = directory
+        self._batches = list()
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as index_file:
+                self._batches = json.load(index_file)["batches"]
+
+    @property
+    def num_batches(self):
+        return len(self._batches)
+
+    @property
+    def num_rows(self):
+        return sum(batch["rows"] for batch in self._batches)
+
+    @property
+    def columns(self):
+        """ All column names in the order first recorded. """
+        columns = dict()
+        for batch in self._batches:
+            columns.update(dict.fromkeys(batch["columns"]))
+        return list(columns)
+
+    def _load(self, batch_number, name):
+        path = _batch_path(self._directory, batch_number, name + ".npy")
+        return np.load(path, mmap_mode="r")
+
+    def _load_objects(self, batch_number):
+        path = _batch_path(self._directory, batch_number, "objects.pkl")
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+    def get_batch(self, batch_number) -> pd.DataFrame:
+        batch = self._batches[batch_number]
+        values = self._load(batch_number, "values")
+        datetimes = self._load(batch_number, "datetimes")
+        frame = pd.DataFrame(
+            np.array(values),
+            index=pd.DatetimeIndex(np.array(datetimes)),
+            columns=batch["numeric_columns"],
+        )
+        if batch["object_columns"]:
+            objects = self._load_objects(batch_number)
+            for name in batch["object_columns"]:
+                frame[name] = pd.Series(
+                    objects[name], index=frame.index, dtype=object
+                )
+        return frame[batch["columns"]]
+
+    def iter_batches(self):
+        """ Yield one data frame per batch, so memory stays bounded. """
+        for batch_number in range(len(self._batches)):
+            yield self.get_batch(batch_number)
+
+    def get(self) -> pd.DataFrame:
+        frames = list(self.iter_batches())
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames)[self.columns]
+
+    def get_values(self, column) -> np.ndarray:
+        """ Read a single column from each memory mapped batch. """
+        if column not in self.columns:
+            raise ValueError("No history for '%s'." % column)
+        result = np.full(self.num_rows, np.nan)
+        start = 0
+        for batch_number, batch in enumerate(self._batches):
+            end = start + batch["rows"]
+            columns = batch["numeric_columns"]
+            if column in columns:
+                values = self._load(batch_number, "values")
+                result[start:end] = values[:, columns.index(column)]
+            elif column in batch["object_columns"]:
+                objects = self._load_objects(batch_number)[column]
+                result[start:end] = _to_float_array(objects)
+            start = end
+        return result
+
+    def get_datetimes(self) -> np.ndarray:
+        datetimes = [
+            np.array(self._load(batch_number, "datetimes"))
+            for batch_number in range(len(self._batches))
+        ]
+        if len(datetimes) == 0:
+            return np.array([], dtype="datetime64[ns]")
+        return np.concatenate(datetimes)
+
+
+class SpillStore(HistoryStore):
+    """Keeps at most batch_size snapshots in memory, writing the rest
+    to directory. A temporary directory is used if none is given.
+    """
+
+    def __init__(self, directory=None, *, batch_size=10000):
+        if not isinstance(batch_size, Integral):
+            raise TypeError("Expecting integer batch size.")
+        if batch_size < 1:
+            raise ValueError("Expecting batch size >= 1.")
+        self._temporary_directory = None
+        if directory is None:
+            self._temporary_directory = tempfile.TemporaryDirectory()
+            directory = self._temporary_directory.name
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._batch_size = batch_size
+        self.clear()
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def clear(self):
+        self._batches = list()
+        self._datetimes = list()  # in memory tail
+        self._rows = list()
+        self._write_index()
+
+    def _write_index(self):
+        path = os.path.join(self._directory, INDEX_FILE)
+        with open(path, "w") as index_file:
+            json.dump({"batches": self._batches}, index_file)
+
+    def append(self, date_time, snapshot):
+        self._datetimes.append(date_time)
+        self._rows.append(snapshot)
+        if len(self._rows) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """ Write the in-memory tail to disk as a new batch. """
+        rows = self._rows
+        if len(rows) == 0:
+            return
+        columns = list(dict.fromkeys(name for row in rows for name in row))
+        numeric = dict()
+        objects = dict()
+        for name in columns:
+            column = np.empty(len(rows), dtype=object)
+            column[:] = [row.get(name) for row in rows]
+            if is_numeric_column(column):
+                numeric[name] = column
+            else:
+                objects[name] = list(column)
+        values = np.full((len(rows), len(numeric)), np.nan, order="F")
+        for j, column in enumerate(numeric.values()):
+            values[:, j] = _to_float_array(column)
+        datetimes = np.array(self._datetimes, dtype="datetime64[ns]")
+
+        batch_number = len(self._batches)
+        directory = self._directory
+        for name, array in (("values", values), ("datetimes", datetimes)):
+            np.save(_batch_path(directory, batch_number, name + ".npy"), array)
+        if objects:
+            path = _batch_path(directory, batch_number, "objects.pkl")
+            with open(path, "wb") as file:
+                pickle.dump(objects, file)
+        self._batches.append(
+            {
+                "rows": len(rows),
+                "columns": columns,
+                "numeric_columns": list(numeric),
+                "object_columns": list(objects),
+            }
+        )
+        self._write_index()
+        self._datetimes = list()
+        self._rows = list()
+
+    def get_reader(self) -> SpillReader:
+        """ Returns a reader for batches already written to disk. """
+        return SpillReader(self._directory)
+
+    def _get_tail(self) -> pd.DataFrame:
+        if len(self._rows) == 0:
+            return pd.DataFrame()
+        frame = pd.DataFrame(self._rows, index=self._datetimes)
+        for name in frame.columns:
+            if not is_numeric_column(frame[name].to_numpy()):
+                frame[name] = frame[name].astype(object)
+        return frame
+
+    def get(self) -> pd.DataFrame:
+        reader = self.get_reader()
+        tail = self._get_tail()
+        if reader.num_batches == 0:
+            return tail
+        columns = list(dict.fromkeys(reader.columns + list(tail.columns)))
+        return pd.concat([reader.get(), tail])[columns]
+
+    def get_values(self, column) -> np.ndarray:
+        reader = self.get_reader()
+        in_tail = any(column in row for row in self._rows)
+        if not in_tail and column not in reader.columns:
+            raise ValueError("No history for '%s'." % column)
+        flushed = np.full(reader.num_rows, np.nan)
+        if column in reader.columns:
+            flushed = reader.get_values(column)
+        tail = _to_float_array([row.get(column) for row in self._rows])
+        return np.concatenate([flushed, tail])
+
+    def get_datetimes(self) -> np.ndarray:
+        tail = np.array(self._datetimes, dtype="datetime64[ns]")
+        return np.concatenate([self.get_reader().get_datetimes(), tail])
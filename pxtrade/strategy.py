@@ -8,6 +8,21 @@ from pxtrade import trade
 
 
 class Strategy(ABC):
+    """Set a schedule (see pxtrade.schedule) to only run the
+    strategy at some time stamps. By default it runs at all of them.
+
+    Set subscriptions to the assets, fx rates and indicator names
+    the strategy depends on and it will only run when one of these
+    has changed. The backtest sets changed to those that did before
+    generate_trades is called. Set lookback to keep this many of
+    the latest values for each subscription (see Backtest.lookback).
+    """
+
+    schedule = None
+    subscriptions = None
+    lookback = None
+    changed = frozenset()
+
     @abstractmethod
     def generate_trades(self) -> Union[None, trade.Trade, List[trade.Trade]]:
         raise NotImplementedError()  # pragma: no cover
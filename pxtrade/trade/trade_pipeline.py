@@ -4,6 +4,7 @@ for execution. Trade creation -> run compliance -> execution.
 """
 from copy import deepcopy
 from abc import ABC, abstractmethod
+from pxtrade import settings
 from pxtrade.trade import Trade
 
 
@@ -21,9 +22,13 @@ class Handler(ABC):
     def run(self, trade):
         if not isinstance(trade, Trade):
             raise TypeError("Expecting Trade instance.")
+        self._run(trade)
+
+    def _run(self, trade):
+        """ The trade has already been validated. """
         self.handle(trade)
         if self._next is not None:
-            self._next.run(trade)
+            self._next._run(trade)
 
     @abstractmethod
     def handle(self, trade):
@@ -34,7 +39,8 @@ class ComplianceHandler(Handler):
     """
     Compliance is run on the portfolio assuming that the trade is executed.
     The portfolio is then rolled back using the memento pattern once this
-    check is complete.
+    check is complete. Only rules affected by the assets traded, including
+    any cash and charges, are checked.
     """
 
     def handle(self, trade):
@@ -44,8 +50,13 @@ class ComplianceHandler(Handler):
             trade_copy.is_mock_trade = True
             portfolio = trade_copy.portfolio
             compliance = portfolio.compliance
+            portfolio._traded_codes = traded_codes = set()
             trade_copy.execute()
-            trade.passed_compliance = compliance.passes(trade_copy.portfolio)
+            if settings.trusted_mode:
+                passes = compliance._passes(portfolio, traded_codes)
+            else:
+                passes = compliance.passes(portfolio, traded_codes)
+            trade.passed_compliance = passes
             # print(trade, trade.passed_compliance)
         else:
             trade.passed_compliance = True
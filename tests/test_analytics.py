@@ -0,0 +1,129 @@
+from datetime import datetime
+import pytest
+import numpy as np
+import pandas as pd
+from pxtrade import analytics
+from pxtrade.assets import reset, Cash, FxRate, Stock, Portfolio, get_cash
+from pxtrade.blotter import Blotter
+from pxtrade.history import History
+from pxtrade.trade import Trade, trade_pipeline
+
+
+VALUES = np.array([100, 110, 99, 120, 90, 95, 130], dtype=float)
+
+
+def test_returns():
+    assert analytics.returns(VALUES)[:2] == pytest.approx([0.1, -0.1])
+    assert analytics.total_return(VALUES) == pytest.approx(0.3)
+    with pytest.raises(ValueError):
+        analytics.returns(np.ones((2, 2, 2)))
+
+
+def test_cagr():
+    assert analytics.cagr(VALUES, periods_per_year=6) == pytest.approx(0.3)
+    datetimes = pd.date_range("2020-01-01", periods=7, freq="2D")
+    with pytest.raises(ValueError):
+        analytics.cagr(VALUES, datetimes=datetimes[:1])
+    years = 12 / 365.25
+    expected = 1.3 ** (1 / years) - 1
+    result = analytics.cagr(VALUES, datetimes=datetimes)
+    assert result == pytest.approx(expected)
+
+
+def test_ratios():
+    returns = pd.Series(VALUES).pct_change().dropna()
+    volatility = returns.std() * np.sqrt(252)
+    assert analytics.volatility(VALUES) == pytest.approx(volatility)
+    sharpe = returns.mean() / returns.std() * np.sqrt(252)
+    assert analytics.sharpe(VALUES) == pytest.approx(sharpe)
+    downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+    sortino = returns.mean() / downside * np.sqrt(252)
+    assert analytics.sortino(VALUES) == pytest.approx(sortino)
+
+
+def test_max_drawdown():
+    drawdown, duration = analytics.max_drawdown(VALUES)
+    assert drawdown == pytest.approx(0.25)  # 120 -> 90
+    assert duration == 2  # below 120 for 2 periods
+    assert analytics.max_drawdown([1, 2, 3]) == (0.0, 0)
+
+
+def test_score():
+    np.random.seed(1)
+    runs = 100 * np.cumprod(1 + np.random.normal(0, 0.01, (250, 50)), axis=0)
+    frame = pd.DataFrame(runs, columns=["run%s" % i for i in range(50)])
+    scores = analytics.score(frame)
+    assert list(scores.index) == list(frame.columns)
+    for i in (0, 17, 49):
+        column = runs[:, i]
+        row = scores.iloc[i]
+        assert row["sharpe"] == pytest.approx(analytics.sharpe(column))
+        assert row["sortino"] == pytest.approx(analytics.sortino(column))
+        assert row["cagr"] == pytest.approx(analytics.cagr(column))
+        drawdown, duration = analytics.max_drawdown(column)
+        assert row["max_drawdown"] == pytest.approx(drawdown)
+        assert row["max_drawdown_duration"] == duration
+
+
+def test_portfolio_analytics():
+    reset()
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    audusd = FxRate("AUDUSD", 0.5)
+    stock_aud = Stock("ANL AU", 10, currency_code="AUD")
+    stock_usd = Stock("ANL US", 10, currency_code="USD")
+    blotter = Blotter()
+    for trade in (
+        Trade(portfolio, stock_aud, 20),
+        Trade(portfolio, stock_usd, 10),
+    ):
+        trade_pipeline.run(trade)
+        blotter.record(trade, datetime(2020, 9, 1))
+
+    # 200 AUD + 10 x 10 USD = 200 AUD traded
+    assert analytics.turnover(blotter, [1000, 1000]) == pytest.approx(0.4)
+    assert analytics.turnover(
+        blotter, [1000], portfolio_code="Other"
+    ) == 0.0
+
+    histories = [
+        History(portfolio),
+        History(portfolio, sparse_holdings=True),
+    ]
+    for history in histories:
+        history.take_snapshot(datetime(2020, 9, 1))
+    portfolio.transfer(get_cash("USD"), 150)
+    audusd.rate = 0.4
+    for history in histories:
+        history.take_snapshot(datetime(2020, 9, 2))
+
+    for history in histories:
+        exposure = analytics.exposure_by_currency(history)
+        assert list(exposure.index) == [
+            datetime(2020, 9, 1),
+            datetime(2020, 9, 2),
+        ]
+        # cash and ANL AU
+        assert list(exposure["AUD"]) == pytest.approx([1000, 1000])
+        # -100 USD cash and ANL US, then 150 USD more in AUD terms
+        assert list(exposure["USD"]) == pytest.approx([0, 375])
+
+    with pytest.raises(ValueError):
+        analytics.exposure_by_currency(histories[0], portfolio_code="XXX")
+    history = History(portfolio, exclude=["fx_rates"])
+    history.take_snapshot(datetime(2020, 9, 3))
+    with pytest.raises(ValueError):
+        analytics.exposure_by_currency(history)  # no AUDUSD rates
+
+
+def test_history_values():
+    reset()
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    history = History(portfolio)
+    history.take_snapshot(datetime(2020, 9, 1))
+    history.take_snapshot(datetime(2020, 9, 2))
+    assert list(history.get_values("Portfolio")) == [1000, 1000]
+    assert len(history.get_datetimes()) == 2
+    with pytest.raises(ValueError):
+        history.get_values("XXX")
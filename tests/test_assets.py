@@ -1,6 +1,7 @@
+import gc
 import pytest
 from pxtrade.settings import get_default_currency_code
-from pxtrade.assets import reset, Asset, Stock
+from pxtrade.assets import reset, Asset, Stock, Portfolio
 from pxtrade.observable import Observable
 
 
@@ -69,3 +70,29 @@ def test_price_setter():
 
     with pytest.raises(TypeError):
         stock.price = "123"
+
+
+def test_slots_are_reused():
+    reset()
+    gc.collect()
+    stock = Stock("SLT1")
+    slot = stock.slot
+    in_use = len(Asset._slots)
+    size = Asset._slots.size
+    sizes = list()
+    for i in range(100):
+        reset()
+        portfolio = Portfolio("USD")
+        portfolio.transfer(Stock("SLT%d" % (i + 2), 1.0), 10)
+        gc.collect()
+        # holding arrays don't grow with assets created in earlier runs
+        sizes.append(len(portfolio.units_by_slot))
+    assert max(sizes) <= 16
+    del portfolio
+    reset()
+    gc.collect()
+    # slots of collected assets are handed out again
+    assert len(Asset._slots) == in_use
+    assert Asset._slots.size <= size + 2  # a stock and cash per run
+    assert Stock("SLT1000").slot != slot
+    assert stock.slot == slot
@@ -1,11 +1,13 @@
 from datetime import datetime
 import pytest
 import pxtrade
-from pxtrade.assets import Stock, Portfolio
+from pxtrade.assets import reset, Cash, Stock, FxRate, Portfolio
+from pxtrade.broker import FixedRatePlusPercentage
 from pxtrade.backtest import Backtest
 from pxtrade.strategy import Strategy
-from pxtrade.events import AssetPriceEvent, IndicatorEvent
+from pxtrade.events import AssetPriceEvent, FxRateEvent, IndicatorEvent
 from pxtrade.compliance import Compliance, UnitLimit
+from pxtrade.settings import get_trusted_mode
 
 
 def test_backtest_indicator():
@@ -103,3 +105,222 @@ def test_backtest_no_trades_strategy():
 
     backtest = Backtest(NoTradesStrategy())
     assert backtest._run_strategy() is None
+
+
+def test_backtest_subscriptions():
+    reset()
+    stock1 = Stock("SUB1")
+    stock2 = Stock("SUB2")
+    audusd = FxRate("AUDUSD")
+    backtest = Backtest()
+    events = [
+        AssetPriceEvent(stock1, datetime(2020, 9, 1), 1.0),
+        AssetPriceEvent(stock2, datetime(2020, 9, 1), 2.0),
+        AssetPriceEvent(stock2, datetime(2020, 9, 2), 2.1),
+        FxRateEvent(audusd, datetime(2020, 9, 3), 0.7),
+        IndicatorEvent("VIX", datetime(2020, 9, 4), 25, backtest=backtest),
+    ]
+    [backtest.load_event(event) for event in events]
+
+    class RecordingStrategy(Strategy):
+        def __init__(self, subscriptions=None):
+            self.subscriptions = subscriptions
+            self.calls = list()
+
+        def generate_trades(self):
+            self.calls.append((backtest.datetime.day, self.changed))
+
+    strategy1 = RecordingStrategy([stock1, "VIX"])
+    strategy2 = RecordingStrategy([stock2, audusd])
+    strategy3 = RecordingStrategy()  # runs at every time stamp
+    backtest.add_strategy(strategy1)
+    backtest.add_strategy(strategy2)
+    backtest.add_strategy(strategy3)
+    assert backtest.strategies == [strategy1, strategy2, strategy3]
+    backtest.run()
+
+    assert strategy1.calls == [(1, {stock1}), (4, {"VIX"})]
+    assert strategy2.calls == [(1, {stock2}), (2, {stock2}), (3, {audusd})]
+    assert [day for day, _ in strategy3.calls] == [1, 2, 3, 4]
+    assert strategy3.calls[0][1] == {stock1, stock2}
+
+
+def test_backtest_strategy_list():
+    class NoTradesStrategy(Strategy):
+        def generate_trades(self):
+            return None
+
+    strategy1 = NoTradesStrategy()
+    strategy2 = NoTradesStrategy()
+    backtest = Backtest([strategy1, strategy2])
+    assert backtest.strategies == [strategy1, strategy2]
+
+    with pytest.raises(ValueError):
+        backtest.add_strategy(strategy1)  # already added
+    with pytest.raises(TypeError):
+        Backtest((strategy1, strategy2))
+    with pytest.raises(TypeError):
+        Backtest([strategy1, "Strategy"])
+
+    strategy3 = NoTradesStrategy()
+    strategy3.subscriptions = [123]
+    with pytest.raises(TypeError):
+        backtest.add_strategy(strategy3)
+
+
+def run_charged_backtest(trusted):
+    reset()
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    portfolio.broker = pxtrade.Broker(
+        charges_strategy=FixedRatePlusPercentage(10, 0.01, currency_code="USD")
+    )
+    stock = Stock("TRST", currency_code="USD")
+    audusd = FxRate("AUDUSD")
+    compliance = Compliance()
+    compliance.add_rule(UnitLimit(stock, 2))
+    portfolio.compliance = compliance
+
+    class BuyStrategy(Strategy):
+        def generate_trades(self):
+            assert get_trusted_mode() is trusted
+            return pxtrade.Trade(portfolio, stock, 1)
+
+    backtest = Backtest(BuyStrategy(), trusted=trusted)
+    for day, (price, rate) in enumerate([(10, 0.7), (11, 0.72), (12, 0.71)]):
+        dt = datetime(2020, 9, day + 1)
+        backtest.load_event(AssetPriceEvent(stock, dt, price))
+        backtest.load_event(FxRateEvent(audusd, dt, rate))
+    backtest.run()
+    assert get_trusted_mode() is False
+    return portfolio.get_holdings(), portfolio.value
+
+
+def test_backtest_trusted():
+    with pytest.raises(TypeError):
+        Backtest(trusted=1)
+    assert Backtest(trusted=True).trusted is True
+    assert run_charged_backtest(True) == run_charged_backtest(False)
+    holdings, _ = run_charged_backtest(True)
+    assert holdings["TRST"] == 2  # compliance is still applied
+
+
+def test_backtest_snapshot_clone():
+    reset()
+    aud = Cash("AUD")
+    stock = Stock("CLN AU", currency_code="AUD")
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(aud, 1000)
+    history = pxtrade.History(portfolio, backtest=None)
+    backtest = Backtest()
+    for day, price in enumerate([1.0, 2.0, 3.0, 4.0], start=1):
+        date_time = datetime(2020, 9, day)
+        backtest.load_event(AssetPriceEvent(stock, date_time, price))
+        backtest.load_event(
+            IndicatorEvent("Signal", date_time, day, backtest=backtest)
+        )
+
+    class BuyUnitsStrategy(Strategy):
+        def __init__(self, units):
+            self.units = units
+
+        def generate_trades(self):
+            return pxtrade.Trade(portfolio, stock, self.units)
+
+    snapshot = backtest.snapshot()
+    assert snapshot.num_events_loaded == 8
+    with pytest.raises(TypeError):
+        pxtrade.backtest.BacktestSnapshot("backtest")
+
+    values = dict()
+    for units in [1, 2, 1]:
+        clone = snapshot.clone(BuyUnitsStrategy(units))
+        assert clone.num_events_loaded == 8
+        assert stock.price is None
+        assert portfolio.value == 1000
+        clone.run()
+        assert clone.get_indicator("Signal") == 4
+        assert len(history.get()) == 4
+        values[units] = portfolio.value
+    assert values[1] == 1000 - 10 + 16
+    assert values[2] == 1000 - 20 + 32
+    # events are shared with the original backtest, which isn't run
+    assert backtest.num_events_loaded == 8
+    assert backtest.get_indicator("Signal") is None
+    with pytest.raises(TypeError):
+        snapshot.clone(None)
+
+    # the original backtest and earlier clones can still be run
+    first_clone = snapshot.clone(BuyUnitsStrategy(1))
+    second_clone = snapshot.clone(BuyUnitsStrategy(1))
+    backtest.run()
+    assert backtest.get_indicator("Signal") == 4
+    assert first_clone.get_indicator("Signal") is None
+    first_clone.run()
+    assert first_clone.get_indicator("Signal") == 4
+    assert second_clone.get_indicator("Signal") is None
+    history_indicators = pxtrade.History(
+        portfolio, backtest=backtest, include=["indicators"]
+    )
+    clone = snapshot.clone(BuyUnitsStrategy(1))
+    clone.run()
+    assert list(history_indicators.get()["Signal"]) == [1, 2, 3, 4]
+    assert backtest.get_indicator("Signal") == 4
+
+    clone.load_event(
+        pxtrade.events.TradeEvent(
+            datetime(2020, 9, 5), pxtrade.Trade(portfolio, stock, 1)
+        )
+    )
+    with pytest.raises(ValueError):
+        clone.snapshot()
+
+
+def test_backtest_clones_reproduce():
+    reset()
+    stock = Stock("CLR AU")
+    backtest = Backtest()
+    for day in range(1, 6):
+        backtest.load_event(AssetPriceEvent(stock, datetime(2020, 9, day), 1))
+
+    class EveryOtherStrategy(Strategy):
+        def __init__(self):
+            self.schedule = pxtrade.schedule.EveryN(2)
+            self.calls = 0
+
+        def generate_trades(self):
+            self.calls += 1
+
+    snapshot = backtest.snapshot()
+    calls = list()
+    for _ in range(3):
+        strategy = EveryOtherStrategy()
+        snapshot.clone(strategy).run()
+        calls.append(strategy.calls)
+    assert calls == [3, 3, 3]
+
+
+def test_backtest_clones_reproduce_history():
+    reset()
+    stock = Stock("CLH AU", currency_code="AUD")
+    portfolio = Portfolio("AUD")
+    history = pxtrade.History(
+        portfolio,
+        sparse_holdings=True,
+        policy=pxtrade.history.RecordEveryN(2),
+    )
+    backtest = Backtest()
+    for day in range(1, 6):
+        backtest.load_event(AssetPriceEvent(stock, datetime(2020, 9, day), 1))
+
+    class BuyStrategy(Strategy):
+        def generate_trades(self):
+            return pxtrade.Trade(portfolio, stock, 1)
+
+    snapshot = backtest.snapshot()
+    results = list()
+    for _ in range(3):
+        snapshot.clone(BuyStrategy()).run()
+        days = [date_time.day for date_time in history.get().index]
+        results.append((days, len(history.get_holdings())))
+    assert results == [([1, 3, 5], 6)] * 3
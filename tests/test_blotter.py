@@ -0,0 +1,86 @@
+from datetime import datetime
+import pytest
+import numpy as np
+import pandas as pd
+from pxtrade import Backtest, Broker, Strategy
+from pxtrade.assets import reset, Cash, Stock, Portfolio
+from pxtrade.blotter import Blotter
+from pxtrade.broker import FixedRatePlusPercentage, FillAtLastWithSlippage
+from pxtrade.compliance import Compliance, UnitLimit
+from pxtrade.events import AssetPriceEvent
+from pxtrade.trade import Trade, LimitOrder
+
+
+def make_backtest(**kwargs):
+    reset()
+    portfolio = Portfolio("AUD", code="Blotter")
+    portfolio.transfer(Cash("AUD"), 1000)
+    portfolio.broker = Broker(
+        charges_strategy=FixedRatePlusPercentage(5, 0, currency_code="AUD"),
+        execution_strategy=FillAtLastWithSlippage(0.01),
+    )
+    stock = Stock("BLT AU", currency_code="AUD")
+    compliance = Compliance()
+    compliance.add_rule(UnitLimit(stock, 15))
+    portfolio.compliance = compliance
+
+    class BuyStrategy(Strategy):
+        def generate_trades(self):
+            return [
+                Trade(portfolio, stock, 10),
+                LimitOrder(portfolio, stock, 5, 9.0),
+            ]
+
+    backtest = Backtest(BuyStrategy(), **kwargs)
+    for day, price in enumerate([10.0, 8.0]):
+        backtest.load_event(
+            AssetPriceEvent(stock, datetime(2020, 9, day + 1), price)
+        )
+    backtest.run()
+    return backtest
+
+
+def test_blotter_empty():
+    blotter = Blotter()
+    assert len(blotter) == 0
+    frame = blotter.to_frame()
+    assert len(frame) == 0
+    assert list(frame.columns)[:3] == ["datetime", "portfolio", "asset"]
+    with pytest.raises(ValueError):
+        blotter.get_column("xxx")
+
+
+@pytest.mark.parametrize("batch_trades", [False, True])
+def test_backtest_blotter(batch_trades):
+    blotter = make_backtest(batch_trades=batch_trades).blotter
+    assert len(blotter) == 3
+    frame = blotter.to_frame()
+    # the limit order fills at 8.0 before the second trade is rejected
+    assert list(frame["datetime"]) == [
+        pd.Timestamp(2020, 9, 1),
+        pd.Timestamp(2020, 9, 2),
+        pd.Timestamp(2020, 9, 2),
+    ]
+    assert list(frame["units"]) == [10, 5, 10]
+    assert list(frame["passed_compliance"]) == [True, True, False]
+    assert list(frame["asset"]) == ["BLT AU"] * 3
+    assert list(frame["portfolio"]) == ["Blotter"] * 3
+    assert frame["price"].tolist()[:2] == pytest.approx([10.1, 8.08])
+    assert np.isnan(frame["price"].iloc[2])
+    assert frame["charges"].tolist()[:2] == [5, 5]
+    assert list(frame["charges_currency"])[:2] == ["AUD", "AUD"]
+    assert frame["slippage"].tolist()[:2] == pytest.approx([1.0, 0.4])
+
+    # vectorised queries straight from the columns
+    passed = blotter.get_column("passed_compliance")
+    assert blotter.get_column("charges")[passed].sum() == 10
+    assert blotter.codes[blotter.get_column("asset")[0]] == "BLT AU"
+
+
+def test_blotter_to_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    blotter = make_backtest().blotter
+    path = tmp_path / "blotter.parquet"
+    blotter.to_parquet(path)
+    frame = pd.read_parquet(path)
+    assert len(frame) == 3
@@ -8,6 +8,9 @@ from pxtrade.assets import (
     Portfolio,
 )
 from pxtrade.broker import (
+    Fill,
+    FillAtLast,
+    NoCharges,
     AbstractExecution,
     AbstractCharges,
     FillAtLastWithSlippage,
@@ -141,3 +144,85 @@ class TestBroker(object):
             FillAtLastWithSlippage("0.01")
         with pytest.raises(ValueError):
             FillAtLastWithSlippage(-0.01)
+
+    def test_fill_record(self):
+        portfolio = self.portfolio
+        assert self.buy_trade.fill is None
+        charges_strategy = FixedRatePlusPercentage(
+            20, 0.01, currency_code="AUD"
+        )
+        broker = Broker(
+            charges_strategy=charges_strategy,
+            execution_strategy=FillAtLastWithSlippage(0.01),
+        )
+        revaluations = list()
+        revalue = portfolio._revalue
+
+        def counting_revalue():
+            revaluations.append(1)
+            revalue()
+
+        portfolio._revalue = counting_revalue
+        broker.execute(self.buy_trade)
+        assert len(revaluations) == 1  # charges and trade posted together
+        fill = self.buy_trade.fill
+        assert isinstance(fill, Fill)
+        assert fill.units == 100
+        assert fill.consideration == -250 * 1.01
+        assert fill.price == 2.50 * 1.01
+        assert fill.charges == 20 + 2.50
+        assert fill.charges_currency_code == "AUD"
+        assert portfolio.get_holding_units("AUD") == 1000 - 252.5 - 22.5
+
+    def test_custom_strategies(self):
+        """ Strategies without calculate or get_consideration. """
+
+        class HalfPriceExecution(AbstractExecution):
+            def execute(self, trade):
+                consideration = trade.asset.local_value * -trade.units / 2
+                trade.portfolio.trade(trade.asset, trade.units, consideration)
+
+        class FlatCharges(AbstractCharges):
+            def charge(self, trade):
+                trade.portfolio.transfer(self.aud, -10)
+
+        FlatCharges.aud = self.aud
+        assert NoCharges().calculate(self.buy_trade) == (None, 0.0)
+        assert FillAtLast().get_consideration(self.buy_trade) == -250
+        broker = Broker(
+            execution_strategy=HalfPriceExecution(),
+            charges_strategy=FlatCharges(),
+        )
+        broker.execute(self.buy_trade)
+        assert self.portfolio.get_holding_units("AUD") == 1000 - 125 - 10
+        assert self.buy_trade.fill.charges is None
+        assert self.buy_trade.fill.price is None
+
+    def test_subclassed_strategies(self):
+        """ Overriding execute or charge in a subclass still applies. """
+
+        class HalfPriceFill(FillAtLast):
+            def execute(self, trade):
+                consideration = trade.asset.local_value * -trade.units / 2
+                trade.portfolio.trade(trade.asset, trade.units, consideration)
+
+        class FlatPlusPercentage(FixedRatePlusPercentage):
+            def charge(self, trade):
+                trade.portfolio.transfer(self.aud, -10)
+
+        FlatPlusPercentage.aud = self.aud
+        broker = Broker(
+            execution_strategy=HalfPriceFill(),
+            charges_strategy=FlatPlusPercentage(5, 0.01, currency_code="AUD"),
+        )
+        broker.execute(self.buy_trade)
+        assert self.portfolio.get_holding_units("TEST AU") == 100
+        assert self.portfolio.get_holding_units("AUD") == 1000 - 125 - 10
+
+        # subclasses that don't override keep the single posting
+        class NamedFill(FillAtLast):
+            pass
+
+        broker = Broker(execution_strategy=NamedFill())
+        broker.execute(self.sell_trade)
+        assert self.sell_trade.fill.price == 2.50
@@ -0,0 +1,192 @@
+from datetime import datetime
+import pytest
+import pandas as pd
+import pxtrade
+from pxtrade.assets import reset, Stock, Cash, FxRate, Portfolio
+from pxtrade.backtest import Backtest
+from pxtrade.strategy import Strategy
+from pxtrade.history import History
+from pxtrade.events import AssetPriceEvent, FxRateEvent, load_frame_events
+from pxtrade.checkpoint import (
+    get_checkpoint,
+    restore_checkpoint,
+    save_checkpoint,
+    load_checkpoint,
+)
+
+
+PRICES = pd.DataFrame(
+    {"price": [2.50, 2.60, 2.70, 2.80]},
+    index=pd.to_datetime(
+        ["2020-09-01", "2020-09-02", "2020-09-03", "2020-09-04"]
+    ),
+)
+
+
+class BuyOneStrategy(Strategy):
+    def __init__(self, portfolio):
+        self.portfolio = portfolio
+
+    def generate_trades(self):
+        return pxtrade.Trade(self.portfolio, "CHK AU", 1)
+
+
+def make_backtest():
+    """ Create the objects we need for each daily session. """
+    reset()
+    aud = Cash("AUD")
+    stock = Stock("CHK AU", currency_code="AUD")
+    portfolio = Portfolio("AUD")
+    backtest = Backtest(BuyOneStrategy(portfolio))
+    history = History(portfolio, backtest=backtest)
+    return aud, stock, portfolio, backtest, history
+
+
+def test_resume_from_checkpoint(tmp_path):
+    aud, stock, portfolio, backtest, history = make_backtest()
+    portfolio.transfer(aud, 100)
+    load_frame_events(
+        stock,
+        PRICES.iloc[:2],
+        "price",
+        backtest=backtest,
+        event_class=AssetPriceEvent,
+    )
+    backtest.run()
+    assert backtest.resume_datetime == datetime(2020, 9, 2)
+    path = tmp_path / "checkpoint.pkl"
+    save_checkpoint(backtest, path)
+
+    # a new session with all data loaded
+    aud, stock, portfolio, backtest, history = make_backtest()
+    load_checkpoint(backtest, path)
+    assert portfolio.get_holding_units("CHK AU") == 2
+    assert stock.price == 2.60
+    assert round(portfolio.value, 2) == 100.10  # 2 shares bought at 2.50
+    events_loaded = load_frame_events(
+        stock,
+        PRICES,
+        "price",
+        backtest=backtest,
+        event_class=AssetPriceEvent,
+    )
+    assert events_loaded == 2  # only the new events are loaded
+    backtest.run()
+
+    assert portfolio.get_holding_units("CHK AU") == 4
+    assert round(portfolio.get_holding_units("AUD"), 2) == round(
+        100 - (2.50 + 2.60 + 2.70 + 2.80), 2
+    )
+    df = history.get()
+    assert len(df.index) == 4
+    assert df.at[pd.Timestamp(2020, 9, 4), "CHK AU"] == 2.80
+
+
+def test_rerun_in_process():
+    aud, stock, portfolio, backtest, history = make_backtest()
+    backtest.load_event(AssetPriceEvent(stock, datetime(2020, 9, 1), 2.50))
+    backtest.run()
+    assert portfolio.get_holding_units("CHK AU") == 1
+
+    # running again without new events does nothing
+    backtest.run()
+    assert portfolio.get_holding_units("CHK AU") == 1
+    assert len(history.get().index) == 1
+
+    # old events are skipped, new events are processed
+    old_event = AssetPriceEvent(stock, datetime(2020, 9, 1), 2.50)
+    new_event = AssetPriceEvent(stock, datetime(2020, 9, 2), 2.60)
+    assert backtest.load_event(old_event) is False
+    assert backtest.load_event(new_event) is True
+    backtest.run()
+    assert portfolio.get_holding_units("CHK AU") == 2
+    assert len(history.get().index) == 2
+
+
+def test_checkpoint_fx_and_indicators():
+    reset()
+    audusd = FxRate("AUDUSD")
+    backtest = Backtest()
+    backtest.load_event(FxRateEvent(audusd, datetime(2020, 9, 1), 0.7))
+    backtest.run()
+    backtest.set_indicator("VIX", 25)
+    checkpoint = get_checkpoint(backtest)
+    assert checkpoint["fx_rates"] == {"AUDUSD": 0.7}
+
+    reset()
+    audusd = FxRate("AUDUSD")
+    backtest = Backtest()
+    restore_checkpoint(backtest, checkpoint)
+    assert audusd.rate == 0.7
+    assert backtest.get_indicator("VIX") == 25
+    assert backtest.datetime == datetime(2020, 9, 1)
+
+
+def test_checkpoint_types():
+    with pytest.raises(TypeError):
+        get_checkpoint(None)
+    with pytest.raises(TypeError):
+        restore_checkpoint(None, {})
+    with pytest.raises(TypeError):
+        restore_checkpoint(Backtest(), None)
+
+    reset()
+    stock = Stock("CHK US")
+    backtest = Backtest()
+    backtest.load_event(AssetPriceEvent(stock, datetime(2020, 9, 1), 2.50))
+    with pytest.raises(ValueError):
+        # restore state before loading events
+        restore_checkpoint(backtest, get_checkpoint(backtest))
+
+
+def make_histories(portfolio, backtest):
+    return [
+        History(portfolio, backtest=backtest),
+        History(portfolio, backtest=backtest, include=["portfolios"]),
+        History(portfolio, backtest=backtest, sparse_holdings=True),
+    ]
+
+
+def test_checkpoint_histories():
+    aud, stock, portfolio, backtest, history = make_backtest()
+    del history
+    portfolio.transfer(aud, 100)
+    histories = make_histories(portfolio, backtest)
+    backtest.load_event(AssetPriceEvent(stock, datetime(2020, 9, 1), 2.50))
+    backtest.run()
+    expected = [history.get() for history in histories]
+    expected_holdings = histories[2].get_holdings()
+    checkpoint = get_checkpoint(backtest)
+
+    aud, stock, portfolio, backtest, history = make_backtest()
+    del history
+    histories = make_histories(portfolio, backtest)
+    restore_checkpoint(backtest, checkpoint)
+    for history, df in zip(histories, expected):
+        pd.testing.assert_frame_equal(history.get(), df)
+    pd.testing.assert_frame_equal(
+        histories[2].get_holdings(), expected_holdings
+    )
+
+    # the same portfolios and groups need a name to tell them apart
+    duplicate = History(portfolio, backtest=backtest)
+    with pytest.raises(ValueError):
+        get_checkpoint(backtest)
+    named = History(portfolio, backtest=backtest, name="named")
+    checkpoint = get_checkpoint(backtest, histories=[duplicate, named])
+    assert set(checkpoint["history"]) == {
+        ((portfolio.code,), tuple(sorted(pxtrade.history.GROUPS)), False),
+        "named",
+    }
+    with pytest.raises(TypeError):
+        get_checkpoint(backtest, histories=["history"])
+    with pytest.raises(TypeError):
+        History(portfolio, name=1)
+
+
+def test_checkpoint_open_orders():
+    aud, stock, portfolio, backtest, history = make_backtest()
+    stock.price = 10.0
+    backtest.order_book.add(pxtrade.trade.LimitOrder(portfolio, stock, 5, 1.0))
+    with pytest.raises(ValueError):
+        get_checkpoint(backtest)
@@ -1,4 +1,6 @@
 import pytest
+from pxtrade.assets import reset
+from pxtrade.assets import codes as codes_module
 from pxtrade.assets.codes import (
     check_code,
     check_currency_code,
@@ -15,6 +17,21 @@ def test_check_code():
     assert check_code(" aapl ") == "AAPL"
     with pytest.raises(TypeError):
         check_code(123)
+    with pytest.raises(TypeError):
+        check_code(123)  # not cached
+    # codes are interned once checked
+    assert check_code(" msft ") is check_code("MSFT".lower() + " ")
+    with pytest.raises(ValueError):
+        check_code("  ")
+    assert "  " not in codes_module._checked_codes  # only valid codes
+
+
+def test_reset_clears_checked_codes():
+    check_code(" rst ")
+    assert " rst " in codes_module._checked_codes
+    reset()
+    assert len(codes_module._checked_codes) == 0
+    assert check_code(" rst ") == "RST"
 
 
 def test_check_currency_code():
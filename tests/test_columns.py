@@ -0,0 +1,18 @@
+import pytest
+import numpy as np
+from pxtrade.columns import GrowableColumn
+
+
+def test_growable_column():
+    with pytest.raises(ValueError):
+        GrowableColumn(np.float64, capacity=0)
+    column = GrowableColumn(np.int64, capacity=2)
+    assert column.dtype == np.int64
+    assert len(column) == 0
+    for value in range(5):
+        column.append(value)
+    column.extend([5, 6, 7, 8, 9, 10])
+    assert len(column) == 11
+    assert list(column.values) == list(range(11))
+    with pytest.raises(ValueError):
+        column.values[0] = 1  # read only
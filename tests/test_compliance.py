@@ -1,9 +1,13 @@
 import pytest
+import numpy as np
+import pandas as pd
 from pxtrade.assets import reset, Stock, Portfolio
+from pxtrade.trade import Trade, trade_pipeline
 from pxtrade.compliance import (
     Compliance,
     UnitLimit,
     WeightLimit,
+    VectorLimits,
 )
 
 
@@ -78,3 +82,99 @@ class TestCompliance(object):
     def test_weight_limit_str(self):
         rule = WeightLimit(self.stock2, 0.50)
         assert str(rule) == "WeightLimit('CCC US', 0.50)"
+
+    def test_rules_by_asset(self):
+        compliance = self.compliance
+        portfolio = self.portfolio
+        stock1_rule = UnitLimit(self.stock1, 100)  # currently breached
+        weight_rule = WeightLimit(self.stock2, 0.6)
+        assert stock1_rule.assets == (self.stock1,)
+        assert weight_rule.assets is None  # portfolio wide
+        compliance.add_rule(stock1_rule).add_rule(weight_rule)
+        compliance.add_rule(stock1_rule)
+        assert len(compliance) == 2
+
+        assert not compliance.passes(portfolio)
+        assert not compliance.passes(portfolio, ["BBB US"])
+        assert compliance.passes(portfolio, ["CCC US", "USD"])
+        with pytest.raises(TypeError):
+            compliance.passes(portfolio, [self.stock2])
+
+        compliance.remove_rule(stock1_rule)
+        assert compliance.passes(portfolio, ["BBB US"])
+        assert len(compliance._rules_by_code) == 0
+
+    def test_vector_limits(self):
+        with pytest.raises(TypeError):
+            VectorLimits(["BBB US"], unit_limits=[100])
+        with pytest.raises(TypeError):
+            VectorLimits([self.stock1], unit_limits=["abc"])
+        with pytest.raises(ValueError):
+            VectorLimits([self.stock1], unit_limits=[100, 200])
+
+        portfolio = self.portfolio
+        stock3 = Stock("FFF US", 2.00, currency_code="USD")  # not held
+        assets = [self.stock1, self.stock2, stock3]
+        rule = VectorLimits(assets, unit_limits=[200, 100, np.nan])
+        assert rule.assets == tuple(assets)
+        assert len(rule) == 3
+        assert str(rule) == "VectorLimits(3 assets)"
+        assert rule.breaches(portfolio) == ["CCC US"]
+
+        rule = VectorLimits(assets, weight_limits=[0.4, 0.6, 0.1])
+        assert rule.assets is None
+        assert rule.breaches(portfolio) == ["BBB US"]
+        assert not rule.passes(portfolio)
+
+        portfolio.transfer(stock3, 100)
+        rule = VectorLimits(
+            assets, unit_limits=[200, 200, 50], weight_limits=[0.5] * 3
+        )
+        assert rule.breaches(portfolio) == ["FFF US"]
+        compliance = self.compliance
+        compliance.add_rule(rule)
+        assert not compliance.passes(portfolio)
+
+    def test_vector_limits_from_frame(self):
+        frame = pd.DataFrame(
+            {"unit_limit": [300, 100], "weight_limit": [0.9, 0.9]},
+            index=["BBB US", "CCC US"],
+        )
+        rule = VectorLimits.from_frame(frame)
+        assert rule.breaches(self.portfolio) == ["CCC US"]
+        with pytest.raises(TypeError):
+            VectorLimits.from_frame(frame.values)
+        with pytest.raises(ValueError):
+            VectorLimits.from_frame(frame.rename(index={"BBB US": "XXX"}))
+
+
+def test_compliance_pipeline_checks_traded_assets():
+    reset()
+    stock1 = Stock("DDD US", 2.00, currency_code="USD")
+    stock2 = Stock("EEE US", 2.00, currency_code="USD")
+    portfolio = Portfolio("USD")
+    portfolio.transfer(stock1, 200)
+
+    checked = list()
+
+    class RecordingLimit(UnitLimit):
+        def passes(self, portfolio):
+            checked.append(self._asset.code)
+            return super().passes(portfolio)
+
+    compliance = Compliance()
+    compliance.add_rule(RecordingLimit(stock1, 100))  # breached
+    compliance.add_rule(RecordingLimit(stock2, 100))
+    portfolio.compliance = compliance
+
+    trade = Trade(portfolio, stock2, 50)
+    trade_pipeline.run(trade)
+    assert trade.passed_compliance
+    assert checked == ["EEE US"]
+    assert portfolio.get_holding_units("EEE US") == 50
+
+    checked.clear()
+    trade = Trade(portfolio, stock2, 51)
+    trade_pipeline.run(trade)
+    assert not trade.passed_compliance
+    assert portfolio.get_holding_units("EEE US") == 50
@@ -27,6 +27,8 @@ def test_asset_price_event():
         AssetPriceEvent(stock, dt, "2.60")
     with pytest.raises(ValueError):
         AssetPriceEvent(stock, dt, -2.0)  # must be positive
+    with pytest.raises(TypeError):
+        AssetPriceEvent("XYZ AU", dt, 2.60)
 
     # is immutable
     with pytest.raises(AttributeError):
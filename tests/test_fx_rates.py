@@ -1,5 +1,12 @@
+import gc
 import pytest
-from pxtrade.assets.fx_rates import FxRate, validate_pair
+from pxtrade.assets.fx_rates import (
+    FxRate,
+    CurrencyPair,
+    fx_matrix,
+    get_pair,
+    validate_pair,
+)
 
 
 def test_validate_pair():
@@ -120,3 +127,80 @@ def test_inverse_pair_creation():
 
     with pytest.raises(ValueError):
         FxRate("USDAUD", 2.0)
+
+
+def test_cross_rates():
+    FxRate.reset()
+    audusd = FxRate("AUDUSD", 0.5)
+    usdjpy = FxRate("USDJPY", 100.0)
+    with pytest.raises(ValueError):
+        FxRate.get("AUDGBP")  # no common currency
+
+    assert FxRate.get("AUDJPY") == 50.0
+    assert FxRate.get("JPYAUD") == 1 / 50.0
+    assert FxRate.get_observable_instances("AUDJPY") == [audusd, usdjpy]
+    assert FxRate.get_observable_instances("USDAUD") == [audusd]
+    with pytest.raises(ValueError):
+        FxRate.get_observable_instances("AUDGBP")
+
+    # the cached cross rate changes with either leg
+    audusd.rate = 0.6
+    assert FxRate.get("AUDJPY") == 60.0
+    usdjpy.rate = 110.0
+    assert FxRate.get("AUDJPY") == pytest.approx(66.0)
+    usdjpy.rate = None
+    with pytest.raises(ValueError):
+        FxRate.get("AUDJPY")
+
+
+def test_fx_matrix():
+    FxRate.reset()
+    audusd = FxRate("AUDUSD", 0.5)
+    aud = fx_matrix.get_index("AUD")
+    usd = fx_matrix.get_index("USD")
+    assert fx_matrix.get_currency(aud) == "AUD"
+    assert fx_matrix.rate(aud, usd) == 0.5
+    assert fx_matrix.rate(usd, aud) == 2.0
+    assert fx_matrix.rate(aud, aud) == 1.0
+
+    rates = fx_matrix.rates
+    assert rates[aud, usd] == 0.5
+    with pytest.raises(ValueError):
+        rates[aud, usd] = 0.6  # read only
+
+    # rates are removed along with the instance
+    del audusd
+    gc.collect()
+    with pytest.raises(ValueError):
+        FxRate.get("AUDUSD")
+    assert fx_matrix.get_index("AUD") == aud  # indices are kept
+
+
+def test_get_pair():
+    pair = get_pair(" audusd ")
+    assert isinstance(pair, CurrencyPair)
+    assert get_pair("AUDUSD") is pair
+    assert get_pair(pair) is pair
+    assert pair.pair == "AUDUSD"
+    assert str(pair) == "AUDUSD"
+    assert (pair.ccy1, pair.ccy2) == ("AUD", "USD")
+    assert pair.is_equivalent is False
+    assert pair.inverse is get_pair("USDAUD")
+    assert pair.inverse.inverse is pair
+    assert get_pair("AUDAUD").is_equivalent is True
+    assert get_pair("AUDAUD").inverse is get_pair("AUDAUD")
+
+    with pytest.raises(AttributeError):
+        pair.pair = "USDAUD"  # immutable
+    with pytest.raises(TypeError):
+        get_pair(123)
+    with pytest.raises(ValueError):
+        get_pair("AUDUS")
+
+    FxRate.reset()  # clears cached pairs
+    audusd = FxRate("AUDUSD", 0.5)
+    assert audusd.currency_pair is not pair
+    assert audusd.currency_pair.indices == pair.indices
+    # pairs from before the reset can still be used
+    assert FxRate.get(pair) == 0.5
+    assert FxRate.get(pair.inverse) == 2.0
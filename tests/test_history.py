@@ -1,8 +1,19 @@
 from datetime import datetime
 import pytest
+import numpy as np
 import pandas as pd
 from pxtrade.assets import reset, Stock, Cash, Portfolio
-from pxtrade.history import History
+from pxtrade import Backtest
+from pxtrade.events import AssetPriceEvent
+from pxtrade.live import replay
+from pxtrade.history import (
+    History,
+    FrameStore,
+    DeltaStore,
+    RecordEveryN,
+    RecordOnFrequency,
+    RecordOnChange,
+)
 
 
 class TestHistory(object):
@@ -85,3 +96,247 @@ class TestHistory(object):
         # snapshots require a datetime object
         with pytest.raises(TypeError):
             self.history.take_snapshot(None)
+
+
+def test_policy_types():
+    reset()
+    portfolio = Portfolio("AUD")
+    with pytest.raises(TypeError):
+        History(portfolio, policy="D")
+    with pytest.raises(TypeError):
+        RecordEveryN("2")
+    with pytest.raises(ValueError):
+        RecordEveryN(0)
+    with pytest.raises(ValueError):
+        RecordOnFrequency("XYZ")
+    with pytest.raises(TypeError):
+        RecordOnChange("0.1")
+    with pytest.raises(ValueError):
+        RecordOnChange(-0.1)
+
+
+def run_tick_backtest(policy):
+    reset()
+    portfolio = Portfolio("AUD")
+    stock = Stock("TICK", 10.0, currency_code="AUD")
+    portfolio.transfer(stock, 100)
+    backtest = Backtest()
+    history = History(portfolio, policy=policy)
+    datetimes = pd.date_range("2020-09-01 09:00", periods=48, freq="15min")
+    for i, dt in enumerate(datetimes):
+        price = 10.0 + (i % 8) / 100  # up to 0.7% above 10
+        backtest.load_event(AssetPriceEvent(stock, dt, price))
+    backtest.run()
+    return history.get()
+
+
+def test_record_every_n():
+    df = run_tick_backtest(RecordEveryN(10))
+    assert len(df) == 5
+    assert df.index[1] == pd.Timestamp("2020-09-01 11:30")
+
+
+def test_record_on_frequency():
+    df = run_tick_backtest(RecordOnFrequency("H"))
+    assert len(df) == 12
+    # the last value in each hour
+    assert df.index[0] == pd.Timestamp("2020-09-01 09:45")
+    assert df["TICK"].iloc[0] == 10.03
+    assert df.index[-1] == pd.Timestamp("2020-09-01 20:45")
+
+    df = run_tick_backtest(RecordOnFrequency("D"))
+    assert list(df.index) == [pd.Timestamp("2020-09-01 20:45")]
+
+
+def test_record_on_frequency_live():
+    reset()
+    portfolio = Portfolio("AUD")
+    stock = Stock("LTCK", 10.0, currency_code="AUD")
+    portfolio.transfer(stock, 100)
+    backtest = Backtest()
+    history = History(portfolio, policy=RecordOnFrequency("D"))
+    datetimes = pd.date_range("2020-09-01 20:00", periods=12, freq="H")
+    events = [
+        AssetPriceEvent(stock, dt, 10.0 + i)
+        for i, dt in enumerate(datetimes)
+    ]
+    # the queue is empty between feed items, so the end of
+    # each day is only known once the next day starts
+    backtest.run_live(replay(events))
+    df = history.get()
+    assert list(df.index) == [
+        pd.Timestamp("2020-09-01 23:00"),
+        pd.Timestamp("2020-09-02 07:00"),
+    ]
+    assert list(df["LTCK"]) == [13, 21]
+
+    # snapshots are buffered until the period closes or we flush
+    history = History(portfolio, policy=RecordOnFrequency("D"))
+    assert history.take_snapshot(datetime(2020, 9, 3, 9))
+    assert history.take_snapshot(datetime(2020, 9, 3, 10))
+    assert len(history.get()) == 0
+    history.take_snapshot(datetime(2020, 9, 4, 9))
+    assert list(history.get().index) == [pd.Timestamp("2020-09-03 10:00")]
+    history.flush()
+    assert len(history.get()) == 2
+
+
+def test_record_on_change():
+    df = run_tick_backtest(RecordOnChange(0.0045))
+    # moves of less than 0.45% from the last recorded value are skipped
+    values = list(df["Portfolio"].iloc[:3])
+    assert values == pytest.approx([1000, 1005, 1000])
+    assert len(df) == 12
+
+
+def test_history_groups():
+    reset()
+    portfolio = Portfolio("AUD")
+    aud = Cash("AUD")
+    portfolio.transfer(aud, 1000)
+    stock = Stock("GRP1", 1.0, currency_code="AUD")
+    with pytest.raises(TypeError):
+        History(portfolio, include="assets")
+    with pytest.raises(ValueError):
+        History(portfolio, exclude=["prices"])
+    with pytest.raises(TypeError):
+        History(portfolio, sparse_holdings=1)
+
+    date_time = datetime(2020, 9, 1)
+    history = History(portfolio, include=["portfolios", "holdings"])
+    history.take_snapshot(date_time)
+    assert list(history.get().columns) == [
+        "Portfolio",
+        "Portfolio_AUD",
+        "Portfolio_GRP1",
+    ]
+
+    history = History(portfolio, exclude=["holdings", "assets"])
+    history.take_snapshot(date_time)
+    assert list(history.get().columns) == ["Portfolio"]
+    with pytest.raises(ValueError):
+        history.get_holdings()
+    assert stock.code == "GRP1"
+
+
+def test_sparse_holdings():
+    reset()
+    portfolio1 = Portfolio("AUD", code="Portfolio")
+    portfolio2 = Portfolio("AUD", code="Benchmark")
+    cash = Cash("AUD")
+    stock = Stock("SPR", 2.0, currency_code="AUD")
+    for code in ("SPR1", "SPR2", "SPR3"):
+        Stock(code, 1.0, currency_code="AUD")  # never held
+    portfolio1.transfer(cash, 1000)
+    portfolio2.transfer(stock, 10)
+    history = History(
+        [portfolio1, portfolio2], exclude=["assets"], sparse_holdings=True
+    )
+    history.take_snapshot(datetime(2020, 9, 1))
+    portfolio1.trade(stock, 100)
+    history.take_snapshot(datetime(2020, 9, 2))
+
+    assert list(history.get().columns) == ["Portfolio", "Benchmark"]
+    holdings = history.get_holdings()
+    columns = ["datetime", "portfolio", "asset", "units"]
+    assert list(holdings.columns) == columns
+    rows = [tuple(row) for row in holdings.itertuples(index=False)]
+    assert rows == [
+        (pd.Timestamp(2020, 9, 1), "Portfolio", "AUD", 1000),
+        (pd.Timestamp(2020, 9, 1), "Benchmark", "SPR", 10),
+        (pd.Timestamp(2020, 9, 2), "Portfolio", "AUD", 800),
+        (pd.Timestamp(2020, 9, 2), "Portfolio", "SPR", 100),
+        (pd.Timestamp(2020, 9, 2), "Benchmark", "SPR", 10),
+    ]
+
+
+def test_delta_store():
+    store = DeltaStore()
+    assert len(store.get()) == 0
+    datetimes = pd.date_range("2020-09-01", periods=5)
+    snapshots = [
+        {"A": 1.0, "B": 10.0},
+        {"A": 1.0, "B": 10.0},
+        {"A": 2.0, "B": 10.0, "C": "x"},
+        {"A": 2.0, "C": "y"},
+        {"A": np.nan, "B": 11.0, "C": "y"},
+    ]
+    frame_store = FrameStore()
+    for date_time, snapshot in zip(datetimes, snapshots):
+        store.append(date_time, snapshot)
+        frame_store.append(date_time, snapshot)
+    # A: 1, 2, NaN; B: 10, NaN, 11; C: x, y
+    assert store.num_values == 8
+    pd.testing.assert_frame_equal(
+        store.get(), frame_store.get(), check_dtype=False, check_freq=False
+    )
+    assert list(store.get_values("A")[:3]) == [1, 1, 2]
+    with pytest.raises(ValueError):
+        store.get_values("D")
+    assert list(store.get_datetimes()) == list(datetimes.values)
+
+
+def test_history_delta_store():
+    reset()
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    stock = Stock("DLT", 1.0, currency_code="AUD")
+    with pytest.raises(TypeError):
+        History(portfolio, store="delta")
+    store = DeltaStore()
+    history = History(portfolio, store=store)
+    frame_history = History(portfolio)
+    for day in range(1, 11):
+        date_time = datetime(2020, 9, day)
+        if day % 5 == 0:
+            stock.price = day
+        history.take_snapshot(date_time)
+        frame_history.take_snapshot(date_time)
+    df = history.get()
+    pd.testing.assert_frame_equal(df, frame_history.get(), check_dtype=False)
+    assert list(df["DLT"]) == [1] * 4 + [5] * 5 + [10]
+    assert store.num_values == len(df.columns) + 2
+
+
+def test_history_get_cached():
+    reset()
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    stock = Stock("CCH", 1, currency_code="AUD")
+    history = History(portfolio)
+    assert len(history.get()) == 0
+    history.take_snapshot(datetime(2020, 9, 1))
+    stock.price = 2
+    history.take_snapshot(datetime(2020, 9, 2))
+
+    df = history.get()
+    assert all(dtype == np.float64 for dtype in df.dtypes)
+    view = history.get(copy=False)
+    assert history.get(copy=False) is view  # cached
+    assert df is not view
+    pd.testing.assert_frame_equal(df, view)
+    with pytest.raises(ValueError):
+        view.iloc[0, 0] = 10.0  # read only
+    df.iloc[0, 0] = 10.0  # copies can be modified
+    with pytest.raises(TypeError):
+        history.get(copy="no")
+
+    # a new snapshot rebuilds the frame
+    history.take_snapshot(datetime(2020, 9, 3))
+    assert history.get(copy=False) is not view
+    assert len(history.get(copy=False)) == 3
+
+
+def test_history_get_non_numeric():
+    history = History([])
+    history._restore(
+        pd.DataFrame(
+            {"A": [1, 2], "Signal": ["buy", "sell"], "B": [1.5, None]},
+            index=pd.date_range("2020-09-01", periods=2),
+        )
+    )
+    df = history.get(copy=False)
+    assert list(df.columns) == ["A", "Signal", "B"]
+    assert df["A"].dtype == np.float64
+    assert list(df["Signal"]) == ["buy", "sell"]
+    assert np.isnan(df["B"].iloc[1])
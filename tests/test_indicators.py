@@ -0,0 +1,144 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pxtrade.backtest import Backtest
+from pxtrade import indicators
+from pxtrade.indicators import (
+    compute,
+    clear_cache,
+    get_cache_size,
+    set_cache_size,
+    fingerprint,
+    load_indicator,
+)
+
+
+@pytest.fixture
+def prices():
+    np.random.seed(1)
+    index = pd.bdate_range("2020-01-01", periods=300)
+    values = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, len(index))))
+    return pd.Series(values, index=index)
+
+
+def test_moving_averages(prices):
+    result = compute("sma", prices, window=20)
+    assert result.isna().sum() == 19
+    assert result.iloc[-1] == pytest.approx(prices.iloc[-20:].mean())
+
+    result = compute("ema", prices, span=10)
+    assert result.isna().sum() == 9
+    expected = prices.ewm(span=10, adjust=False).mean()
+    assert result.iloc[-1] == pytest.approx(expected.iloc[-1])
+
+
+def test_rsi(prices):
+    result = compute("rsi", prices, window=14).dropna()
+    assert len(result) == len(prices) - 14
+    assert ((result >= 0) & (result <= 100)).all()
+
+    rising = pd.Series(np.arange(1.0, 31.0), index=prices.index[:30])
+    assert compute("rsi", rising).iloc[-1] == 100
+
+
+def test_volatility_and_zscore(prices):
+    returns = prices.pct_change()
+    result = compute("volatility", prices, window=20)
+    assert result.iloc[-1] == pytest.approx(returns.iloc[-20:].std())
+    result = compute("volatility", prices, window=20, periods_per_year=252)
+    assert result.iloc[-1] == pytest.approx(
+        returns.iloc[-20:].std() * np.sqrt(252)
+    )
+
+    result = compute("zscore", prices, window=20)
+    window = prices.iloc[-20:]
+    expected = (window.iloc[-1] - window.mean()) / window.std()
+    assert result.iloc[-1] == pytest.approx(expected)
+
+
+def test_crossover():
+    values = [1, 2, 3, 4, 3, 2, 1, 2, 3]
+    series = pd.Series(
+        values, index=pd.bdate_range("2020-01-01", periods=len(values))
+    )
+    result = compute("crossover", series, fast=1, slow=3)
+    assert list(result.fillna(99)) == [99, 99, 99, 0, -1, 0, 0, 1, 0]
+
+
+def test_cache(prices, monkeypatch):
+    clear_cache()
+    calls = list()
+
+    def counting_sma(series, window):
+        calls.append(window)
+        return series.rolling(window).mean()
+
+    monkeypatch.setitem(indicators.INDICATORS, "sma", counting_sma)
+    first = compute("sma", prices, window=50)
+    second = compute("sma", prices.copy(), window=50)
+    assert first is second
+    assert calls == [50]
+
+    compute("sma", prices, window=20)
+    compute("sma", prices * 2, window=50)
+    assert calls == [50, 20, 50]
+
+    assert fingerprint(prices) == fingerprint(prices.copy())
+    assert fingerprint(prices) != fingerprint(prices * 2)
+    clear_cache()
+
+
+def test_cache_size(prices, monkeypatch):
+    clear_cache()
+    calls = list()
+
+    def counting_sma(series, window):
+        calls.append(window)
+        return series.rolling(window).mean()
+
+    monkeypatch.setitem(indicators.INDICATORS, "sma", counting_sma)
+    with pytest.raises(TypeError):
+        set_cache_size(1.5)
+    with pytest.raises(ValueError):
+        set_cache_size(-1)
+    try:
+        set_cache_size(2)
+        assert get_cache_size() == 2
+        for window in (10, 20, 10, 30):
+            compute("sma", prices, window=window)
+        assert len(indicators._cache) == 2
+        compute("sma", prices, window=10)  # recently used, so kept
+        compute("sma", prices, window=20)  # evicted
+        assert calls == [10, 20, 30, 20]
+
+        set_cache_size(0)
+        assert len(indicators._cache) == 0
+        compute("sma", prices, window=10)
+        compute("sma", prices, window=10)
+        assert calls == [10, 20, 30, 20, 10, 10]
+    finally:
+        set_cache_size()
+        clear_cache()
+
+
+def test_load_indicator(prices):
+    backtest = Backtest()
+    events_loaded = load_indicator(
+        "SMA20", "sma", prices, backtest=backtest, window=20
+    )
+    assert events_loaded == len(prices) - 19
+    backtest.run()
+    expected = prices.iloc[-20:].mean()
+    assert backtest.get_indicator("SMA20") == pytest.approx(expected)
+
+
+def test_types(prices):
+    backtest = Backtest()
+    with pytest.raises(TypeError):
+        compute("sma", list(prices), window=5)
+    with pytest.raises(ValueError):
+        compute("xyz", prices)
+    with pytest.raises(TypeError):
+        load_indicator(123, "sma", prices, backtest=backtest, window=5)
+    with pytest.raises(TypeError):
+        load_indicator("SMA", "sma", prices, backtest=None, window=5)
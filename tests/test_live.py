@@ -0,0 +1,109 @@
+import asyncio
+import gc
+from datetime import datetime
+import pxtrade
+from pxtrade.assets import reset, Stock, Portfolio
+from pxtrade.backtest import Backtest
+from pxtrade.strategy import Strategy
+from pxtrade.history import History
+from pxtrade.events import AssetPriceEvent
+from pxtrade.live import (
+    TimestampClose,
+    replay,
+    replay_to_queue,
+    LatencyRecorder,
+)
+
+
+class TestLive(object):
+    def setup_method(self, *args):
+        reset()
+        portfolio = self.portfolio = Portfolio("AUD")
+        stock = self.stock = Stock("LIV AU", currency_code="AUD")
+        self.events = [
+            AssetPriceEvent(stock, datetime(2020, 9, 1), 2.50),
+            AssetPriceEvent(stock, datetime(2020, 9, 2), 2.60),
+            AssetPriceEvent(stock, datetime(2020, 9, 3), 2.70),
+        ]
+
+        class BuyOneStrategy(Strategy):
+            prices = list()
+
+            def generate_trades(self):
+                self.prices.append(stock.price)
+                return pxtrade.Trade(portfolio, stock, 1)
+
+        self.strategy = BuyOneStrategy()
+        backtest = self.backtest = Backtest(self.strategy)
+        self.history = History(portfolio, backtest=backtest)
+
+    def teardown_method(self, *args):
+        del self.portfolio
+        del self.stock
+        del self.events
+        del self.strategy
+        del self.backtest
+        del self.history
+
+    def test_timestamp_close(self):
+        close = TimestampClose(datetime(2020, 9, 1))
+        assert close.datetime == datetime(2020, 9, 1)
+        assert str(close) == "TimestampClose(2020-09-01 00:00:00)"
+
+    def test_replay(self):
+        items = list(replay(reversed(self.events)))
+        assert len(items) == 6
+        assert items[0] is self.events[0]
+        assert isinstance(items[1], TimestampClose)
+        assert items[1].datetime == datetime(2020, 9, 1)
+
+    def test_run_live(self):
+        backtest = self.backtest
+        LatencyRecorder(backtest)
+        gc.collect()
+        recorder = backtest.monitors[0]
+        backtest.run_live(replay(self.events))
+        assert self.strategy.prices == [2.50, 2.60, 2.70]
+        assert self.portfolio.get_holding_units("LIV AU") == 3
+        assert len(self.history.get().index) == 3
+
+        latency = recorder.get()
+        assert len(latency.index) == 3
+        assert (latency >= 0).all()
+        assert backtest.latency == latency.iloc[-1]
+
+    def test_watermark(self):
+        """ A later time stamp closes all earlier time stamps. """
+        backtest = self.backtest
+        processed = list()
+
+        def feed():
+            for event in self.events:
+                yield event
+                processed.append(backtest.datetime)
+
+        backtest.run_live(feed())
+        # each time stamp was processed when the next one arrived
+        assert processed == [None, datetime(2020, 9, 1), datetime(2020, 9, 2)]
+        assert self.strategy.prices == [2.50, 2.60, 2.70]
+
+    def test_late_events_skipped(self):
+        backtest = self.backtest
+        late_event = AssetPriceEvent(self.stock, datetime(2020, 9, 1), 9.99)
+        backtest.run_live(list(replay(self.events[:2])) + [late_event])
+        assert self.stock.price == 2.60
+        assert late_event.processed is False
+
+    def test_run_async(self):
+        backtest = self.backtest
+
+        async def main():
+            queue = asyncio.Queue()
+            await asyncio.gather(
+                replay_to_queue(self.events, queue),
+                backtest.run_async(queue),
+            )
+
+        asyncio.run(main())
+        assert self.strategy.prices == [2.50, 2.60, 2.70]
+        assert self.portfolio.get_holding_units("LIV AU") == 3
@@ -0,0 +1,118 @@
+from datetime import datetime
+import pytest
+import numpy as np
+from pxtrade.assets import reset, Stock
+from pxtrade.backtest import Backtest
+from pxtrade.strategy import Strategy
+from pxtrade.events import AssetPriceEvent, IndicatorEvent
+from pxtrade.lookback import RingBuffer
+
+
+def test_ring_buffer_types():
+    with pytest.raises(TypeError):
+        RingBuffer("10")
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+    buffer = RingBuffer(3)
+    with pytest.raises(TypeError):
+        buffer.view("2")
+    with pytest.raises(ValueError):
+        buffer.view(4)
+
+
+def test_ring_buffer_empty():
+    buffer = RingBuffer(3)
+    assert len(buffer) == 0
+    assert len(buffer.view()) == 0
+    assert buffer.last is None
+    assert buffer.mean is None
+    assert buffer.std is None
+    assert buffer.min is None
+    assert buffer.max is None
+
+
+def test_ring_buffer_views():
+    buffer = RingBuffer(3)
+    for value in [1, 2]:
+        buffer.append(value)
+    assert len(buffer) == 2
+    assert list(buffer.view()) == [1, 2]
+
+    for value in [3, 4, 5]:
+        buffer.append(value)
+    assert len(buffer) == 3
+    assert list(buffer.view()) == [3, 4, 5]
+    assert list(buffer.view(2)) == [4, 5]
+    assert buffer.last == 5
+
+    view = buffer.view()
+    assert view.base is buffer.view().base  # no copy
+    with pytest.raises(ValueError):
+        view[0] = 10  # read only
+
+
+def test_ring_buffer_statistics():
+    np.random.seed(0)
+    values = np.random.normal(100, 10, 1000)
+    buffer = RingBuffer(50)
+    for i, value in enumerate(values):
+        buffer.append(value)
+        start = max(0, i - 49)
+        window = values[start : i + 1]  # noqa: E203
+        assert buffer.mean == pytest.approx(window.mean())
+        assert buffer.min == window.min()
+        assert buffer.max == window.max()
+        if len(window) > 1:
+            assert buffer.std == pytest.approx(window.std(ddof=1))
+
+
+def test_ring_buffer_std_large_level():
+    np.random.seed(0)
+    values = 1e6 + np.random.normal(0, 0.01, 1000)
+    buffer = RingBuffer(200)
+    for i, value in enumerate(values):
+        buffer.append(value)
+        if i >= 199:
+            window = values[i - 199 : i + 1]  # noqa: E203
+            expected = window.std(ddof=1)
+            assert buffer.std == pytest.approx(expected, rel=1e-6)
+
+
+def test_backtest_lookback():
+    reset()
+    stock = Stock("LBK")
+    backtest = Backtest()
+    for day in range(1, 6):
+        dt = datetime(2020, 9, day)
+        backtest.load_event(AssetPriceEvent(stock, dt, day))
+        backtest.load_event(
+            IndicatorEvent("Signal", dt, day * 10, backtest=backtest)
+        )
+
+    class MovingAverageStrategy(Strategy):
+        subscriptions = [stock, "Signal"]
+        lookback = 3
+        averages = list()
+
+        def generate_trades(self):
+            prices = backtest.lookback("LBK")
+            self.averages.append(prices.mean())
+
+    strategy = MovingAverageStrategy()
+    backtest.add_strategy(strategy)
+    backtest.run()
+    assert strategy.averages == [1, 1.5, 2, 3, 4]
+    assert list(backtest.lookback("Signal", 2)) == [40, 50]
+    assert backtest.rolling("Signal").max == 50
+
+    with pytest.raises(ValueError):
+        backtest.lookback("XXX")
+    with pytest.raises(TypeError):
+        backtest.add_lookback(123, 10)
+
+    # increasing the capacity keeps existing values
+    buffer = backtest.add_lookback(stock, 10)
+    assert buffer.capacity == 10
+    assert list(backtest.lookback("LBK")) == [3, 4, 5]
+    assert backtest.add_lookback(stock, 5) is buffer
@@ -0,0 +1,137 @@
+from datetime import datetime
+import pytest
+from pxtrade import Backtest, Broker, Strategy
+from pxtrade.assets import reset, Cash, Stock, Portfolio
+from pxtrade.broker import FixedRatePlusPercentage
+from pxtrade.compliance import Compliance, UnitLimit
+from pxtrade.events import AssetPriceEvent
+from pxtrade.trade import LimitOrder, StopOrder, OrderBook
+
+
+class TestOrders(object):
+    def setup_method(self, *args):
+        reset()
+        portfolio = self.portfolio = Portfolio("AUD")
+        portfolio.transfer(Cash("AUD"), 1000)
+        self.stock = Stock("ORD AU", 10.0, currency_code="AUD")
+        self.order_book = OrderBook()
+
+    def teardown_method(self, *args):
+        del self.portfolio
+        del self.stock
+        del self.order_book
+
+    def test_order_types(self):
+        portfolio, stock = self.portfolio, self.stock
+        with pytest.raises(TypeError):
+            LimitOrder(portfolio, stock, 10, "9.5")
+        with pytest.raises(ValueError):
+            LimitOrder(portfolio, stock, 10, -1)
+        with pytest.raises(ValueError):
+            StopOrder(portfolio, stock, 0, 9.5)
+        with pytest.raises(TypeError):
+            LimitOrder(portfolio, Cash("USD"), 10, 1.0)
+        with pytest.raises(TypeError):
+            self.order_book.add("order")
+
+        order = LimitOrder(portfolio, "ORD AU", 10, 9.5)
+        assert order.limit_price == 9.5
+        assert order.status == "open"
+        assert str(order) == "LimitOrder(Portfolio('AUD'), 'ORD AU', 10, 9.5)"
+        assert StopOrder(portfolio, stock, -10, 9).stop_price == 9
+
+    def test_triggers(self):
+        portfolio, stock = self.portfolio, self.stock
+        buy_limit = LimitOrder(portfolio, stock, 10, 9.5)
+        sell_limit = LimitOrder(portfolio, stock, -10, 11)
+        buy_stop = StopOrder(portfolio, stock, 10, 10.5)
+        sell_stop = StopOrder(portfolio, stock, -10, 9)
+        assert buy_limit.is_triggered(9.5)
+        assert not buy_limit.is_triggered(9.6)
+        assert sell_limit.is_triggered(11)
+        assert not sell_limit.is_triggered(10.9)
+        assert buy_stop.is_triggered(10.5)
+        assert not buy_stop.is_triggered(10.4)
+        assert sell_stop.is_triggered(9)
+        assert not sell_stop.is_triggered(9.1)
+        assert not sell_stop.is_triggered(None)
+
+    def test_order_book(self):
+        portfolio, stock = self.portfolio, self.stock
+        order_book = self.order_book
+        orders = [
+            LimitOrder(portfolio, stock, 10, 9.0),
+            LimitOrder(portfolio, stock, 10, 9.5),
+            LimitOrder(portfolio, stock, 10, 9.5),
+            StopOrder(portfolio, stock, 10, 10.5),
+            LimitOrder(portfolio, stock, -10, 11.0),
+        ]
+        for order in orders:
+            order_book.add(order)
+        assert len(order_book) == 5
+        assert order_book.check(stock) == []  # price is 10
+
+        assert order_book.cancel(orders[2]) is True
+        assert order_book.cancel(orders[2]) is False
+        assert orders[2].status == "cancelled"
+        with pytest.raises(ValueError):
+            order_book.add(orders[2])
+
+        stock.price = 9.5
+        assert order_book.check(stock) == [orders[1]]
+        assert orders[1].status == "filled"
+        assert portfolio.get_holding_units("ORD AU") == 10
+
+        stock.price = 12.0
+        assert order_book.check(stock) == [orders[3], orders[4]]
+        assert portfolio.get_holding_units("ORD AU") == 10
+        assert order_book.get_open_orders() == [orders[0]]
+        assert order_book.get_open_orders(Stock("ORD2 AU")) == []
+
+    def test_fills_use_broker_and_compliance(self):
+        portfolio, stock = self.portfolio, self.stock
+        portfolio.broker = Broker(
+            charges_strategy=FixedRatePlusPercentage(
+                5, 0.0, currency_code="AUD"
+            )
+        )
+        compliance = Compliance()
+        compliance.add_rule(UnitLimit(stock, 15))
+        portfolio.compliance = compliance
+        order_book = self.order_book
+        first = order_book.add(LimitOrder(portfolio, stock, 10, 9.5))
+        second = order_book.add(LimitOrder(portfolio, stock, 10, 9.0))
+        stock.price = 9.0
+        order_book.check(stock)
+        assert [first.status, second.status] == ["filled", "rejected"]
+        assert portfolio.get_holding_units("AUD") == 1000 - 90 - 5
+        assert len(order_book) == 0
+
+
+def test_backtest_orders():
+    reset()
+    portfolio = Portfolio("AUD")
+    stock = Stock("ORD3 AU", currency_code="AUD")
+
+    class DipStrategy(Strategy):
+        placed = False
+
+        def generate_trades(self):
+            if self.placed:
+                return None
+            self.placed = True
+            return [
+                LimitOrder(portfolio, stock, 100, 9.0),
+                StopOrder(portfolio, stock, 50, 12.0),
+            ]
+
+    backtest = Backtest(DipStrategy())
+    prices = [10.0, 9.5, 8.8, 11.0, 12.5]
+    for day, price in enumerate(prices):
+        backtest.load_event(
+            AssetPriceEvent(stock, datetime(2020, 9, day + 1), price)
+        )
+    backtest.run()
+    assert len(backtest.order_book) == 0
+    assert portfolio.get_holding_units("ORD3 AU") == 150
+    assert portfolio.get_holding_units("AUD") == -(100 * 8.8 + 50 * 12.5)
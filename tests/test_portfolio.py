@@ -1,4 +1,5 @@
 import pytest
+import pandas as pd
 from pxtrade.assets import reset, FxRate, Stock, Cash, Portfolio
 from pxtrade.compliance import Compliance
 from pxtrade.broker import Broker
@@ -239,3 +240,50 @@ class TestPortfolio(object):
         assert portfolio.broker is new_broker
         with pytest.raises(TypeError):
             portfolio.broker = None
+
+    def test_cross_rate_valuation(self):
+        usdjpy = FxRate("USDJPY", 100)
+        stock_jpy = Stock("ZZB JP", 1000, currency_code="JPY")
+        portfolio = self.portfolio
+        portfolio.transfer(stock_jpy, 7)
+        # AUDJPY = 0.7 * 100
+        assert round(portfolio.value, 6) == 100
+        usdjpy.rate = 50
+        assert round(portfolio.value, 6) == 200
+        self.audusd.rate = 0.35
+        assert round(portfolio.value, 6) == 400
+
+    def test_rebalance_to(self):
+        portfolio = self.portfolio
+        with pytest.raises(ValueError):
+            portfolio.rebalance_to({"ZZB AU": 0.5})  # no value
+        portfolio.transfer(self.aud, 10000)
+        with pytest.raises(TypeError):
+            portfolio.rebalance_to([0.5])
+        with pytest.raises(ValueError):
+            portfolio.rebalance_to({"XXX": 0.5})
+        with pytest.raises(ValueError):
+            portfolio.rebalance_to({"AUD": 0.5})
+        with pytest.raises(ValueError):
+            portfolio.rebalance_to({"ZZB AU": 0.5}, lot_size=0)
+
+        targets = {self.stock_aud: 0.5, "ZZB US": 0.3}
+        batch = portfolio.rebalance_to(targets, lot_size=5)
+        assert [(t.asset_code, t.units) for t in batch.trades] == [
+            ("ZZB AU", 2000),
+            ("ZZB US", 15),  # 3,000 AUD is 19.1 shares at 110 USD
+        ]
+        batch = portfolio.rebalance_to(targets)
+        batch.run()
+        assert portfolio.get_holding_units("ZZB AU") == 2000
+        assert portfolio.get_holding_units("ZZB US") == 19
+        assert round(portfolio.value, 6) == 10000
+
+        # within tolerance of the targets
+        assert len(portfolio.rebalance_to(targets, tolerance=0.01)) == 0
+        assert len(portfolio.rebalance_to(targets)) == 0
+
+        batch = portfolio.rebalance_to(pd.Series({"ZZB US": 0.0}))
+        assert [(t.asset_code, t.units) for t in batch.trades] == [
+            ("ZZB US", -19)
+        ]
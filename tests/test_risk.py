@@ -0,0 +1,137 @@
+from datetime import datetime
+import gc
+import pytest
+import numpy as np
+from pxtrade import Backtest, Strategy
+from pxtrade.assets import reset, Cash, FxRate, Stock, Portfolio
+from pxtrade.events import AssetPriceEvent
+from pxtrade.risk import RiskTracker
+
+
+PRICES = [10.0, 11.0, 9.0, 12.0, 8.0, 6.0, 9.0]
+
+
+def make_backtest():
+    reset()
+    portfolio = Portfolio("AUD")
+    stock = Stock("RSK AU", 10.0, currency_code="AUD")
+    portfolio.transfer(stock, 100)
+    backtest = Backtest()
+    for day, price in enumerate(PRICES):
+        backtest.load_event(
+            AssetPriceEvent(stock, datetime(2020, 9, day + 1), price)
+        )
+    return portfolio, backtest
+
+
+def test_risk_tracker_types():
+    portfolio, backtest = make_backtest()
+    with pytest.raises(TypeError):
+        RiskTracker("Portfolio", backtest)
+    with pytest.raises(TypeError):
+        RiskTracker(portfolio, "backtest")
+    with pytest.raises(TypeError):
+        RiskTracker(portfolio, backtest, max_drawdown="0.3")
+    with pytest.raises(ValueError):
+        RiskTracker(portfolio, backtest, max_drawdown=1.5)
+    with pytest.raises(TypeError):
+        RiskTracker(portfolio, backtest, stop_when=0.3)
+
+
+def test_risk_tracker():
+    portfolio, backtest = make_backtest()
+    tracker = RiskTracker(portfolio, backtest, periods_per_year=252)
+    assert tracker.value is None
+    assert tracker.mean_return is None
+    assert tracker.variance is None
+    assert tracker.volatility is None
+
+    seen = list()
+
+    class ReadRiskStrategy(Strategy):
+        def generate_trades(self):
+            seen.append(tracker.peak)
+
+    backtest.add_strategy(ReadRiskStrategy())
+    backtest.run()
+    assert backtest.stopped is False
+    # strategies run before the time stamp completes
+    assert seen == [None, 1000, 1100, 1100, 1200, 1200, 1200]
+
+    values = np.array(PRICES) * 100
+    returns = values[1:] / values[:-1] - 1
+    assert tracker.value == 900
+    assert tracker.peak == 1200
+    assert tracker.drawdown == pytest.approx(0.25)
+    assert tracker.max_drawdown == pytest.approx(0.5)
+    assert tracker.mean_return == pytest.approx(returns.mean())
+    assert tracker.variance == pytest.approx(returns.var(ddof=1))
+    expected = returns.std(ddof=1) * np.sqrt(252)
+    assert tracker.volatility == pytest.approx(expected)
+
+
+def test_risk_tracker_stops_backtest():
+    portfolio, backtest = make_backtest()
+    tracker = RiskTracker(portfolio, backtest, max_drawdown=0.3)
+    backtest.run()
+    assert backtest.stopped is True
+    assert backtest.datetime == datetime(2020, 9, 5)  # 12 -> 8
+    assert tracker.max_drawdown == pytest.approx(1 / 3)
+    assert backtest.num_events_loaded == 2  # left in the queue
+
+    portfolio, backtest = make_backtest()
+    tracker = RiskTracker(
+        portfolio, backtest, stop_when=lambda tracker: tracker.value < 950
+    )
+    backtest.run()
+    assert backtest.datetime == datetime(2020, 9, 3)
+
+
+def test_unreferenced_risk_tracker_stops_backtest():
+    portfolio, backtest = make_backtest()
+    RiskTracker(portfolio, backtest, max_drawdown=0.3)
+    gc.collect()
+    assert len(backtest.monitors) == 1
+    backtest.run()
+    assert backtest.datetime == datetime(2020, 9, 5)
+
+    # a stopped backtest resumes with the remaining events,
+    # though the tracker stops again while in drawdown
+    backtest.run()
+    assert backtest.datetime == datetime(2020, 9, 6)
+    backtest.run()
+    assert backtest.datetime == datetime(2020, 9, 7)
+    with pytest.raises(TypeError):
+        backtest.add_monitor("tracker")
+
+
+def test_exposure():
+    reset()
+    portfolio = Portfolio("AUD")
+    audusd = FxRate("AUDUSD", 0.5)
+    long_stock = Stock("RSK1 AU", 10, currency_code="AUD")
+    short_stock = Stock("RSK2 US", 10, currency_code="USD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    portfolio.trade(long_stock, 50)
+    portfolio.trade(short_stock, -20)
+    backtest = Backtest()
+    tracker = RiskTracker(portfolio, backtest)
+    assert tracker.gross_exposure == pytest.approx(500 + 400)
+    assert tracker.net_exposure == pytest.approx(500 - 400)
+    exposure = tracker.exposure_by_currency()
+    assert list(exposure.columns) == ["gross", "net"]
+    assert exposure.at["AUD", "gross"] == pytest.approx(1000)
+    assert exposure.at["AUD", "net"] == pytest.approx(1000)
+    # short USD stock hedged by USD cash
+    assert exposure.at["USD", "gross"] == pytest.approx(800)
+    assert exposure.at["USD", "net"] == pytest.approx(0)
+    assert audusd.rate == 0.5
+
+    # values are tracked as each time stamp completes
+    portfolio.trade(short_stock, 20)
+    assert tracker.gross_exposure == pytest.approx(900)
+    backtest.load_event(AssetPriceEvent(long_stock, datetime(2020, 9, 1), 10))
+    backtest.run()
+    assert tracker.gross_exposure == pytest.approx(500)
+    assert tracker.net_exposure == pytest.approx(500)
+    assert "USD" not in tracker.exposure_by_currency().index
@@ -0,0 +1,119 @@
+from datetime import datetime, time
+import pytest
+import pandas as pd
+from pxtrade.assets import reset, Stock
+from pxtrade.backtest import Backtest
+from pxtrade.strategy import Strategy
+from pxtrade.events import AssetPriceEvent, IndicatorEvent
+from pxtrade.schedule import EveryN, OnOffset, TimeOfDay, OnChange
+
+
+def get_due(schedule, datetimes, changed=frozenset()):
+    return [dt for dt in datetimes if schedule.is_due(dt, changed)]
+
+
+def test_every_n():
+    with pytest.raises(TypeError):
+        EveryN("2")
+    with pytest.raises(ValueError):
+        EveryN(0)
+
+    datetimes = [datetime(2020, 9, day) for day in range(1, 8)]
+    due = get_due(EveryN(3), datetimes)
+    assert due == [
+        datetime(2020, 9, 1),
+        datetime(2020, 9, 4),
+        datetime(2020, 9, 7),
+    ]
+
+
+def test_on_offset_month_end():
+    datetimes = pd.bdate_range("2020-09-01", "2020-12-31").to_pydatetime()
+    due = get_due(OnOffset("M"), datetimes)
+    # Oct 31st falls on a Saturday
+    assert due == [
+        datetime(2020, 9, 30),
+        datetime(2020, 11, 2),
+        datetime(2020, 11, 30),
+        datetime(2020, 12, 31),
+    ]
+
+
+def test_on_offset_intraday():
+    datetimes = pd.date_range(
+        "2020-09-01 09:30", "2020-09-02 16:00", freq="15min"
+    ).to_pydatetime()
+    due = get_due(OnOffset("D"), datetimes)
+    assert due == [datetime(2020, 9, 1, 9, 30), datetime(2020, 9, 2, 9, 30)]
+
+    due = get_due(OnOffset("MS"), datetimes)
+    assert due == [datetime(2020, 9, 1, 9, 30)]  # Sep 1st is a month start
+
+    due = get_due(OnOffset("2h"), datetimes[:12])
+    assert due == [
+        datetime(2020, 9, 1, 9, 30),
+        datetime(2020, 9, 1, 11, 30),
+    ]
+
+
+def test_time_of_day():
+    with pytest.raises(TypeError):
+        TimeOfDay(1600)
+
+    datetimes = pd.date_range(
+        "2020-09-01 09:30", "2020-09-02 16:00", freq="15min"
+    ).to_pydatetime()
+    expected = [datetime(2020, 9, 1, 15, 45), datetime(2020, 9, 2, 15, 45)]
+    assert get_due(TimeOfDay("15:40"), datetimes) == expected
+    assert get_due(TimeOfDay(time(15, 40)), datetimes) == expected
+
+
+def test_on_change():
+    reset()
+    stock1 = Stock("SCH1")
+    stock2 = Stock("SCH2")
+    with pytest.raises(TypeError):
+        OnChange(123)
+
+    dt = datetime(2020, 9, 1)
+    assert OnChange().is_due(dt, {stock1}) is True
+    assert OnChange().is_due(dt, set()) is False
+    assert OnChange(stock1, "VIX").is_due(dt, {"VIX"}) is True
+    assert OnChange(stock1, "VIX").is_due(dt, {stock2}) is False
+
+
+def test_backtest_schedule():
+    reset()
+    stock = Stock("SCH3")
+    backtest = Backtest()
+    for day in range(1, 11):
+        dt = datetime(2020, 9, day)
+        backtest.load_event(AssetPriceEvent(stock, dt, day))
+        if day % 5 == 0:
+            backtest.load_event(
+                IndicatorEvent("Signal", dt, day, backtest=backtest)
+            )
+
+    class SignalStrategy(Strategy):
+        schedule = OnChange("Signal")
+        called = list()
+
+        def generate_trades(self):
+            self.called.append(backtest.datetime)
+            assert backtest.changed == {stock, "Signal"}
+
+    strategy = SignalStrategy()
+    backtest.add_strategy(strategy)
+    backtest.run()
+    assert strategy.called == [datetime(2020, 9, 5), datetime(2020, 9, 10)]
+
+
+def test_backtest_schedule_type():
+    class BadScheduleStrategy(Strategy):
+        schedule = "daily"
+
+        def generate_trades(self):
+            pass  # pragma: no cover
+
+    with pytest.raises(TypeError):
+        Backtest(BadScheduleStrategy())
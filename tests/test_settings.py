@@ -1,9 +1,13 @@
 from configparser import ConfigParser
+import pytest
 from pxtrade.assets.codes import check_currency_code
 from pxtrade.settings import (
     config,
     set_default_currency_code,
     get_default_currency_code,
+    set_trusted_mode,
+    get_trusted_mode,
+    use_trusted_mode,
 )
 
 
@@ -18,3 +22,17 @@ def test_set_default_currency_code():
     assert get_default_currency_code() == "XXX"
     set_default_currency_code("YYY")
     assert get_default_currency_code() == "YYY"
+
+
+def test_trusted_mode():
+    assert get_trusted_mode() is False
+    with pytest.raises(TypeError):
+        set_trusted_mode(1)
+    set_trusted_mode(True)
+    assert get_trusted_mode() is True
+    set_trusted_mode(False)
+    assert get_trusted_mode() is False
+
+    with use_trusted_mode():
+        assert get_trusted_mode() is True
+    assert get_trusted_mode() is False
@@ -0,0 +1,136 @@
+from datetime import datetime
+import multiprocessing
+import pytest
+import numpy as np
+import pandas as pd
+from pxtrade.observable import Observer
+from pxtrade.assets import reset, Stock
+from pxtrade.backtest import Backtest
+from pxtrade.events import AssetPriceEvent
+from pxtrade.live import TimestampClose
+from pxtrade.shared_data import SharedMarketData, SharedMarketDataHandle
+
+
+PRICES = pd.DataFrame(
+    {"SHA": [1.0, 2.0, np.nan, 4.0], "SHB": [10.0, 11.0, 12.0, 13.0]},
+    index=pd.date_range("2020-09-01", periods=4),
+)
+
+
+def sum_column(handle, code):
+    data = SharedMarketData.attach(handle)
+    total = float(np.nansum(data.get_column(code)))
+    data.close()
+    return total
+
+
+def test_shared_market_data_types():
+    with pytest.raises(TypeError):
+        SharedMarketData.create(PRICES["SHA"])
+    with pytest.raises(TypeError):
+        SharedMarketData.create(PRICES.reset_index(drop=True))
+    with pytest.raises(TypeError):
+        SharedMarketData.attach("name")
+
+
+def test_shared_market_data():
+    with SharedMarketData.create(PRICES) as data:
+        assert len(data) == 4
+        assert data.codes == ("SHA", "SHB")
+        assert data.get_column_index("SHB") == 1
+        assert list(data.datetimes) == list(PRICES.index.values)
+        column = data.get_column("SHB")
+        assert list(column) == [10, 11, 12, 13]
+        assert column.flags.f_contiguous  # no copy needed
+        with pytest.raises(ValueError):
+            column[0] = 1.0  # read only
+        with pytest.raises(ValueError):
+            data.get_column("XXX")
+        with pytest.raises(ValueError):
+            data.get_column(2)
+        with pytest.raises(TypeError):
+            data.get_column(1.5)
+        pd.testing.assert_frame_equal(
+            data.get_frame(), PRICES, check_freq=False
+        )
+        assert str(data).endswith("4 rows, 2 codes)")
+        del column
+
+        # attach by name, as a worker would
+        handle = data.handle
+        assert handle == SharedMarketDataHandle(data.name, 4, PRICES.columns)
+        other = SharedMarketData.attach(handle)
+        assert list(other.get_column(1)) == [10, 11, 12, 13]
+        other.close()
+
+
+def test_shared_market_data_load_events():
+    reset()
+    stock_a = Stock("SHA")
+    stock_b = Stock("SHB")
+    with SharedMarketData.create(PRICES) as data:
+        backtest = Backtest()
+        with pytest.raises(TypeError):
+            data.load_events("backtest")
+        with pytest.raises(ValueError):
+            data.load_events(backtest, ["SHC"])
+        assert data.load_events(backtest) == 7  # NaN is skipped
+        backtest.run()
+        assert stock_a.price == 4
+        assert stock_b.price == 13
+
+        resumed = Backtest()
+        resumed._resume_datetime = datetime(2020, 9, 2)
+        assert data.load_events(resumed, "SHA") == 1
+
+
+def test_shared_market_data_iter_events():
+    reset()
+    stock_a = Stock("SHA")
+    stock_b = Stock("SHB")
+    with SharedMarketData.create(PRICES) as data:
+        backtest = Backtest()
+        with pytest.raises(TypeError):
+            next(data.iter_events("backtest"))
+        with pytest.raises(ValueError):
+            next(data.iter_events(backtest, ["SHC"]))
+
+        # events are created as they are consumed
+        events = data.iter_events(backtest)
+        first = next(events)
+        assert isinstance(first, AssetPriceEvent)
+        assert first.datetime == datetime(2020, 9, 1)
+        items = [first] + list(events)
+        assert len(items) == 7 + 4  # NaN is skipped
+        assert isinstance(items[2], TimestampClose)
+
+        prices = list()
+
+        class Recorder(Observer):
+            def observable_update(self, backtest):
+                prices.append((stock_a.price, stock_b.price))
+
+        backtest.add_monitor(Recorder())
+        backtest.run_live(data.iter_events(backtest))
+        assert prices == [(1, 10), (2, 11), (2, 12), (4, 13)]
+        assert backtest.num_events_loaded == 0
+
+        resumed = Backtest()
+        resumed._resume_datetime = datetime(2020, 9, 2)
+        items = list(data.iter_events(resumed, "SHA"))
+        assert [item.datetime for item in items] == [datetime(2020, 9, 4)] * 2
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="requires the fork start method",
+)
+def test_shared_market_data_workers():
+    context = multiprocessing.get_context("fork")
+    with SharedMarketData.create(PRICES) as data:
+        handle = data.handle
+        with context.Pool(2) as pool:
+            totals = pool.starmap(
+                sum_column, [(handle, "SHA"), (handle, "SHB")]
+            )
+    assert totals == [7, 46]
@@ -0,0 +1,130 @@
+from datetime import datetime
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from pxtrade.assets import reset, Stock, Cash, Portfolio
+from pxtrade.backtest import Backtest
+from pxtrade.events import AssetPriceEvent
+from pxtrade.history import History, FrameStore, DeltaStore
+from pxtrade.spill import SpillStore, SpillReader
+
+
+def test_spill_store_types(tmp_path):
+    with pytest.raises(TypeError):
+        SpillStore(tmp_path, batch_size="10")
+    with pytest.raises(ValueError):
+        SpillStore(tmp_path, batch_size=0)
+    with pytest.raises(ValueError):
+        SpillReader(os.path.join(tmp_path, "missing"))
+
+
+def test_spill_store(tmp_path):
+    store = SpillStore(tmp_path, batch_size=2)
+    assert len(store.get()) == 0
+    datetimes = pd.date_range("2020-09-01", periods=5)
+    snapshots = [
+        {"A": 1.0, "B": 10.0},
+        {"A": 2.0, "B": 11.0},
+        {"A": 3.0, "B": 12.0, "C": 1.5},
+        {"A": 4.0, "C": 2.5},
+        {"A": 5.0, "B": 14.0, "D": "x"},
+    ]
+    frame_store = FrameStore()
+    for date_time, snapshot in zip(datetimes, snapshots):
+        store.append(date_time, snapshot)
+        frame_store.append(date_time, snapshot)
+
+    # two batches written, with one row left in memory
+    assert store.get_reader().num_batches == 2
+    assert len(store._rows) == 1
+    assert os.path.exists(os.path.join(tmp_path, "000001_values.npy"))
+
+    pd.testing.assert_frame_equal(
+        store.get(), frame_store.get(), check_dtype=False, check_freq=False
+    )
+    values = store.get_values("C")
+    assert np.isnan(values[:2]).all()
+    assert list(values[2:4]) == [1.5, 2.5]
+    values = store.get_values("B")
+    assert np.isnan(values[3])
+    assert values[4] == 14.0
+    with pytest.raises(ValueError):
+        store.get_values("E")
+    assert list(store.get_datetimes()) == list(datetimes.values)
+
+    # a reader scans flushed batches without the in-memory tail
+    reader = SpillReader(tmp_path)
+    assert reader.num_rows == 4
+    assert [len(batch) for batch in reader.iter_batches()] == [2, 2]
+    assert list(reader.get_values("A")) == [1, 2, 3, 4]
+    store.flush()
+    assert SpillReader(tmp_path).num_rows == 5
+
+    store.clear()
+    assert len(store.get()) == 0
+    assert SpillReader(tmp_path).num_batches == 0
+
+
+def test_history_spill_store():
+    reset()
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    stock = Stock("SPL", 1.0, currency_code="AUD")
+    store = SpillStore(batch_size=3)
+    history = History(portfolio, store=store)
+    frame_history = History(portfolio)
+    for day in range(1, 11):
+        date_time = datetime(2020, 9, day)
+        stock.price = day
+        history.take_snapshot(date_time)
+        frame_history.take_snapshot(date_time)
+    assert store.get_reader().num_batches == 3
+    df = history.get()
+    pd.testing.assert_frame_equal(df, frame_history.get(), check_dtype=False)
+    assert list(history.get_values("SPL")) == list(range(1, 11))
+
+
+def test_backtest_flushes_spill_store(tmp_path):
+    reset()
+    portfolio = Portfolio("AUD")
+    stock = Stock("SPF", currency_code="AUD")
+    history = History(portfolio, store=SpillStore(tmp_path, batch_size=3))
+    backtest = Backtest()
+    for day in range(1, 6):
+        backtest.load_event(AssetPriceEvent(stock, datetime(2020, 9, day), 1))
+    backtest.run()
+    assert len(history.get()) == 5
+    # another process sees the whole run
+    assert SpillReader(tmp_path).num_rows == 5
+
+
+def test_history_spill_store_string_indicator(tmp_path):
+    reset()
+    portfolio = Portfolio("AUD")
+    portfolio.transfer(Cash("AUD"), 1000)
+    backtest = Backtest()
+    stores = [FrameStore(), DeltaStore(), SpillStore(tmp_path, batch_size=2)]
+    histories = [
+        History(portfolio, backtest=backtest, store=store) for store in stores
+    ]
+    signals = ["1", "buy", None, "sell", "2"]
+    flags = [True, False, True, True, False]
+    for day, (signal, flag) in enumerate(zip(signals, flags), start=1):
+        backtest.set_indicator("Signal", signal)
+        backtest.set_indicator("Flag", flag)
+        backtest.set_indicator("Level", day)
+        for history in histories:
+            history.take_snapshot(datetime(2020, 9, day))
+
+    frames = [history.get() for history in histories]
+    df = frames[2]
+    # strings that look numeric and booleans are kept as they are
+    assert list(df["Signal"]) == signals
+    assert list(df["Flag"]) == flags
+    assert df["Level"].dtype == np.float64
+    for frame in frames[:2]:
+        pd.testing.assert_frame_equal(frame, df)
+    with pytest.raises(ValueError):
+        stores[2].get_values("Signal")
+    assert list(stores[2].get_values("Level")) == [1, 2, 3, 4, 5]
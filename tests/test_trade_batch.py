@@ -0,0 +1,141 @@
+from datetime import datetime
+import pytest
+from pxtrade import Backtest, Broker, Strategy
+from pxtrade.assets import reset, Cash, Stock, Portfolio
+from pxtrade.broker import FixedRatePlusPercentage
+from pxtrade.compliance import Compliance, UnitLimit
+from pxtrade.events import AssetPriceEvent, TradeBatchEvent
+from pxtrade.trade import LimitOrder, Trade, TradeBatch
+
+
+class TestTradeBatch(object):
+    def setup_method(self, *args):
+        reset()
+        portfolio = self.portfolio = Portfolio("AUD")
+        portfolio.transfer(Cash("AUD"), 1000)
+        self.stock1 = Stock("BAT1 AU", 2.50, currency_code="AUD")
+        self.stock2 = Stock("BAT2 AU", 5.00, currency_code="AUD")
+
+    def teardown_method(self, *args):
+        del self.portfolio
+        del self.stock1
+        del self.stock2
+
+    def test_batch_types(self):
+        with pytest.raises(TypeError):
+            TradeBatch([123])
+        with pytest.raises(TypeError):
+            TradeBatch(fallback=1)
+        with pytest.raises(TypeError):
+            TradeBatchEvent(datetime(2020, 9, 1), [])
+        with pytest.raises(TypeError):
+            # orders wait for their trigger price in the order book
+            TradeBatch([LimitOrder(self.portfolio, self.stock1, 5, 1.0)])
+
+    def test_netting(self):
+        portfolio = self.portfolio
+        batch = TradeBatch(
+            [
+                Trade(portfolio, self.stock1, 100),
+                Trade(portfolio, self.stock2, 10),
+                Trade(portfolio, self.stock1, -40),
+                Trade(portfolio, self.stock2, -10),
+            ]
+        )
+        assert len(batch) == 4
+        assert str(batch) == "TradeBatch(4 trades)"
+        netted = batch.net()
+        assert [(t.asset_code, t.units) for t in netted] == [("BAT1 AU", 60)]
+
+    def test_run(self):
+        portfolio = self.portfolio
+        portfolio.broker = Broker(
+            charges_strategy=FixedRatePlusPercentage(
+                10, 0.0, currency_code="AUD"
+            )
+        )
+        trades = [
+            Trade(portfolio, self.stock1, 100),
+            Trade(portfolio, self.stock1, -40),
+            Trade(portfolio, self.stock2, 10),
+            Trade(portfolio, self.stock2, -10),
+        ]
+        TradeBatch(trades).run()
+        assert all(trade.passed_compliance for trade in trades)
+        assert portfolio.get_holdings() == {
+            "AUD": 1000 - 150 - 10,  # one charge after netting
+            "BAT1 AU": 60,
+        }
+        assert portfolio.value == 1000 - 10
+
+    def test_compliance(self):
+        portfolio = self.portfolio
+        compliance = Compliance()
+        compliance.add_rule(UnitLimit(self.stock1, 50))
+        portfolio.compliance = compliance
+
+        trades = [
+            Trade(portfolio, self.stock1, 100),
+            Trade(portfolio, self.stock1, -60),
+            Trade(portfolio, self.stock2, 10),
+        ]
+        TradeBatch(trades).run()  # netted to 40 units
+        assert all(trade.passed_compliance for trade in trades)
+        assert portfolio.get_holding_units("BAT1 AU") == 40
+
+        # the combined trades fail so nothing is executed
+        trades = [
+            Trade(portfolio, self.stock1, 20),
+            Trade(portfolio, self.stock2, 10),
+        ]
+        TradeBatch(trades).run()
+        assert not any(trade.passed_compliance for trade in trades)
+        assert portfolio.get_holding_units("BAT1 AU") == 40
+        assert portfolio.get_holding_units("BAT2 AU") == 10
+
+        # unless we fall back to running each trade separately
+        trades = [
+            Trade(portfolio, self.stock1, 20),
+            Trade(portfolio, self.stock2, 10),
+        ]
+        TradeBatch(trades, fallback=True).run()
+        assert [trade.passed_compliance for trade in trades] == [False, True]
+        assert portfolio.get_holding_units("BAT1 AU") == 40
+        assert portfolio.get_holding_units("BAT2 AU") == 20
+
+    def test_portfolio_batch(self):
+        portfolio = self.portfolio
+        with portfolio.batch():
+            portfolio.transfer(self.stock1, 100)
+            assert portfolio.value == 1000  # deferred
+        assert portfolio.value == 1250
+
+
+def test_backtest_batch_trades():
+    reset()
+    portfolio = Portfolio("AUD")
+    stock1 = Stock("BAT3 AU", currency_code="AUD")
+    stock2 = Stock("BAT4 AU", currency_code="AUD")
+
+    class RebalanceStrategy(Strategy):
+        def generate_trades(self):
+            return [
+                Trade(portfolio, stock1, 2),
+                Trade(portfolio, stock2, 1),
+                Trade(portfolio, stock1, -1),
+            ]
+
+    for batch_trades in (True, False):
+        with pytest.raises(TypeError):
+            Backtest(batch_trades=1)
+        backtest = Backtest(RebalanceStrategy(), batch_trades=batch_trades)
+        for day in range(1, 3):
+            dt = datetime(2020, 9, day)
+            backtest.load_event(AssetPriceEvent(stock1, dt, 2.0))
+            backtest.load_event(AssetPriceEvent(stock2, dt, 3.0))
+        backtest.run()
+    assert portfolio.get_holdings() == {
+        "AUD": -20.0,
+        "BAT3 AU": 4,
+        "BAT4 AU": 4,
+    }